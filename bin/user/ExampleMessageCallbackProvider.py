@@ -11,13 +11,13 @@ Configuration:
     # The message callback provider.
     message_callback_provider = user.ExampleMessageCallbackProvider.MessageCallbackProvider
 
+This is an example of a custom message callback provider.
+To process xml payloads, use the xml message type, [[[message]]] type = xml.
 """
 
 import xml.etree.ElementTree
 import user.MQTTSubscribe
 
-from weeutil.weeutil import to_float  # noqa: F401 - used in eval statement
-
 class MessageCallbackProvider(user.MQTTSubscribe.AbstractMessageCallbackProvider):
     # pylint: disable=too-few-public-methods
     """ Provide the MQTT callback. """
@@ -31,10 +31,7 @@ class MessageCallbackProvider(user.MQTTSubscribe.AbstractMessageCallbackProvider
     def get_observations(self, parent, fullname, fields, unit_system):
         """ Create the dictionary of observations. """
         observations = {}
-        conversion_func = {
-            'source': 'lambda x: to_float(x)',
-            'compiled': eval('lambda x: to_float(x)')  # pylint: disable=eval-used
-        }
+        conversion_func = user.MQTTSubscribe.ConversionFunctions.get('float')
 
         for child in parent:
             saved_fullname = fullname
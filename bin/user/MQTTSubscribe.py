@@ -165,14 +165,26 @@ CONFIG_SPEC_TEXT = """ \
 
     [[logging]]
         # The configuration to control throttling the logging.
-        # Throttling uses a fixed window rate limit algorithm.
-        # But, every 'max' messages in a 'window' will always be logged.
+        # Each message id is throttled separately.
+        # When 'duration' is 0, the first of every 'max' messages is logged.
+        # The number of messages suppressed is periodically logged in a single summary message.
         #
         # Throttling logging may result in important log messages being missed.
         # This may make it hard, to impossible, to debug problems.
         #
         # EXPERIMENTAL and should be used at your own risk.
         [[[throttle]]]
+            # The rate limit algorithm.
+            # Valid values: fixed, sliding, token_bucket.
+            # fixed: at most 'max' messages are logged in each 'duration' second window.
+            # sliding: like fixed, but the count of the previous window is weighted into the current window.
+            # token_bucket: bursts of up to 'max' messages are logged, and 'max' more are allowed over each 'duration' seconds.
+            # This can be overriden for specific logging levels and/or specific messages.
+            # Default is fixed.
+            algorithm = fixed
+            # The time interval in seconds for logging the number of suppressed messages.
+            # Default is 300.
+            report_interval = 300
             [[[[category]]]]
                 # Configuration data for 'every' message that is logged.
                 # This can be overriden for specific logging levels and/or specific messages.
@@ -181,6 +193,8 @@ CONFIG_SPEC_TEXT = """ \
                     max =
                     # The time interval in seconds for which the logged messages will be limited.
                     duration =
+                    # The rate limit algorithm. Default is the 'algorithm' of the throttle section.
+                    algorithm =
                 # Configuration data for error level messages.
                 # This can be overriden for specific messages.
                 [[[[[ERROR]]]]]
@@ -188,6 +202,8 @@ CONFIG_SPEC_TEXT = """ \
                     max =
                     # The time interval in seconds for which the logged messages will be limited.
                     duration =
+                    # The rate limit algorithm. Default is the 'algorithm' of the throttle section.
+                    algorithm =
                 # Configuration data for informational level messages.
                 # This can be overriden for specific messages.
                 [[[[[INFO]]]]]
@@ -195,6 +211,8 @@ CONFIG_SPEC_TEXT = """ \
                     max =
                     # The time interval in seconds for which the logged messages will be limited.
                     duration =
+                    # The rate limit algorithm. Default is the 'algorithm' of the throttle section.
+                    algorithm =
                 # Configuration data for debug level messages.
                 # This can be overriden for specific messages.
                 [[[[[DEBUG]]]]]
@@ -202,6 +220,8 @@ CONFIG_SPEC_TEXT = """ \
                     max =
                     # The time interval in seconds for which the logged messages will be limited.
                     duration =
+                    # The rate limit algorithm. Default is the 'algorithm' of the throttle section.
+                    algorithm =
                 # Configuration data for trace level messages.
                 # This can be overriden for specific messages.
                 [[[[[TRACE]]]]]
@@ -209,6 +229,8 @@ CONFIG_SPEC_TEXT = """ \
                     max =
                     # The time interval in seconds for which the logged messages will be limited.
                     duration =
+                    # The rate limit algorithm. Default is the 'algorithm' of the throttle section.
+                    algorithm =
             # Configuration data for specific messages.
             # Each subsection is a specific message or list of messages.
             [[[[messages]]]]
@@ -217,22 +239,169 @@ CONFIG_SPEC_TEXT = """ \
                     max =
                     # The time interval in seconds for which the logged messages will be limited.
                     duration =
+                    # The rate limit algorithm. Default is the 'algorithm' of the throttle section.
+                    algorithm =
                     # Optional list of messages for which this section is for
                     # If omitted, the section name is ised as the message id.
                     messages =
 
+        # The configuration to sample the debug and trace logging.
+        # A message is logged when at least 'interval' seconds have passed since the last one for its topic,
+        # and it is the first of every 'every' of those messages.
+        # The decision is made before the message is formatted.
+        #
+        # Sampling logging may result in important log messages being missed.
+        #
+        # EXPERIMENTAL and should be used at your own risk.
+        [[[sample]]]
+            [[[[category]]]]
+                # Configuration data for debug level messages.
+                # This can be overriden for specific messages.
+                [[[[[DEBUG]]]]]
+                    # Log 1 of every 'every' messages.
+                    every =
+                    # Log at most one message per topic every 'interval' seconds.
+                    # Messages without a topic are limited to one every 'interval' seconds.
+                    interval =
+                # Configuration data for trace level messages.
+                # This can be overriden for specific messages.
+                [[[[[TRACE]]]]]
+                    # Log 1 of every 'every' messages.
+                    every =
+                    # Log at most one message per topic every 'interval' seconds.
+                    # Messages without a topic are limited to one every 'interval' seconds.
+                    interval =
+            # Configuration data for specific messages.
+            # Each subsection is a specific message or list of messages.
+            [[[[messages]]]]
+                [[[[[REPLACE_ME]]]]]
+                    # Log 1 of every 'every' messages.
+                    every =
+                    # Log at most one message per topic every 'interval' seconds.
+                    # Messages without a topic are limited to one every 'interval' seconds.
+                    interval =
+                    # Optional list of messages for which this section is for
+                    # If omitted, the section name is used as the message id.
+                    messages =
+
+        # The configuration to write the log messages from a separate thread.
+        # Messages are put on a bounded queue, so that the MQTT network thread does not wait on the log handlers.
+        # When the queue is full, messages are dropped and the number dropped is periodically logged.
+        #
+        # EXPERIMENTAL and should be used at your own risk.
+        [[[queue]]]
+            # Turn queued logging on and off.
+            # Default is false.
+            enable = false
+            # The maximum number of messages waiting to be logged.
+            # Default is 1000.
+            max_size = 1000
+            # The time interval in seconds for logging the number of dropped messages.
+            # Default is 300.
+            report_interval = 300
+
+    # The configuration to keep the last messages received in memory.
+    # The messages can be written to a file to debug problems, without logging every message.
+    # The file has one JSON object per line with the topic, time received, qos and payload.
+    # A payload that is not UTF-8 is written base64 encoded as 'payload_base64'.
+    [[flight_recorder]]
+        # Turn the flight recorder on and off.
+        # Default is false.
+        enable = false
+        # The number of messages to keep.
+        # Default is 100.
+        size = 100
+        # The file the messages are written to. It is overwritten each time.
+        # Default is /var/tmp/MQTTSubscribe_flight_recorder.jsonl.
+        filename = /var/tmp/MQTTSubscribe_flight_recorder.jsonl
+        # Write the messages when an exception occurs processing a message.
+        # Default is true.
+        dump_on_exception = true
+        # The minimum time in seconds between writing the messages because of an exception.
+        # Default is 300.
+        dump_interval = 300
+        # The signal that writes the messages. For example, SIGUSR2.
+        # Default is None, no signal.
+        signal = None
+
+    # The configuration of the errors processing messages.
+    # The first error of each topic and exception type is logged with its traceback.
+    # The others are counted, and their number is logged every report_interval seconds.
+    [[message_errors]]
+        # The time interval in seconds between logging the number of errors that were not logged.
+        # 0 logs every error.
+        # Default is 300.
+        report_interval = 300
+        # The file the messages that could not be processed are appended to.
+        # It has the format of the flight recorder file, with the exception, and can be processed again with the parse --jsonl command.
+        # A compressed payload is written decompressed.
+        # Default is None, no file.
+        dead_letter_filename = None
+        # The maximum size in bytes of the dead letter file, no more messages are written when it is reached.
+        # Default is 1048576.
+        max_dead_letter_size = 1048576
+
     # Configuration for the message callback.
     # DEPRECATED - use [[[message]]] under [[topics]]
     [[message_callback]]
         # The format of the MQTT payload.
-        # Currently support: individual, json, keyword
+        # Currently support: individual, json, keyword, msgpack, cbor, xml
+        # msgpack needs the msgpack module and cbor the cbor2 or cbor module.
         # Must be specified.
         type = REPLACE_ME
 
-        # When the json is nested, the delimiter between the hierarchies.
+        # When the json, msgpack or cbor is nested, the delimiter between the hierarchies.
         # Default is _.
         flatten_delimiter = _
 
+        # When the payload is an array, whether each element is a record with its own dateTime.
+        # Only used by the json, msgpack and cbor types.
+        # Valid values: True, False.
+        # Default is False.
+        batch = False
+
+        # The compression of the payload, it is decompressed before it is decoded.
+        # Valid values: none, zlib, gzip, auto.
+        # auto decompresses payloads with a zlib or gzip header and leaves the others as is.
+        # Default is none.
+        compression = none
+
+        # The maximum size in bytes of a decompressed payload, larger payloads are not processed.
+        # Default is 1048576.
+        max_decompressed_size = 1048576
+
+        # Suppress the messages that are received again, like the messages redelivered with QoS 1 after a reconnect.
+        # Valid values: none, payload, or the name of a field that identifies a message, like dateTime or a sequence number.
+        # payload identifies a message by its topic and payload, before it is decompressed or decoded.
+        # A field identifies a message by its topic and the field's value, only used by the json, msgpack, cbor and xml types.
+        # The msg_id_field value is also part of it, so the devices sharing a topic are told apart.
+        # Default is none.
+        duplicate_key = none
+
+        # The seconds that a message is remembered, a message received again within this time is suppressed.
+        # With duplicate_key = payload, this should be less than the time between two messages that could have the same payload.
+        # Default is 60.
+        duplicate_window = 60
+
+        # The most messages that are remembered.
+        # Default is 1024.
+        max_duplicates = 1024
+
+        # The consecutive messages that fail before the messages of the topic are dropped without being processed.
+        # This protects the other topics from a publisher that changed its payload format.
+        # Default is 0, the messages are never dropped.
+        circuit_breaker_failures = 0
+
+        # The seconds that the messages are dropped, before one message is processed to test whether the topic is processed again.
+        # Default is 60.
+        circuit_breaker_interval = 60
+
+        # The library that decodes a json payload.
+        # Valid values: auto, orjson, ujson, json.
+        # auto uses orjson or ujson when installed, otherwise json.
+        # Default is auto.
+        json_decoder = auto
+
         # The delimiter between fieldname and value pairs. (field1=value1, field2=value2).
         # Default is is ",".
         keyword_delimiter = ","
@@ -282,6 +451,7 @@ CONFIG_SPEC_TEXT = """ \
 
         # Formatting string for converting a timestamp to an epoch datetime.
         # For additional information see, https://docs.python.org/3/library/datetime.html#strftime-and-strptime-format-codes
+        # Set to 'iso' for ISO 8601 timestamps, like 2025-06-01T12:30:00Z or 2025-06-01T08:30:00-04:00.
         # Default is None
         datetime_format = None
 
@@ -329,6 +499,11 @@ CONFIG_SPEC_TEXT = """ \
         # Default is True.
         subscribe = True
 
+        # The maximum number of topics to remember the matching subscription for.
+        # When it is reached, the least recently used topic is forgotten.
+        # Default is 1000.
+        topic_cache_size = 1000
+
         # When true, the last segment of the topic is used as the fieldname.
         # Only used for individual payloads.
         # Default is False.
@@ -348,14 +523,63 @@ CONFIG_SPEC_TEXT = """ \
         # Configuration information about the MQTT message format for this topic
         [[[message]]]
             # The format of the MQTT payload.
-            # Currently support: individual, json, keyword.
+            # Currently support: individual, json, keyword, msgpack, cbor, xml.
+            # msgpack needs the msgpack module and cbor the cbor2 or cbor module.
             # Must be specified.
             type = REPLACE_ME
 
-            # When the json is nested, the delimiter between the hierarchies.
+            # When the json, msgpack or cbor is nested, the delimiter between the hierarchies.
             # Default is _.
             flatten_delimiter = _
 
+            # When the payload is an array, whether each element is a record with its own dateTime.
+            # Only used by the json, msgpack and cbor types.
+            # Valid values: True, False.
+            # Default is False.
+            batch = False
+
+            # The compression of the payload, it is decompressed before it is decoded.
+            # Valid values: none, zlib, gzip, auto.
+            # auto decompresses payloads with a zlib or gzip header and leaves the others as is.
+            # Default is none.
+            compression = none
+
+            # The maximum size in bytes of a decompressed payload, larger payloads are not processed.
+            # Default is 1048576.
+            max_decompressed_size = 1048576
+
+            # Suppress the messages that are received again, like the messages redelivered with QoS 1 after a reconnect.
+            # Valid values: none, payload, or the name of a field that identifies a message, like dateTime or a sequence number.
+            # payload identifies a message by its topic and payload, before it is decompressed or decoded.
+            # A field identifies a message by its topic and the field's value, only used by the json, msgpack, cbor and xml types.
+            # The msg_id_field value is also part of it, so the devices sharing a topic are told apart.
+            # Default is none.
+            duplicate_key = none
+
+            # The seconds that a message is remembered, a message received again within this time is suppressed.
+            # With duplicate_key = payload, this should be less than the time between two messages that could have the same payload.
+            # Default is 60.
+            duplicate_window = 60
+
+            # The most messages that are remembered.
+            # Default is 1024.
+            max_duplicates = 1024
+
+            # The consecutive messages that fail before the messages of the topic are dropped without being processed.
+            # This protects the other topics from a publisher that changed its payload format.
+            # Default is 0, the messages are never dropped.
+            circuit_breaker_failures = 0
+
+            # The seconds that the messages are dropped, before one message is processed to test whether the topic is processed again.
+            # Default is 60.
+            circuit_breaker_interval = 60
+
+            # The library that decodes a json payload.
+            # Valid values: auto, orjson, ujson, json.
+            # auto uses orjson or ujson when installed, otherwise json.
+            # Default is auto.
+            json_decoder = auto
+
             # The delimiter between fieldname and value pairs. (field1=value1, field2=value2).
             # Default is is ",".
             keyword_delimiter = ","
@@ -409,14 +633,63 @@ CONFIG_SPEC_TEXT = """ \
             # Configuration information about the MQTT message format for this topic
             [[[[message]]]]
                 # The format of the MQTT payload.
-                # Currently support: individual, json, keyword.
+                # Currently support: individual, json, keyword, msgpack, cbor, xml.
+                # msgpack needs the msgpack module and cbor the cbor2 or cbor module.
                 # Must be specified.
                 type = REPLACE_ME
 
-                # When the json is nested, the delimiter between the hierarchies.
+                # When the json, msgpack or cbor is nested, the delimiter between the hierarchies.
                 # Default is _.
                 flatten_delimiter = _
 
+                # When the payload is an array, whether each element is a record with its own dateTime.
+                # Only used by the json, msgpack and cbor types.
+                # Valid values: True, False.
+                # Default is False.
+                batch = False
+
+                # The compression of the payload, it is decompressed before it is decoded.
+                # Valid values: none, zlib, gzip, auto.
+                # auto decompresses payloads with a zlib or gzip header and leaves the others as is.
+                # Default is none.
+                compression = none
+
+                # The maximum size in bytes of a decompressed payload, larger payloads are not processed.
+                # Default is 1048576.
+                max_decompressed_size = 1048576
+
+                # Suppress the messages that are received again, like the messages redelivered with QoS 1 after a reconnect.
+                # Valid values: none, payload, or the name of a field that identifies a message, like dateTime or a sequence number.
+                # payload identifies a message by its topic and payload, before it is decompressed or decoded.
+                # A field identifies a message by its topic and the field's value, only used by the json, msgpack, cbor and xml types.
+                # The msg_id_field value is also part of it, so the devices sharing a topic are told apart.
+                # Default is none.
+                duplicate_key = none
+
+                # The seconds that a message is remembered, a message received again within this time is suppressed.
+                # With duplicate_key = payload, this should be less than the time between two messages that could have the same payload.
+                # Default is 60.
+                duplicate_window = 60
+
+                # The most messages that are remembered.
+                # Default is 1024.
+                max_duplicates = 1024
+
+                # The consecutive messages that fail before the messages of the topic are dropped without being processed.
+                # This protects the other topics from a publisher that changed its payload format.
+                # Default is 0, the messages are never dropped.
+                circuit_breaker_failures = 0
+
+                # The seconds that the messages are dropped, before one message is processed to test whether the topic is processed again.
+                # Default is 60.
+                circuit_breaker_interval = 60
+
+                # The library that decodes a json payload.
+                # Valid values: auto, orjson, ujson, json.
+                # auto uses orjson or ujson when installed, otherwise json.
+                # Default is auto.
+                json_decoder = auto
+
                 # The delimiter between fieldname and value pairs. (field1=value1, field2=value2).
                 # Default is is ",".
                 keyword_delimiter = ","
@@ -537,27 +810,34 @@ ADDITIONAL_CONFIG_INFO = """ \
 
 # readability, I want the config spec at the top of the file pylint: disable=wrong-import-position
 import argparse
+import base64
 import copy
 import datetime
+import importlib
 import json
 import locale
 import logging
-import math
+import logging.handlers
 import os
 import platform
 import random
 import re
+import signal
 import ssl
 import sys
 import threading
 import time
 import traceback
-from collections import deque
+import xml.etree.ElementTree
+import zlib
+from collections import OrderedDict, deque
+from queue import Full as QueueFull, Queue
 
 import configobj
 import paho
 import paho.mqtt.client as mqtt
 from paho.mqtt.client import connack_string
+from paho.mqtt.matcher import MQTTMatcher
 
 # When running 'standalone' in a package install or git 'install', need to know where thw WeeWX modules are
 bin_root = os.getenv('BIN_ROOT')
@@ -592,6 +872,183 @@ DRIVER_VERSION = VERSION
 class ConversionError(ValueError):
     """ Error converting data types. """
 
+class ConversionFunctions():
+    """ The conversion functions by conversion type, and the conversion_func expressions compiled once by their source. """
+    sources = {
+        'bool': 'lambda x: to_bool(x)',
+        'float': 'lambda x: to_float(x)',
+        'int': 'lambda x: to_int(x)',
+    }
+    no_conversion_source = 'lambda x: x'
+
+    @staticmethod
+    def convert_float(value):
+        """ Try float first, to_float handles the rest, like 'None'. """
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return to_float(value)
+
+    @staticmethod
+    def convert_int(value):
+        """ Try int first, to_int handles the rest, like 'None' and '12.5'. """
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return to_int(value)
+
+    @staticmethod
+    def convert_bool(value):
+        """ Convert to a bool. """
+        return to_bool(value)
+
+    @staticmethod
+    def no_conversion(value):
+        """ Return the value unchanged. """
+        return value
+
+    # The compiled functions by source, the conversion types have specialized functions instead of an eval'd lambda.
+    compiled = {
+        'lambda x: to_bool(x)': convert_bool.__func__,
+        'lambda x: to_float(x)': convert_float.__func__,
+        'lambda x: to_int(x)': convert_int.__func__,
+        'lambda x: x': no_conversion.__func__,
+    }
+
+    @classmethod
+    def get(cls, conversion_type=None, source=None):
+        """ Get the conversion function of a conversion_func expression, or else of a conversion type. """
+        if not source:
+            source = cls.sources.get(conversion_type, cls.no_conversion_source)
+        try:
+            compiled = cls.compiled[source]
+        except KeyError:
+            compiled = cls.compiled[source] = eval(source)  # pylint: disable=eval-used
+        return {'source': source, 'compiled': compiled}
+
+class CountThrottle():
+    """ Log the first of every 'max' messages. Used when the duration is 0. """
+    __slots__ = ('max', 'count', 'suppressed')
+
+    def __init__(self, max_count):
+        self.max = max_count
+        self.count = 0
+        self.suppressed = 0
+
+    def is_throttled(self, _now):
+        """ Count the message and return True if it should not be logged. """
+        self.count += 1
+        if self.count > self.max:
+            self.count = 1
+        if self.count == 1:
+            return False
+        self.suppressed += 1
+        return True
+
+class FixedWindowThrottle():
+    """ Log at most 'max' messages in each 'duration' second window. """
+    __slots__ = ('max', 'duration', 'window_end', 'count', 'suppressed')
+
+    def __init__(self, max_count, duration):
+        self.max = max_count
+        self.duration = duration
+        self.window_end = 0
+        self.count = 0
+        self.suppressed = 0
+
+    def _next_window(self, now):
+        self.window_end = now - now % self.duration + self.duration
+        self.count = 0
+
+    def is_throttled(self, now):
+        """ Count the message and return True if it should not be logged. """
+        if now >= self.window_end:
+            self._next_window(now)
+        if self.count < self.max:
+            self.count += 1
+            return False
+        self.suppressed += 1
+        return True
+
+class SlidingWindowThrottle(FixedWindowThrottle):
+    """ Log at most 'max' messages in any 'duration' second window.
+        The count of the previous fixed window is weighted by how much of it is still in the sliding window. """
+    __slots__ = ('previous_count',)
+
+    def __init__(self, max_count, duration):
+        super().__init__(max_count, duration)
+        self.previous_count = 0
+
+    def is_throttled(self, now):
+        """ Count the message and return True if it should not be logged. """
+        if now >= self.window_end:
+            # If more than one window has passed, nothing was logged in the previous one.
+            self.previous_count = self.count if now < self.window_end + self.duration else 0
+            self._next_window(now)
+        if self.previous_count * (self.window_end - now) / self.duration + self.count < self.max:
+            self.count += 1
+            return False
+        self.suppressed += 1
+        return True
+
+class TokenBucketThrottle():
+    """ Log bursts of up to 'max' messages, with 'max' more allowed over each 'duration' seconds. """
+    __slots__ = ('max', 'rate', 'tokens', 'updated', 'suppressed')
+
+    def __init__(self, max_count, duration):
+        self.max = max_count
+        self.rate = max_count / duration
+        self.tokens = max_count
+        self.updated = None
+        self.suppressed = 0
+
+    def is_throttled(self, now):
+        """ Count the message and return True if it should not be logged. """
+        if self.updated is not None:
+            self.tokens = min(self.max, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return False
+        self.suppressed += 1
+        return True
+
+class Sampler():
+    """ Log at most one message per topic every 'interval' seconds, and of those, 1 of every 'every' messages. """
+    __slots__ = ('every', 'interval', 'count', 'next_times')
+
+    # Bound the memory used when a wildcard subscription matches many topics.
+    max_topics = 1000
+
+    def __init__(self, every, interval):
+        self.every = every or 1
+        self.interval = interval
+        self.count = 0
+        self.next_times = {}
+
+    def peek(self, topic):
+        """ Return True if the message would be logged, without counting it. """
+        if self.interval and time.time() < self.next_times.get(topic, 0):
+            return False
+        return self.count == 0
+
+    def sample(self, topic):
+        """ Count the message and return True if it should be logged. """
+        if self.interval:
+            now = time.time()
+            if now < self.next_times.get(topic, 0):
+                return False
+
+        sampled = self.count == 0
+        self.count = (self.count + 1) % self.every
+
+        if sampled and self.interval:
+            if len(self.next_times) >= Sampler.max_topics:
+                self.next_times.clear()
+            self.next_times[topic] = now + self.interval
+
+        return sampled
+
 class Logger():
     """ The logging class. """
     msgX = {
@@ -599,9 +1056,11 @@ class Logger():
         # debug messages
         # informational messages
         122001: "Throttling messages is an experimental option. It has limited support and may cause one to miss important messages.",
+        122002: "Queued logging is an experimental option. Messages are dropped when more than {max_size} are waiting to be logged.",
+        122003: "Sampling messages is an experimental option. It may cause one to miss important messages.",
         # error messages
-        124001: "{count} messages have been suppressed in window id: {window}.",
-        124002: "{count} messages have been suppressed of {max}.",
+        124001: "{count} messages have been suppressed by throttling, by message id: {messages}.",
+        124003: "{count} messages have been dropped because the logging queue was full.",
         # exception messages
         129001: "{message_id} has been configured multiple times",
         129002: "{message_id} has been configured multiple times",
@@ -610,64 +1069,44 @@ class Logger():
         129005: "{category} is missing 'duration' configuration option.",
         129006: "{message} is missing 'max' configuration option.",
         129007: "{message} is missing 'duration' configuration option.",
+        129008: "{algorithm} is not a valid throttle algorithm. Valid algorithms are {valid_algorithms}",
+        129009: "{category} is not valid for sampling. Valid categories are {valid_categories}",
+        129010: "{message_id} has been configured multiple times",
     }
 
     MSG_FORMAT = "(%s-%s) %s %s"
 
     valid_categories = ['ALL', 'ERROR', 'INFO', 'DEBUG', 'TRACE']
 
+    valid_sample_categories = ['DEBUG', 'TRACE']
+
+    throttle_algorithms = {
+        'fixed': FixedWindowThrottle,
+        'sliding': SlidingWindowThrottle,
+        'token_bucket': TokenBucketThrottle,
+    }
+
     def __init__(self, config, level='NOTSET', filename=None, console=None):
         self.console = console
         self.mode = config['mode']
         self.filename = filename
         self.weewx_debug = weewx.debug
 
-        self.logged_ids = {}
-        self.throttle_config = {}
-        if 'throttle' in config:
-            self.throttle_config['category'] = {}
-            if 'category' in config['throttle']:
-                for category in config['throttle']['category'].sections:
-                    if category not in Logger.valid_categories:
-                        raise ValueError(Logger.msgX[129003].format(category=category, valid_categories=Logger.valid_categories))
-                    self.throttle_config['category'][category] = config['throttle']['category'][category]
-                    if 'max' not in config['throttle']['category'][category]:
-                        raise ValueError(Logger.msgX[129004].format(category=category))
-                    if 'duration' not in config['throttle']['category'][category]:
-                        raise ValueError(Logger.msgX[129005].format(category=category))
-                    config['throttle']['category'][category]['max'] = to_int(config['throttle']['category'][category]['max'])
-                    config['throttle']['category'][category]['duration'] = to_int(config['throttle']['category'][category]['duration'])
-
-            self.throttle_config['message'] = {}
-            for message in config['throttle'].get('messages', configobj.ConfigObj({})).sections:
-                if 'max' not in config['throttle']['messages'][message]:
-                    raise ValueError(Logger.msgX[129006].format(message=message))
-                if 'duration' not in config['throttle']['messages'][message]:
-                    raise ValueError(Logger.msgX[129007].format(message=message))
-                if 'messages' in config['throttle']['messages'][message]:
-                    for message_id in weeutil.weeutil.option_as_list(config['throttle']['messages'][message]['messages']):
-                        message_id_int = to_int(message_id)
-                        if message_id_int in self.throttle_config['message']:
-                            raise ValueError(Logger.msgX[129001].format(message_id=message_id))
-                        self.throttle_config['message'][message_id_int] = {}
-                        self.throttle_config['message'][message_id_int]['duration'] = to_int(config['throttle']['messages'][message]['duration'])
-                        self.throttle_config['message'][message_id_int]['max'] = to_int(config['throttle']['messages'][message]['max'])
-                else:
-                    message_id_int = to_int(message)
-                    if message_id_int in self.throttle_config['message']:
-                        raise ValueError(Logger.msgX[129002].format(message_id=message))
-                    self.throttle_config['message'][message_id_int] = {}
-                    self.throttle_config['message'][message_id_int]['duration'] = to_int(config['throttle']['messages'][message]['duration'])
-                    self.throttle_config['message'][message_id_int]['max'] = to_int(config['throttle']['messages'][message]['max'])
-        else:
-            self.throttle_config['category'] = {}
-            self.throttle_config['message'] = {}
+        self._build_throttles(config)
+        self._build_samplers(config)
 
         # Setup custom TRACE level
         self.trace_level = 5
         if logging.getLevelName(self.trace_level) == 'Level 5':
             logging.addLevelName(self.trace_level, "TRACE")
 
+        self.levels = {
+            'TRACE': self.trace_level,
+            'DEBUG': logging.DEBUG,
+            'INFO': logging.INFO,
+            'ERROR': logging.ERROR,
+        }
+
         # check that the level configured is valid
         self.level = logging._checkLevel(level)
 
@@ -694,106 +1133,227 @@ class Logger():
             file_handler.setFormatter(formatter)
             self._logmsg.addHandler(file_handler)
 
+        self.queue_handler = None
+        self.queue_listener = None
+        self._setup_queue(config.get('queue', {}))
+
         # Logging is setup, now safe to log a mwssage about using throttling option
         if 'throttle' in config:
             self.info(122001, Logger.msgX[122001])
+        if self.queue_handler:
+            self.info(122002, Logger.msgX[122002], max_size=self.queue_handler.queue.maxsize)
+        if self.samplers:
+            self.info(122003, Logger.msgX[122003])
+
+    def _build_throttles(self, config):
+        self.throttle_config = {'category': {}, 'message': {}}
+        self.throttle_algorithm = 'fixed'
+        self.throttle_report_interval = 300
+        if 'throttle' in config:
+            self.throttle_algorithm = self._check_algorithm(config['throttle'].get('algorithm', self.throttle_algorithm))
+            self.throttle_report_interval = to_int(config['throttle'].get('report_interval', self.throttle_report_interval))
+            if 'category' in config['throttle']:
+                self._configure_throttle_categories(config['throttle']['category'])
+            self._configure_throttle_messages(config['throttle'].get('messages', configobj.ConfigObj({})))
+
+        # The throttle of each message id, by logging level.
+        # Empty when nothing is throttled, so that the check is skipped.
+        self.throttles = {}
+        if self.throttle_config['category'] or self.throttle_config['message']:
+            self.throttles = {category: {} for category in Logger.valid_categories}
+        self.suppressed_throttles = []
+        self.throttle_next_report = time.time() + self.throttle_report_interval
+
+    def _configure_throttle_categories(self, config):
+        for category in config.sections:
+            if category not in Logger.valid_categories:
+                raise ValueError(Logger.msgX[129003].format(category=category, valid_categories=Logger.valid_categories))
+            self.throttle_config['category'][category] = config[category]
+            if 'max' not in config[category]:
+                raise ValueError(Logger.msgX[129004].format(category=category))
+            if 'duration' not in config[category]:
+                raise ValueError(Logger.msgX[129005].format(category=category))
+            config[category]['max'] = to_int(config[category]['max'])
+            config[category]['duration'] = to_int(config[category]['duration'])
+            if 'algorithm' in config[category]:
+                self._check_algorithm(config[category]['algorithm'])
+
+    def _configure_throttle_messages(self, config):
+        for message in config.sections:
+            if 'max' not in config[message]:
+                raise ValueError(Logger.msgX[129006].format(message=message))
+            if 'duration' not in config[message]:
+                raise ValueError(Logger.msgX[129007].format(message=message))
+            if 'messages' in config[message]:
+                message_ids = weeutil.weeutil.option_as_list(config[message]['messages'])
+                msg_id = 129001
+            else:
+                message_ids = [message]
+                msg_id = 129002
+            for message_id in message_ids:
+                message_id_int = to_int(message_id)
+                if message_id_int in self.throttle_config['message']:
+                    raise ValueError(Logger.msgX[msg_id].format(message_id=message_id))
+                self.throttle_config['message'][message_id_int] = {}
+                self.throttle_config['message'][message_id_int]['duration'] = to_int(config[message]['duration'])
+                self.throttle_config['message'][message_id_int]['max'] = to_int(config[message]['max'])
+                if 'algorithm' in config[message]:
+                    self.throttle_config['message'][message_id_int]['algorithm'] = self._check_algorithm(config[message]['algorithm'])
+
+    def _build_samplers(self, config):
+        self.sample_config = {'category': {}, 'message': {}}
+        if config.get('sample'):
+            self._configure_sample(config['sample'])
+        # The sampler of each message id, by logging level.
+        # Empty when nothing is sampled, so that the check is skipped.
+        self.samplers = {}
+        if self.sample_config['category'] or self.sample_config['message']:
+            self.samplers = {category: {} for category in Logger.valid_sample_categories}
+
+    def _configure_sample(self, config):
+        for category in config.get('category', {}):
+            if category not in Logger.valid_sample_categories:
+                raise ValueError(Logger.msgX[129009].format(category=category, valid_categories=Logger.valid_sample_categories))
+            self.sample_config['category'][category] = {
+                'every': to_int(config['category'][category].get('every')),
+                'interval': to_float(config['category'][category].get('interval')),
+            }
 
-    def _is_throttled(self, logging_level, msg_id):
-        if msg_id is None:
-            return False
-        elif msg_id in self.throttle_config['message']:
-            return self._check_message(msg_id, self.throttle_config['message'][msg_id])
-        elif logging_level in self.throttle_config['category']:
-            return self._check_message(msg_id, self.throttle_config['category'][logging_level])
-        elif 'ALL' in self.throttle_config['category']:
-            return self._check_message(msg_id, self.throttle_config['category']['ALL'])
-
-        return False
-
-    def _check_message(self, msg_id, throttle_config):
-        if throttle_config['max'] is None:
-            return False
+        for message in config.get('messages', {}):
+            message_config = {
+                'every': to_int(config['messages'][message].get('every')),
+                'interval': to_float(config['messages'][message].get('interval')),
+            }
+            # If omitted, the section name is the message id
+            for message_id in weeutil.weeutil.option_as_list(config['messages'][message].get('messages', message)):
+                message_id_int = to_int(message_id)
+                if message_id_int in self.sample_config['message']:
+                    raise ValueError(Logger.msgX[129010].format(message_id=message_id))
+                self.sample_config['message'][message_id_int] = message_config
+
+    def _setup_queue(self, config):
+        if not to_bool(config.get('enable', False)):
+            return
 
-        if throttle_config['duration'] == 0:
-            if msg_id not in self.logged_ids:
-                self.logged_ids[msg_id] = {}
-                self.logged_ids[msg_id]['count'] = 0
+        # The handlers that would have handled the messages are now run by the listener's thread.
+        handlers = self.get_handlers(self._logmsg)
+        for handler in list(self._logmsg.handlers):
+            self._logmsg.removeHandler(handler)
+        self._logmsg.propagate = 0
 
-            if self.logged_ids[msg_id]['count'] > throttle_config['max']:
-                if self.logged_ids[msg_id]['count'] % throttle_config['max'] == 0:
-                    self.logged_ids[msg_id]['count'] += 1
-                    self.error(None, Logger.msgX[124002].format(count=self.logged_ids[msg_id]['count'], max=throttle_config['max']))
-                    return False
+        self.queue_handler = LogQueueHandler(Queue(to_int(config.get('max_size', 1000))), to_int(config.get('report_interval', 300)), self.mode)
+        self._logmsg.addHandler(self.queue_handler)
+        self.queue_listener = LogQueueListener(self.queue_handler.queue, *handlers, respect_handler_level=True)
+        self.queue_listener.start()
 
-            self.logged_ids[msg_id]['count'] += 1
-            return True
+    @staticmethod
+    def _check_algorithm(algorithm):
+        if algorithm not in Logger.throttle_algorithms:
+            raise ValueError(Logger.msgX[129008].format(algorithm=algorithm, valid_algorithms=list(Logger.throttle_algorithms)))
+        return algorithm
+
+    def close(self):
+        """ Log the suppressed message counts and stop the queued logging, after the messages waiting in the queue have been logged. """
+        self._report_suppressed()
+        if self.queue_listener:
+            self.queue_handler.report_dropped(self._logmsg.name, block=True)
+            self.queue_listener.stop()
+            self.queue_listener = None
+
+    def report_due(self):
+        """ Log the summaries whose report interval has passed.
+            Called periodically, so that they are logged even when no other message is logged. """
+        now = time.time()
+        if self.suppressed_throttles and now >= self.throttle_next_report:
+            self.throttle_next_report = now + self.throttle_report_interval
+            self._report_suppressed()
+        if self.queue_listener and self.queue_handler.dropped and now >= self.queue_handler.next_report:
+            self.queue_handler.report_dropped(self._logmsg.name)
+
+    def _get_sampler(self, logging_level, msg_id):
+        # The configuration is resolved once per message id, the first time the message is logged.
+        samplers = self.samplers[logging_level]
+        try:
+            return samplers[msg_id]
+        except KeyError:
+            pass
 
-        now = int(time.time())
-        window = int(now // throttle_config['duration'])
+        sample_config = self.sample_config['message'].get(msg_id, self.sample_config['category'].get(logging_level))
+        sampler = None
+        if sample_config and (sample_config['every'] or sample_config['interval']):
+            sampler = Sampler(sample_config['every'], sample_config['interval'])
+        samplers[msg_id] = sampler
+        return sampler
 
-        if msg_id not in self.logged_ids:
-            self.logged_ids[msg_id] = {}
-            self.logged_ids[msg_id]['window'] = window
-            self.logged_ids[msg_id]['count'] = 1
+    def _is_sampled_out(self, logging_level, msg_id, kwargs):
+        if msg_id is None or not self.samplers:
             return False
 
-        if window != self.logged_ids[msg_id]['window']:
-            self.logged_ids[msg_id]['count'] = 0
-            self.logged_ids[msg_id]['window'] = window
+        sampler = self._get_sampler(logging_level, msg_id)
+        if sampler is None:
+            return False
 
-        self.logged_ids[msg_id]['count'] += 1
+        return not sampler.sample(kwargs.get('topic'))
 
-        if self.logged_ids[msg_id]['count'] > throttle_config['max']:
-            if self.logged_ids[msg_id]['count'] % throttle_config['max'] == 0:
-                self.error(None, Logger.msgX[124001].format(count=self.logged_ids[msg_id]['count'] - throttle_config['max'], window=window))
-                return False
-            return True
+    def _is_throttled(self, logging_level, msg_id):
+        if msg_id is None or not self.throttles:
+            return False
 
-        return False
+        throttles = self.throttles[logging_level]
+        try:
+            throttle = throttles[msg_id]
+        except KeyError:
+            throttle = throttles[msg_id] = self._get_throttle(logging_level, msg_id)
 
-    def _check_message_sliding(self, msg_id, throttle_config):  # Currently not being used - pragma: no cover
-        if throttle_config['max'] is None:
+        if throttle is None:
             return False
 
-        if throttle_config['duration'] == 0:
-            if msg_id not in self.logged_ids:
-                self.logged_ids[msg_id] = {}
-                self.logged_ids[msg_id]['count'] = 0
+        now = time.time()
+        throttled = throttle.is_throttled(now)
+        if throttled and throttle.suppressed == 1:
+            self.suppressed_throttles.append((msg_id, throttle))
+        if now >= self.throttle_next_report:
+            self.throttle_next_report = now + self.throttle_report_interval
+            self._report_suppressed()
 
-            if self.logged_ids[msg_id]['count'] % throttle_config['max'] == 0:
-                self.logged_ids[msg_id]['count'] += 1
-                self.error(None, Logger.msgX[124002].format(count=self.logged_ids[msg_id]['count'], max=throttle_config['max']))
-                return False
+        return throttled
 
-            self.logged_ids[msg_id]['count'] += 1
-            return True
+    def _get_throttle_config(self, logging_level, msg_id):
+        if msg_id in self.throttle_config['message']:
+            return self.throttle_config['message'][msg_id]
+        if logging_level in self.throttle_config['category']:
+            return self.throttle_config['category'][logging_level]
+        if 'ALL' in self.throttle_config['category']:
+            return self.throttle_config['category']['ALL']
 
-        now = int(time.time())
-        window = int(now // throttle_config['duration'])
+        return None
 
-        if msg_id not in self.logged_ids:
-            self.logged_ids[msg_id] = {}
-            self.logged_ids[msg_id]['window'] = window
-            self.logged_ids[msg_id]['count'] = 1
-            self.logged_ids[msg_id]['previous_count'] = 0
-            return False
+    def _get_throttle(self, logging_level, msg_id):
+        # The configuration is resolved once per message id, the first time the message is logged.
+        throttle_config = self._get_throttle_config(logging_level, msg_id)
+        if throttle_config is None or throttle_config['max'] is None:
+            return None
 
-        if window != self.logged_ids[msg_id]['window']:
-            self.logged_ids[msg_id]['previous_count'] = self.logged_ids[msg_id]['count']
-            self.logged_ids[msg_id]['count'] = 0
-            self.logged_ids[msg_id]['window'] = window
+        if throttle_config['duration'] == 0:
+            return CountThrottle(throttle_config['max'])
 
-        self.logged_ids[msg_id]['count'] += 1
-        window_elapsed = (now % throttle_config['duration']) / throttle_config['duration']
-        threshold = math.floor(self.logged_ids[msg_id]['previous_count'] * (1 - window_elapsed) + self.logged_ids[msg_id]['count'])
+        algorithm = throttle_config.get('algorithm', self.throttle_algorithm)
+        return Logger.throttle_algorithms[algorithm](throttle_config['max'], throttle_config['duration'])
 
-        if threshold > throttle_config['max']:
-            if threshold % throttle_config['max'] == 0:
-                self.error(None, Logger.msgX[124001].format(count=threshold))
-                return False
-            return True
+    def _report_suppressed(self):
+        if not self.suppressed_throttles:
+            return
 
-        return False
+        # Swapped out before it is walked, report_due runs on a different thread than the one logging the messages.
+        suppressed_throttles, self.suppressed_throttles = self.suppressed_throttles, []
+        count = 0
+        messages = []
+        for msg_id, throttle in suppressed_throttles:
+            count += throttle.suppressed
+            messages.append(f"{msg_id}: {throttle.suppressed}")
+            throttle.suppressed = 0
+
+        self.error(None, Logger.msgX[124001], count=count, messages=', '.join(messages))
 
     def get_handlers(self, logger):
         """ recursively get parent handlers """
@@ -830,28 +1390,94 @@ class Logger():
         self.info(0, f"Log console: {self.console}")
         self.info(0, f"Log file: {self.filename}")
 
-    def trace(self, msg_id, msg_text):
+    def is_enabled(self, level, msg_id=None, topic=None):
+        """ Check if messages of the 'TRACE', 'DEBUG', 'INFO', or 'ERROR' level will be logged.
+            Used to skip building expensive message arguments when they would be thrown away.
+            When 'msg_id' is passed, also check if the message would be sampled, without counting it.
+        """
+        if level == 'TRACE' and self.weewx_debug > 1:
+            enabled = self._logmsg.isEnabledFor(logging.DEBUG)
+        else:
+            enabled = self._logmsg.isEnabledFor(self.levels[level])
+
+        if enabled and msg_id is not None and level in self.samplers:
+            sampler = self._get_sampler(level, msg_id)
+            if sampler is not None:
+                return sampler.peek(topic)
+
+        return enabled
+
+    @staticmethod
+    def _format(msg_text, kwargs):
+        # When keyword arguments are passed, msg_text is a template that is only formatted if it is going to be logged.
+        if kwargs:
+            return msg_text.format(**kwargs)
+        return msg_text
+
+    def trace(self, msg_id, msg_text, **kwargs):
         """ Log trace messages. """
-        if not self._is_throttled('TRACE', msg_id):
+        if self.is_enabled('TRACE') and not self._is_sampled_out('TRACE', msg_id, kwargs) and not self._is_throttled('TRACE', msg_id):
+            msg_text = self._format(msg_text, kwargs)
             if self.weewx_debug > 1:
                 self._logmsg.debug(self.MSG_FORMAT, self.mode, threading.get_native_id(), global_archive_timestamp, msg_text)
             else:
                 self._logmsg.log(self.trace_level, self.MSG_FORMAT, self.mode, threading.get_native_id(), global_archive_timestamp, msg_text)
 
-    def debug(self, msg_id, msg_text):
+    def debug(self, msg_id, msg_text, **kwargs):
         """ Log debug messages. """
-        if not self._is_throttled('DEBUG', msg_id):
-            self._logmsg.debug(self.MSG_FORMAT, self.mode, threading.get_native_id(), global_archive_timestamp, msg_text)
+        if self.is_enabled('DEBUG') and not self._is_sampled_out('DEBUG', msg_id, kwargs) and not self._is_throttled('DEBUG', msg_id):
+            self._logmsg.debug(self.MSG_FORMAT, self.mode, threading.get_native_id(), global_archive_timestamp, self._format(msg_text, kwargs))
 
-    def info(self, msg_id, msg_text):
+    def info(self, msg_id, msg_text, **kwargs):
         """ Log informational messages. """
-        if not self._is_throttled('INFO', msg_id):
-            self._logmsg.info(self.MSG_FORMAT, self.mode, threading.get_native_id(), global_archive_timestamp, msg_text)
+        if self.is_enabled('INFO') and not self._is_throttled('INFO', msg_id):
+            self._logmsg.info(self.MSG_FORMAT, self.mode, threading.get_native_id(), global_archive_timestamp, self._format(msg_text, kwargs))
 
-    def error(self, msg_id, msg_text):
+    def error(self, msg_id, msg_text, **kwargs):
         """ Log error messages. """
-        if not self._is_throttled('ERROR', msg_id):
-            self._logmsg.error(self.MSG_FORMAT, self.mode, threading.get_native_id(), global_archive_timestamp, msg_text)
+        if self.is_enabled('ERROR') and not self._is_throttled('ERROR', msg_id):
+            self._logmsg.error(self.MSG_FORMAT, self.mode, threading.get_native_id(), global_archive_timestamp, self._format(msg_text, kwargs))
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """ Put log records on a bounded queue, dropping and counting them when the queue is full. """
+    def __init__(self, log_queue, report_interval, mode):
+        super().__init__(log_queue)
+        self.report_interval = report_interval
+        self.mode = mode
+        self.dropped = 0
+        self.next_report = time.time() + report_interval
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except QueueFull:
+            self.dropped += 1
+
+    def emit(self, record):
+        if self.dropped and time.time() >= self.next_report:
+            self.report_dropped(record.name)
+        super().emit(record)
+
+    def report_dropped(self, name, block=False):
+        """ Queue a message with the number of messages that have been dropped. """
+        self.next_report = time.time() + self.report_interval
+        if not self.dropped:
+            return
+
+        msg_text = Logger.msgX[124003].format(count=self.dropped)
+        record = logging.LogRecord(name, logging.ERROR, __file__, 0, Logger.MSG_FORMAT,
+                                   (self.mode, threading.get_native_id(), global_archive_timestamp, msg_text), None)
+        try:
+            self.queue.put(self.prepare(record), block=block)
+            self.dropped = 0
+        except QueueFull:
+            pass
+
+class LogQueueListener(logging.handlers.QueueListener):
+    """ Log the records from a bounded queue. """
+    def enqueue_sentinel(self):
+        # The queue might be full, so wait for room instead of failing.
+        self.queue.put(self._sentinel)
 
 class RecordCache():
     """ Manage the cache. """
@@ -887,19 +1513,14 @@ class RecordCache():
             valid = (expires_after is None or timestamp - self.cached_values[key]['timestamp'] < expires_after) and \
                 self.cached_values[key]['invalidated'] > timestamp
 
-        self.logger.trace(100001, RecordCache.msgX[100001].format(key=key,
-                                                                  timestamp=timestamp,
-                                                                  expires_after=expires_after,
-                                                                  cache_value=self.dump_key(key),
-                                                                  is_valid=valid))
+        self.logger.trace(100001, RecordCache.msgX[100001],
+                          key=key, timestamp=timestamp, expires_after=expires_after, cache_value=self.dump_key(key), is_valid=valid)
         return valid
 
     def get_value(self, key, timestamp, expires_after):
         """ Get the cached value. """
-        self.logger.trace(100002, RecordCache.msgX[100002].format(key=key,
-                                                                  timestamp=timestamp,
-                                                                  expires_after=expires_after,
-                                                                  cache_value=self.dump_key(key)))
+        self.logger.trace(100002, RecordCache.msgX[100002],
+                          key=key, timestamp=timestamp, expires_after=expires_after, cache_value=self.dump_key(key))
         if self.is_valid(key, timestamp, expires_after):
             return self.cached_values[key]['value']
 
@@ -907,11 +1528,8 @@ class RecordCache():
 
     def update_value(self, key, value, unit_system, timestamp):
         """ Update the cached value. """
-        self.logger.trace(100003, RecordCache.msgX[100003].format(key=key,
-                                                                  value=value,
-                                                                  unit_system=unit_system,
-                                                                  timestamp=timestamp,
-                                                                  cache_value=self.dump_key(key)))
+        self.logger.trace(100003, RecordCache.msgX[100003],
+                          key=key, value=value, unit_system=unit_system, timestamp=timestamp, cache_value=self.dump_key(key))
         if self.unit_system is None:
             self.unit_system = unit_system
         if unit_system != self.unit_system:
@@ -927,7 +1545,7 @@ class RecordCache():
                   For additional inforamtion see, https://groups.google.com/g/weewx-development/c/1cJBMAX3Wsg
                   Add also, https://github.com/bellrichm/WeeWX-MQTTSubscribe/issues/178
         """
-        self.logger.trace(100004, RecordCache.msgX[100004].format(key=key, timestamp=timestamp, cache_value=self.dump_key(key)))
+        self.logger.trace(100004, RecordCache.msgX[100004], key=key, timestamp=timestamp, cache_value=self.dump_key(key))
         if key in self.cached_values and timestamp < self.cached_values[key]['invalidated']:
             self.cached_values[key]['invalidated'] = timestamp
 
@@ -941,7 +1559,7 @@ class RecordCache():
             If a key/value is no longer valid, use invalidate_value with current timestamp.
             Do not use this method to remove invalidated cached key/values.
         """
-        self.logger.trace(100005, RecordCache.msgX[100005].format(key=key, cache_value=self.dump_key(key)))
+        self.logger.trace(100005, RecordCache.msgX[100005], key=key, cache_value=self.dump_key(key))
         if key in self.cached_values:
             del self.cached_values[key]
 
@@ -1006,6 +1624,711 @@ class CollectData():
             self.data['dateTime'] = self.date_time
         return self.data
 
+class TopicCache():
+    """ A bounded map of a topic to its subscribed topic. The least recently used topic is evicted. """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, topic):
+        """ Get the subscribed topic of a topic, None if it is not cached. """
+        try:
+            subscribed_topic = self.cache[topic]
+            self.cache.move_to_end(topic)
+        except KeyError:
+            # Also, evicted by another thread between the two calls
+            self.misses += 1
+            return None
+        self.hits += 1
+        return subscribed_topic
+
+    def put(self, topic, subscribed_topic):
+        """ Cache the subscribed topic of a topic. Return True if a topic was evicted. """
+        self.cache[topic] = subscribed_topic
+        if len(self.cache) <= self.max_size:
+            return False
+        try:
+            self.cache.popitem(last=False)
+        except KeyError:
+            return False
+        self.evictions += 1
+        return True
+
+    def clear(self):
+        """ Remove all the cached topics. """
+        self.cache.clear()
+
+    def __len__(self):
+        return len(self.cache)
+
+class JSONDecoder():
+    """ Decode a JSON payload with orjson or ujson when installed, otherwise with json. """
+    msgX = {
+        # exception messages
+        149001: "Invalid json_decoder configured: {json_decoder}",
+        149002: "json_decoder {json_decoder} is not installed.",
+    }
+
+    # In order of preference for 'auto'
+    decoders = ('orjson', 'ujson', 'json')
+
+    def __init__(self, json_decoder='auto'):
+        if json_decoder == 'auto':
+            for decoder in JSONDecoder.decoders:
+                loads = self._get_loads(decoder)
+                if loads:
+                    json_decoder = decoder
+                    break
+        elif json_decoder in JSONDecoder.decoders:
+            loads = self._get_loads(json_decoder)
+            if loads is None:
+                raise ValueError(JSONDecoder.msgX[149002].format(json_decoder=json_decoder))
+        else:
+            raise ValueError(JSONDecoder.msgX[149001].format(json_decoder=json_decoder))
+
+        self.name = json_decoder
+        self._loads = loads
+
+    @staticmethod
+    def _json_loads(payload):
+        return json.loads(payload)
+
+    @staticmethod
+    def _get_loads(decoder):
+        if decoder == 'json':
+            return JSONDecoder._json_loads
+        try:
+            return importlib.import_module(decoder).loads
+        except ImportError:
+            return None
+
+    def decode(self, payload):
+        """ Decode the bytes of a JSON payload. """
+        try:
+            return self._loads(payload)
+        except ValueError:
+            # orjson and ujson reject some payloads that json accepts, like NaN, so json has the final say.
+            if self._loads is JSONDecoder._json_loads:
+                raise
+            return JSONDecoder._json_loads(payload)
+
+class BinaryDecoder():
+    """ Decode a MessagePack or CBOR payload, the codec is only imported when a topic uses the message type. """
+    msgX = {
+        # exception messages
+        159001: "{message_type} messages need one of the {modules} modules, none is installed.",
+    }
+
+    # The modules and functions that decode each message type, in order of preference.
+    codecs = {
+        'msgpack': (('msgpack', 'unpackb', {'raw': False, 'strict_map_key': False}),),
+        'cbor': (('cbor2', 'loads', {}), ('cbor', 'loads', {})),
+    }
+
+    def __init__(self, message_type):
+        self.message_type = message_type
+        for module_name, function_name, kwargs in BinaryDecoder.codecs[message_type]:
+            try:
+                module = importlib.import_module(module_name)
+            except ImportError:
+                continue
+            self.name = module_name
+            self._loads = getattr(module, function_name)
+            self._kwargs = kwargs
+            break
+        else:
+            modules = ', '.join(codec[0] for codec in BinaryDecoder.codecs[message_type])
+            raise ValueError(BinaryDecoder.msgX[159001].format(message_type=message_type, modules=modules))
+
+    def decode(self, payload):
+        """ Decode the bytes of a payload. """
+        return BinaryDecoder._string_keys(self._loads(payload, **self._kwargs))
+
+    @staticmethod
+    def _string_keys(data):
+        """ Convert the keys of the maps that are not strings, like integers, to strings, the keys of json objects. """
+        if data.__class__ is dict:
+            for key, value in data.items():
+                if key.__class__ is not str:
+                    return {str(key): BinaryDecoder._string_keys(value) for key, value in data.items()}
+                if value.__class__ is dict or value.__class__ is list:
+                    data[key] = BinaryDecoder._string_keys(value)
+        elif data.__class__ is list:
+            for i, value in enumerate(data):
+                if value.__class__ is dict or value.__class__ is list:
+                    data[i] = BinaryDecoder._string_keys(value)
+        return data
+
+class XMLDecoder():
+    """ Decode an xml payload into the values of its elements, named by their path below the root element, like a flattened json object.
+        An element's attributes are named by the element's path and the attribute's name.
+        When keys are given, only the elements with a key, or with a prefix of a key, are visited. """
+    __slots__ = ('keys', 'prefixes')
+
+    def __init__(self, keys=None, prefixes=None):
+        self.keys = keys
+        self.prefixes = prefixes
+
+    def decode(self, payload):
+        """ Decode the bytes of a payload. """
+        data = {}
+        self._decode_element(xml.etree.ElementTree.fromstring(payload), '', data)
+        return data
+
+    def _decode_element(self, element, prefix, data):
+        keys = self.keys
+        for name, value in element.items():
+            if keys is None or prefix + name in keys:
+                data[prefix + name] = value
+
+        for child in element:
+            tag = child.tag
+            if tag[0] == '{':
+                tag = tag.rpartition('}')[2]
+            path = prefix + tag
+            # An explicit length check, the truth value of an Element is deprecated (it is False when it has no children)
+            if len(child) == 0:
+                if keys is None or path in keys:
+                    text = child.text
+                    if text is not None:
+                        text = text.strip()
+                        if text:
+                            data[path] = text
+                if not child.attrib:
+                    continue
+            if keys is None or path + '_' in self.prefixes:
+                self._decode_element(child, path + '_', data)
+
+class Decompressor():
+    """ Decompress the zlib or gzip payloads of a topic, up to a maximum size, and count the compression. """
+    msgX = {
+        # exception messages
+        169001: "Invalid compression configured: {compression}",
+        169002: "Decompressed payload is larger than {max_size} bytes.",
+        169003: "Payload is not {compression} compressed, '{exception}'.",
+    }
+
+    # The zlib wbits of each compression, 'auto' detects a zlib or gzip header.
+    wbits = {
+        'zlib': 15,
+        'gzip': 31,
+        'auto': 47,
+    }
+
+    def __init__(self, compression, max_size=1048576):
+        if compression not in Decompressor.wbits:
+            raise ValueError(Decompressor.msgX[169001].format(compression=compression))
+        self.compression = compression
+        self.max_size = max_size
+
+        self.count = 0
+        self.errors = 0
+        self.compressed_bytes = 0
+        self.decompressed_bytes = 0
+        self.seconds = 0.0
+
+    @staticmethod
+    def is_compressed(payload):
+        """ Whether the payload starts with a gzip or zlib header. """
+        if payload[:2] == b'\x1f\x8b':
+            return True
+        # deflate with a window of at most 32K and a valid header check
+        return len(payload) >= 2 and payload[0] & 0x0f == 8 and payload[0] >> 4 <= 7 and (payload[0] << 8 | payload[1]) % 31 == 0
+
+    def decompress(self, payload):
+        """ Decompress the payload, with 'auto' payloads that are not compressed are returned as is. """
+        if self.compression == 'auto' and not self.is_compressed(payload):
+            return payload
+
+        start = time.perf_counter()
+        decompressor = zlib.decompressobj(Decompressor.wbits[self.compression])
+        try:
+            # At most one byte more than the maximum, so that a large payload is never completely decompressed
+            data = decompressor.decompress(payload, self.max_size + 1)
+        except zlib.error as exception:
+            # Some uncompressed payloads, like 80.5, look like they have a zlib header
+            if self.compression == 'auto':
+                return payload
+            self.errors += 1
+            raise ValueError(Decompressor.msgX[169003].format(compression=self.compression, exception=exception)) from exception
+
+        if len(data) > self.max_size:
+            self.errors += 1
+            raise ValueError(Decompressor.msgX[169002].format(max_size=self.max_size))
+        if not decompressor.eof:
+            if self.compression == 'auto':
+                return payload
+            self.errors += 1
+            raise ValueError(Decompressor.msgX[169003].format(compression=self.compression, exception='incomplete or truncated stream'))
+
+        self.seconds += time.perf_counter() - start
+        self.count += 1
+        self.compressed_bytes += len(payload)
+        self.decompressed_bytes += len(data)
+        return data
+
+class DuplicateFilter():
+    """ Remember the messages of a topic for a window of seconds, so that the messages received again are suppressed. """
+    def __init__(self, key, window=60, size=1024):
+        # 'payload' or the name of the field that identifies a message
+        self.key = key
+        self.window = window
+        self.size = size
+        # The keys of the remembered messages and when they were received, oldest first
+        self.received = OrderedDict()
+
+        self.count = 0
+        self.suppressed = 0
+
+    def is_duplicate(self, key):
+        """ Whether a message with the key was received within the window, otherwise the key is remembered. """
+        now = time.monotonic()
+        received = self.received
+        self.count += 1
+
+        while received:
+            oldest = next(iter(received.values()))
+            if now - oldest < self.window:
+                break
+            received.popitem(last=False)
+
+        try:
+            if key in received:
+                self.suppressed += 1
+                return True
+        except TypeError:
+            # An unhashable field value never matches
+            return False
+
+        received[key] = now
+        if len(received) > self.size:
+            received.popitem(last=False)
+        return False
+
+class CircuitBreaker():
+    """ Drop the messages of a topic, after a number of consecutive messages failed.
+        One message is processed every interval seconds, the messages are processed again when it does not fail. """
+    msgX = {
+        # trace message
+        # debug messages
+        # informational messages
+        172001: "{topic} is processed again, {dropped} messages were dropped.",
+        172002: "{topic} processing a message to test it, after dropping messages for {interval} seconds.",
+        # error messages
+        174001: "{topic} failed {failures} consecutive times, its messages are dropped for {interval} seconds.",
+        174002: "{topic} failed again, its messages are dropped for another {interval} seconds.",
+        # exception messages
+    }
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    PROBING = 'probing'
+
+    def __init__(self, topic, failures, interval, logger):
+        self.topic = topic
+        # The consecutive failures that open the circuit breaker
+        self.max_failures = failures
+        self.interval = interval
+        self.logger = logger
+
+        self.state = CircuitBreaker.CLOSED
+        self.failures = 0
+        self.retry_time = 0
+        self.opened_dropped = 0
+
+        self.failed = 0
+        self.dropped = 0
+
+    def allow(self):
+        """ Whether the message should be processed, otherwise it is counted as dropped. """
+        if self.state == CircuitBreaker.OPEN:
+            if time.monotonic() < self.retry_time:
+                self.dropped += 1
+                return False
+            self.state = CircuitBreaker.PROBING
+            self.logger.info(172002, CircuitBreaker.msgX[172002], topic=self.topic, interval=self.interval)
+        return True
+
+    def success(self):
+        """ A message was processed. """
+        if self.failures:
+            if self.state == CircuitBreaker.PROBING:
+                self.logger.info(172001, CircuitBreaker.msgX[172001], topic=self.topic, dropped=self.dropped - self.opened_dropped)
+            self.state = CircuitBreaker.CLOSED
+            self.failures = 0
+
+    def failure(self):
+        """ Processing a message failed. """
+        self.failed += 1
+        self.failures += 1
+        if self.state == CircuitBreaker.PROBING:
+            self.logger.error(174002, CircuitBreaker.msgX[174002], topic=self.topic, interval=self.interval)
+            self._open()
+        elif self.state == CircuitBreaker.CLOSED and self.failures >= self.max_failures:
+            self.logger.error(174001, CircuitBreaker.msgX[174001], topic=self.topic, failures=self.failures, interval=self.interval)
+            self.opened_dropped = self.dropped
+            self._open()
+
+    def _open(self):
+        self.state = CircuitBreaker.OPEN
+        self.retry_time = time.monotonic() + self.interval
+
+class KeywordDecoder():
+    """ Split a keyword payload into the keys and values of the fields that are not ignored. """
+    __slots__ = ('delimiter', 'separator', 'field_ignore', 'ignore_default')
+
+    def __init__(self, delimiter, separator, field_ignore, ignore_default):
+        self.delimiter = delimiter
+        self.separator = separator
+        self.field_ignore = field_ignore
+        self.ignore_default = ignore_default
+
+    def decode(self, payload_str, missing, ignored=None):
+        """ Return the list of key and value pairs of the fields that are not ignored.
+            The fields without a separator are added to 'missing', the keys of the ignored fields to 'ignored'.
+        """
+        separator = self.separator
+        field_ignore = self.field_ignore
+        pairs = []
+        for field in payload_str.split(self.delimiter):
+            index = field.find(separator)
+            if index == -1:
+                missing.append(field)
+                continue
+
+            key = field[:index]
+            ignore = field_ignore.get(key)
+            # The configured keys have no surrounding whitespace, so only strip the keys that are not found.
+            if ignore is None:
+                key = key.strip()
+                ignore = field_ignore.get(key, self.ignore_default)
+            if ignore:
+                if ignored is not None:
+                    ignored.append(key)
+                continue
+
+            pairs.append((key, field[index + 1:].strip()))
+
+        return pairs
+
+class TimestampParser():
+    """ Convert the timestamps of a topic to epoch, using its datetime_format and offset_format. """
+    __slots__ = ('datetime_format', 'offset_format', 'format_re', 'memo')
+
+    # The strptime directives parsed without strptime, with the patterns strptime uses.
+    directives = {
+        'Y': r"(?P<Y>\d\d\d\d)",
+        'm': r"(?P<m>1[0-2]|0[1-9]|[1-9])",
+        'd': r"(?P<d>3[0-1]|[1-2]\d|0[1-9]|[1-9]| [1-9])",
+        'H': r"(?P<H>2[0-3]|[0-1]\d|\d)",
+        'M': r"(?P<M>[0-5]\d|\d)",
+        'S': r"(?P<S>6[0-1]|[0-5]\d|\d)",
+        'f': r"(?P<f>[0-9]{1,6})",
+    }
+    non_digits_re = re.compile(r"\D")
+    # The number of timestamps remembered, devices often publish the same second resolution timestamp repeatedly.
+    memo_size = 64
+
+    def __init__(self, datetime_format, offset_format=None):
+        self.datetime_format = datetime_format
+        self.offset_format = offset_format
+        self.format_re = None
+        if datetime_format != 'iso':
+            self.format_re = self._compile_format(datetime_format)
+        self.memo = {}
+
+    @classmethod
+    def _compile_format(cls, datetime_format):
+        # Returns None when the format has a directive that is not supported, then strptime is used.
+        pattern = []
+        index = 0
+        while index < len(datetime_format):
+            char = datetime_format[index]
+            if char == '%':
+                directive = datetime_format[index + 1:index + 2]
+                if directive == '%':
+                    pattern.append('%')
+                elif directive in cls.directives:
+                    pattern.append(cls.directives[directive])
+                else:
+                    return None
+                index += 2
+            elif char.isspace():
+                # Like strptime, any whitespace matches one or more whitespace characters
+                pattern.append(r"\s+")
+                while index < len(datetime_format) and datetime_format[index].isspace():
+                    index += 1
+            else:
+                pattern.append(re.escape(char))
+                index += 1
+
+        try:
+            format_re = re.compile(''.join(pattern), re.IGNORECASE)
+        except re.error:
+            return None
+
+        # Without a date, strptime's defaults are used.
+        if not {'Y', 'm', 'd'} <= set(format_re.groupindex):
+            return None
+
+        return format_re
+
+    def split_offset(self, datetime_input):
+        """ Return the datetime string, the offset digits, the sign of the offset and the offset as a timedelta. """
+        if not self.offset_format:
+            return datetime_input, None, None, datetime.timedelta(0)
+
+        offset_start = len(datetime_input) - len(self.offset_format)
+        offset = self.non_digits_re.sub("", datetime_input[offset_start:])  # remove everything but the numbers from the UTC offset
+        sign = datetime_input[offset_start - 1:offset_start]  # offset plus or minus
+        offset_delta = datetime.timedelta(hours=int(offset[:2]), minutes=int(offset[2:]))
+        if sign == '-':
+            offset_delta = -offset_delta
+
+        return datetime_input[:offset_start - 1].strip(), offset, sign, offset_delta
+
+    def parse(self, datetime_string, offset_delta):
+        """ Return the epoch of the datetime string adjusted by the offset. """
+        if self.format_re is None:
+            if self.datetime_format == 'iso':
+                return self._parse_iso(datetime_string, offset_delta)
+            return self._mktime(datetime.datetime.strptime(datetime_string, self.datetime_format) + offset_delta)
+
+        found = self.format_re.match(datetime_string)
+        if found is None or found.end() != len(datetime_string):
+            raise ValueError(f"time data {datetime_string!r} does not match format {self.datetime_format!r}")
+        values = found.groupdict()
+        datetime_value = datetime.datetime(int(values['Y']), int(values['m']), int(values['d']),
+                                           int(values.get('H') or 0), int(values.get('M') or 0), int(values.get('S') or 0))
+        if offset_delta:
+            datetime_value += offset_delta
+        return self._mktime(datetime_value)
+
+    @staticmethod
+    def _mktime(datetime_value):
+        # The same as mktime of the timetuple, which is slower to create, mktime ignores the day of the week and year.
+        # Like the timetuple, the fraction of a second is dropped.
+        return time.mktime((datetime_value.year, datetime_value.month, datetime_value.day,
+                            datetime_value.hour, datetime_value.minute, datetime_value.second, 0, 0, -1))
+
+    @classmethod
+    def _parse_iso(cls, datetime_string, offset_delta):
+        # Before python 3.11, fromisoformat does not support 'Z'
+        if datetime_string[-1:] in ('Z', 'z'):
+            datetime_string = datetime_string[:-1] + '+00:00'
+        datetime_value = datetime.datetime.fromisoformat(datetime_string) + offset_delta
+        if datetime_value.tzinfo is not None:
+            return datetime_value.timestamp()
+        return cls._mktime(datetime_value) + datetime_value.microsecond / 1000000
+
+    def to_epoch(self, datetime_input):
+        """ Convert the timestamp to epoch. """
+        try:
+            return self.memo[datetime_input]
+        except KeyError:
+            pass
+
+        (datetime_string, _, _, offset_delta) = self.split_offset(datetime_input)
+        epoch = self.parse(datetime_string, offset_delta)
+        if len(self.memo) >= self.memo_size:
+            self.memo.clear()
+        self.memo[datetime_input] = epoch
+        return epoch
+
+class TopicPlan():
+    """ The configuration for processing the messages of a subscribed topic, resolved once. """
+    # pylint: disable=too-few-public-methods, too-many-instance-attributes
+    __slots__ = ('message_type', 'message_dict', 'fields', 'ignore_default', 'field_ignore', 'conversion_func', 'unit_system',
+                 'msg_id_field', 'fields_ignoring_msg_id', 'filters', 'filter_sets', 'text_values', 'topic_tail_is_fieldname',
+                 'queue', 'use_server_datetime', 'datetime_format', 'offset_format', 'timestamp_parser',
+                 'decompressor', 'duplicate_filter', 'circuit_breaker', 'payload_decoder', 'batch', 'extract_keys', 'extract_prefixes',
+                 'keyword_decoder', 'converters', 'default_converter', 'unit_converters', 'unit_config_version',
+                 'msg_id_keys', 'msg_id_routes', 'unknown_msg_id_routes')
+
+    # The most msg_id values whose routes are remembered.
+    msg_id_routes_size = 1000
+
+    def __init__(self, topic_manager, topic):
+        self.unit_system = topic_manager.get_unit_system(topic)
+        self.queue = topic_manager.get_queue(topic)
+        self.use_server_datetime = topic_manager.get_use_server_datetime(topic)
+        self.datetime_format = topic_manager.get_datetime_format(topic)
+        self.offset_format = topic_manager.get_offset_format(topic)
+        self.timestamp_parser = None
+        if self.datetime_format:
+            self.timestamp_parser = TimestampParser(self.datetime_format, self.offset_format)
+
+        self.message_dict = {}
+        self.message_type = None
+        self.fields = {}
+        self.ignore_default = None
+        self.field_ignore = {}
+        self.conversion_func = None
+        self.msg_id_field = None
+        self.fields_ignoring_msg_id = frozenset()
+        self.msg_id_keys = ()
+        self.msg_id_routes = {}
+        self.unknown_msg_id_routes = ({}, ())
+        self.filters = {}
+        self.filter_sets = {}
+        self.text_values = False
+        self.topic_tail_is_fieldname = None
+        self.decompressor = None
+        self.duplicate_filter = None
+        self.circuit_breaker = None
+        self.payload_decoder = None
+        self.batch = False
+        self.extract_keys = None
+        self.extract_prefixes = None
+        self.keyword_decoder = None
+        self.converters = {}
+        self.default_converter = None
+        self.unit_converters = {}
+        # The plan is compiled again when the WeeWX unit configuration changes
+        self.unit_config_version = ManageWeewxConfig.unit_config_version
+        # Topics that are not subscribed to, like the wind collector, only have the queue options.
+        if not topic_manager.get_subscribe(topic):
+            return
+
+        self.message_dict = topic_manager.get_message_dict(topic)
+        self.message_type = self.message_dict.get('type')
+        self.decompressor = topic_manager.get_decompressor(topic)
+        self.duplicate_filter = topic_manager.get_duplicate_filter(topic)
+        self.circuit_breaker = topic_manager.get_circuit_breaker(topic)
+        self.topic_tail_is_fieldname = topic_manager.get_topic_tail_is_fieldname(topic)
+        self._set_fields(topic_manager, topic)
+        self._set_filters(topic_manager, topic)
+        self._set_msg_id(topic_manager, topic)
+        self._set_decoder()
+
+    def _set_fields(self, topic_manager, topic):
+        self.fields = topic_manager.get_fields(topic)
+        self.ignore_default = topic_manager.get_ignore_value(topic)
+        # Whether each configured field is ignored, fields not configured use ignore_default.
+        self.field_ignore = {key: field.get('ignore', self.ignore_default) for key, field in self.fields.items()}
+        self.conversion_func = topic_manager.get_conversion_func(topic)
+        # The conversion function of each configured field, fields not configured use the topic's
+        self.default_converter = self.conversion_func['compiled']
+        self.converters = {key: field.get('conversion_func', self.conversion_func)['compiled'] for key, field in self.fields.items()}
+        self.unit_converters = {key: self._get_unit_converter(self.unit_system, field.get('name', key), field['units'])
+                                for key, field in self.fields.items() if 'units' in field}
+
+    def _set_filters(self, topic_manager, topic):
+        self.filters = topic_manager.get_filters(topic)
+        self.filter_sets = {key: self._get_filter_set(values) for key, values in self.filters.items()}
+
+    def _set_msg_id(self, topic_manager, topic):
+        self.msg_id_field = topic_manager.get_msg_id_field(topic)
+        self.fields_ignoring_msg_id = frozenset(topic_manager.get_fields_ignoring_msg_id(topic))
+        # The configured keys that have the msg_id appended
+        self.msg_id_keys = tuple(key for key in set(self.fields).union(self.filters) if key not in self.fields_ignoring_msg_id)
+        self.unknown_msg_id_routes = ({}, self._get_msg_id_filter_keys(None))
+
+    def _set_decoder(self):
+        if self.message_type == 'json':
+            self.payload_decoder = JSONDecoder(self.message_dict.get('json_decoder', 'auto'))
+        elif self.message_type in BinaryDecoder.codecs:
+            self.payload_decoder = BinaryDecoder(self.message_type)
+        elif self.message_type == 'xml':
+            self.payload_decoder = XMLDecoder()
+            self.text_values = True
+        elif self.message_type == 'keyword':
+            self.keyword_decoder = KeywordDecoder(self.message_dict['keyword_delimiter'], self.message_dict['keyword_separator'],
+                                                  self.field_ignore, self.ignore_default)
+        if self.payload_decoder:
+            self.batch = to_bool(self.message_dict.get('batch', False))
+            if self.ignore_default and not self.msg_id_field:
+                self._set_extract_spec()
+                if self.message_type == 'xml':
+                    # Only the elements of the opted in fields are kept
+                    self.payload_decoder = XMLDecoder(self.extract_keys, self.extract_prefixes)
+
+    def get_msg_id_routes(self, msg_id_suffix):
+        """ Get the routes of the keys of the messages with the msg_id, they are added as the keys are seen.
+            And the filtered keys of the messages, with their lookup keys. """
+        msg_id_routes = self.msg_id_routes.get(msg_id_suffix)
+        if msg_id_routes is None:
+            # When no configured key has the msg_id, all of its keys are ignored, except the fields ignoring the msg_id.
+            # So the msg_ids of other devices share their routes.
+            if self.ignore_default and not any(key.endswith(msg_id_suffix) for key in self.msg_id_keys):
+                msg_id_routes = self.unknown_msg_id_routes
+            else:
+                msg_id_routes = ({}, self._get_msg_id_filter_keys(msg_id_suffix))
+            if len(self.msg_id_routes) >= TopicPlan.msg_id_routes_size:
+                self.msg_id_routes.clear()
+            self.msg_id_routes[msg_id_suffix] = msg_id_routes
+        return msg_id_routes
+
+    def _get_msg_id_filter_keys(self, msg_id_suffix):
+        filter_keys = []
+        for lookup_key in self.filters:
+            if lookup_key in self.fields_ignoring_msg_id:
+                filter_keys.append((lookup_key, lookup_key))
+            elif msg_id_suffix and lookup_key.endswith(msg_id_suffix):
+                key = lookup_key[:-len(msg_id_suffix)]
+                if key not in self.fields_ignoring_msg_id:
+                    filter_keys.append((key, lookup_key))
+        return tuple(filter_keys)
+
+    def add_msg_id_route(self, routes, msg_id_suffix, key):
+        """ Add the route of the key, its lookup key and whether it is ignored. """
+        if key in self.fields_ignoring_msg_id:
+            lookup_key = key
+        elif routes is self.unknown_msg_id_routes[0]:
+            # Shared by the msg_ids, so the lookup key is not known
+            routes[key] = (None, True)
+            return routes[key]
+        else:
+            lookup_key = key + msg_id_suffix
+        routes[key] = (lookup_key, self.field_ignore.get(lookup_key, self.ignore_default))
+        return routes[key]
+
+    @staticmethod
+    def _get_filter_set(values):
+        # The values are tested with a set, unless one of them is unhashable
+        try:
+            return frozenset(values)
+        except TypeError:
+            return values
+
+    @staticmethod
+    def _get_unit_converter(unit_system, fieldname, from_units):
+        # Returns None when the value is already in the topic's unit system
+        (to_units, _) = weewx.units.getStandardUnitType(unit_system, fieldname)
+        if to_units == from_units:
+            return None
+
+        def convert(value):
+            return weewx.units.convert((value, from_units, None), to_units)[0]
+
+        try:
+            conversion_func = weewx.units.conversionDict[from_units][to_units]
+        except KeyError:
+            # weewx.units.convert raises the error when a value is converted
+            return convert
+
+        def convert_scalar(value):
+            if value is None:
+                return None
+            if isinstance(value, (list, tuple)):
+                return convert(value)
+            return conversion_func(value)
+
+        return convert_scalar
+
+    def _set_extract_spec(self):
+        # When fields are opted in, only the values of the opted in, filtered and duplicate_key fields are needed.
+        # A nested object is only walked when a configured field's name starts with its prefix, so arrays are still found.
+        keys = {key for key, ignore in self.field_ignore.items() if not ignore}
+        keys.update(self.filters)
+        if self.duplicate_filter is not None and self.duplicate_filter.key != 'payload':
+            keys.add(self.duplicate_filter.key)
+        self.extract_keys = frozenset(keys)
+        self.extract_prefixes = frozenset(key[:i + 1] for key in keys.union(self.fields) for i, char in enumerate(key) if char == '_')
+
 class TopicManager():
     """ Manage the MQTT topic subscriptions. """
     msgX = {
@@ -1040,8 +2363,13 @@ class TopicManager():
         51009: "TopicManager data-> outgoing collected {queue_name}: {data}",
         51010: "TopicManager data-> outgoing {queue_name}: {data}",
         51011: "TopicManager data-> outgoing accumulated {queue_name}: {target_data}",
+        51012: "TopicManager topic cache is full at {size} topics, the least recently used topics are being evicted.",
         # informational messages
         52001: "TopicManager ignoring record outside of interval {start_ts:f} {end_ts:f} {dateTime:f} {data}",
+        52002: ("TopicManager {topic} decompressed {count} payloads from {compressed_bytes} to {decompressed_bytes} bytes, "
+                "ratio {ratio:.2f}, in {seconds:.3f} seconds, {errors} failed."),
+        52003: "TopicManager {topic} suppressed {suppressed} duplicate messages of {count} messages.",
+        52004: "TopicManager {topic} dropped {dropped} messages, {failed} messages failed.",
         # error messages
         54001: "TopicManager queue limit {max_queue} reached. Removing: {element}",
         # exception messages
@@ -1076,13 +2404,17 @@ class TopicManager():
         if default_message_dict.get('type', None) is None:
             default_message_dict = configobj.ConfigObj({})
 
-        self.topics = {}
+        self.topics = TopicCache(to_int(config.get('topic_cache_size', 1000)))
         self.subscribed_topics = {}
+        self.plans = {}
+        self.decompressors = {}
+        self.duplicate_filters = {}
+        self.circuit_breakers = {}
         self.cached_fields = {}
         self.queues = []
 
         single_queue = to_bool(config.get('single_queue', False))
-        self.logger.debug(51001, TopicManager.msgX[51001].format(single_queue=single_queue))
+        self.logger.debug(51001, TopicManager.msgX[51001], single_queue=single_queue)
         single_queue_obj = None
         if single_queue:
             single_queue_obj = dict(
@@ -1102,8 +2434,16 @@ class TopicManager():
 
         self._add_collector_queue(topic_defaults)
 
-        self.logger.debug(51002, TopicManager.msgX[51002].format(subscribed_topics=json.dumps(self.subscribed_topics, default=str)))
-        self.logger.debug(51003, TopicManager.msgX[51003].format(cached_fields=self.cached_fields))
+        # A trie of the subscribed topics, the value is the order the topic was configured.
+        # So, a topic is matched against the subscriptions level by level instead of one subscription at a time.
+        self.subscribed_topic_names = list(self.subscribed_topics)
+        self.topic_matcher = MQTTMatcher()
+        for index, subscribed_topic in enumerate(self.subscribed_topic_names):
+            self.topic_matcher[subscribed_topic] = index
+
+        if self.logger.is_enabled('DEBUG', 51002):
+            self.logger.debug(51002, TopicManager.msgX[51002], subscribed_topics=json.dumps(self.subscribed_topics, default=str))
+        self.logger.debug(51003, TopicManager.msgX[51003], cached_fields=self.cached_fields)
 
     def _configure_topics(self, config, archive_topic, single_queue, single_queue_obj, default_message_dict, topic_defaults, field_defaults):
         # pylint: disable=too-many-arguments, too-many-locals
@@ -1173,7 +2513,7 @@ class TopicManager():
                  'ignore_end_time': to_bool(topic_dict.get('ignore_end_time', topic_defaults['ignore_end_time'])),
                  'adjust_start_time': to_float(topic_dict.get('adjust_start_time', topic_defaults['adjust_start_time'])),
                  'adjust_end_time': to_float(topic_dict.get('adjust_end_time', topic_defaults['adjust_end_time'])),
-                 'max_size': topic_dict.get('max_queue', topic_defaults['max_queue']),
+                 'max_size': to_int(topic_dict.get('max_queue', topic_defaults['max_queue'])),
                  'data': deque()
                  }
             )
@@ -1184,18 +2524,7 @@ class TopicManager():
 
     def _set_conversion_func(self, topic, topic_dict):
         conversion_type = topic_dict.get('conversion_type', 'float')
-        self.subscribed_topics[topic]['conversion_func'] = {}
-        if conversion_type == 'bool':
-            self.subscribed_topics[topic]['conversion_func']['source'] = 'lambda x: to_bool(x)'
-        elif conversion_type == 'float':
-            self.subscribed_topics[topic]['conversion_func']['source'] = 'lambda x: to_float(x)'
-        elif conversion_type == 'int':
-            self.subscribed_topics[topic]['conversion_func']['source'] = 'lambda x: to_int(x)'
-        else:
-            self.subscribed_topics[topic]['conversion_func']['source'] = 'lambda x: x'
-        # pylint: disable=eval-used
-        self.subscribed_topics[topic]['conversion_func']['compiled'] = eval(self.subscribed_topics[topic]['conversion_func']['source'])
-        # pylint: enable=eval-used
+        self.subscribed_topics[topic]['conversion_func'] = ConversionFunctions.get(conversion_type)
 
     def _configure_topic_fields(self, field_defaults, callback_config_name, topic, topic_dict):
         for field in topic_dict.sections:
@@ -1290,13 +2619,13 @@ class TopicManager():
         default = {}
 
         self.collect_wind_across_loops = to_bool(config.get('collect_wind_across_loops', True))
-        self.logger.debug(51004, TopicManager.msgX[51004].format(collect_wind_across_loops=self.collect_wind_across_loops))
+        self.logger.debug(51004, TopicManager.msgX[51004], collect_wind_across_loops=self.collect_wind_across_loops)
 
         self.collect_observations = to_bool(config.get('collect_observations', False))
-        self.logger.debug(51005, TopicManager.msgX[51005].format(collect_observations=self.collect_observations))
+        self.logger.debug(51005, TopicManager.msgX[51005], collect_observations=self.collect_observations)
 
         single_queue = to_bool(config.get('single_queue', False))
-        self.logger.debug(51006, TopicManager.msgX[51006].format(single_queue=single_queue))
+        self.logger.debug(51006, TopicManager.msgX[51006], single_queue=single_queue)
 
         default['unit_system_name'] = config.get('unit_system', 'US').strip().upper()
         if default['unit_system_name'] not in weewx.units.unit_constants:
@@ -1318,7 +2647,7 @@ class TopicManager():
         default['datetime_format'] = config.get('datetime_format', None)
         default['offset_format'] = config.get('offset_format', None)
 
-        default['max_queue'] = config.get('max_queue', sys.maxsize)
+        default['max_queue'] = to_int(config.get('max_queue', sys.maxsize))
         default['callback_config_name'] = config.get('callback_config_name', 'message')
 
         return default
@@ -1337,19 +2666,8 @@ class TopicManager():
         field['total_wrap_around'] = to_bool((field_dict).get('total_wrap_around', total_wrap_around))
         conversion_func = field_dict.get('conversion_func', None)
         conversion_type = field_dict.get('conversion_type', conversion_type)
-        field['conversion_func'] = {}
         field['conversion_type'] = conversion_type  # todo - hack so that a field configuration can be used as a default for its subfields
-        if conversion_func:
-            field['conversion_func']['source'] = conversion_func
-        elif conversion_type == 'bool':
-            field['conversion_func']['source'] = 'lambda x: to_bool(x)'
-        elif conversion_type == 'float':
-            field['conversion_func']['source'] = 'lambda x: to_float(x)'
-        elif conversion_type == 'int':
-            field['conversion_func']['source'] = 'lambda x: to_int(x)'
-        else:
-            field['conversion_func']['source'] = 'lambda x: x'
-        field['conversion_func']['compiled'] = eval(field['conversion_func']['source'])  # pylint: disable=eval-used
+        field['conversion_func'] = ConversionFunctions.get(conversion_type, conversion_func)
         field['conversion_error_to_none'] = (field_dict).get('conversion_error_to_none', conversion_error_to_none)
         if 'units' in field_dict:
             if field_dict['units'] in weewx.units.conversionDict and field['name'] in weewx.units.obs_group_dict:
@@ -1380,44 +2698,76 @@ class TopicManager():
             self.cached_fields[weewx_name] = {}
             self.cached_fields[weewx_name]['expires_after'] = to_float(field_dict['expires_after'])
 
-    def append_data(self, topic, in_data, fieldname=None):
-        """ Add the MQTT data to the queue. """
-        self.logger.debug(51007, TopicManager.msgX[51007].format(topic=topic, in_data=to_sorted_string(in_data)))
+    def _prepare_data(self, topic, plan, in_data):
+        if self.logger.is_enabled('DEBUG', 51007, topic):
+            self.logger.debug(51007, TopicManager.msgX[51007], topic=topic, in_data=to_sorted_string(in_data))
         data = dict(in_data)
-        payload = {}
-
-        queue = self._get_queue(topic)
-        use_server_datetime = self._get_value('use_server_datetime', topic)
 
-        if 'dateTime' not in data or use_server_datetime:
+        if 'dateTime' not in data or plan.use_server_datetime:
             data['dateTime'] = time.time()
         if 'usUnits' not in data:
-            data['usUnits'] = self.get_unit_system(topic)
+            data['usUnits'] = plan.unit_system
 
-        datetime_format = self._get_value('datetime_format', topic)
-        if datetime_format and 'dateTime' in data:
-            data['dateTime'] = self._to_epoch(data['dateTime'], datetime_format, self._get_value('offset_format', topic))
+        if plan.timestamp_parser and 'dateTime' in data:
+            data['dateTime'] = self._to_epoch(plan.timestamp_parser, data['dateTime'])
 
+        return data
+
+    def append_data(self, topic, in_data, fieldname=None):
+        """ Add the MQTT data to the queue. """
+        plan = self.get_plan(topic)
+        queue = plan.queue
+        data = self._prepare_data(topic, plan, in_data)
+        payload = {}
         payload['data'] = data
 
         if fieldname in self.collected_fields:
             self._queue_size_check(self.collected_queue, queue['max_size'])
-            self.logger.trace(50001, TopicManager.msgX[50001].format(fieldname=fieldname,
-                                                                     dateTime=weeutil.weeutil.timestamp_to_string(data['dateTime']),
-                                                                     data=to_sorted_string(data)))
+            if self.logger.is_enabled('TRACE', 50001):
+                self.logger.trace(50001, TopicManager.msgX[50001],
+                                  fieldname=fieldname,
+                                  dateTime=weeutil.weeutil.timestamp_to_string(data['dateTime']),
+                                  data=to_sorted_string(data))
             payload['fieldname'] = fieldname
             self.collected_queue.append(payload)
         else:
-            self._queue_size_check(queue, queue['max_size'])
-            self.logger.trace(50002, TopicManager.msgX[50002].format(topic=topic,
-                                                                     topic_data=self._lookup_topic(topic),
-                                                                     dateTime=weeutil.weeutil.timestamp_to_string(data['dateTime']),
-                                                                     data=to_sorted_string(data)))
+            self._queue_size_check(queue['data'], queue['max_size'])
+            if self.logger.is_enabled('TRACE', 50002, topic):
+                self.logger.trace(50002, TopicManager.msgX[50002],
+                                  topic=topic,
+                                  topic_data=self._lookup_topic(topic),
+                                  dateTime=weeutil.weeutil.timestamp_to_string(data['dateTime']),
+                                  data=to_sorted_string(data))
             queue['data'].append(payload,)
 
+    def append_batch(self, topic, records):
+        """ Add the records of a batched MQTT payload to the queue, in one operation. """
+        plan = self.get_plan(topic)
+        queue = plan.queue
+        max_queue = queue['max_size']
+
+        payloads = []
+        for in_data in records:
+            data = self._prepare_data(topic, plan, in_data)
+            if self.logger.is_enabled('TRACE', 50002, topic):
+                self.logger.trace(50002, TopicManager.msgX[50002],
+                                  topic=topic,
+                                  topic_data=self._lookup_topic(topic),
+                                  dateTime=weeutil.weeutil.timestamp_to_string(data['dateTime']),
+                                  data=to_sorted_string(data))
+            payloads.append({'data': data})
+
+        # Like appending the records one at a time, only the newest max_queue records are kept.
+        if len(payloads) > max_queue:
+            for element in payloads[:len(payloads) - max_queue]:
+                self.logger.error(54001, TopicManager.msgX[54001], max_queue=max_queue, element=element)
+            payloads = payloads[len(payloads) - max_queue:]
+        self._queue_size_check(queue['data'], max_queue, len(payloads))
+        queue['data'].extend(payloads)
+
     def peek_datetime(self, queue):
         """ Return the date/time of the first element in the queue. """
-        self.logger.trace(50003, TopicManager.msgX[50003].format(size=len(queue)))
+        self.logger.trace(50003, TopicManager.msgX[50003], size=len(queue))
         datetime_value = None
         if queue:
             datetime_value = queue[0]['data']['dateTime']
@@ -1426,7 +2776,7 @@ class TopicManager():
 
     def peek_last_datetime(self, queue):
         """ Return the date/time of the last element in the queue. """
-        self.logger.trace(50004, TopicManager.msgX[50004].format(size=len(queue)))
+        self.logger.trace(50004, TopicManager.msgX[50004], size=len(queue))
         datetime_value = 0
         if queue:
             datetime_value = queue[-1]['data']['dateTime']
@@ -1441,7 +2791,7 @@ class TopicManager():
         """ Get data off the queue of MQTT data. """
         queue_name = queue['name']
         data_queue = queue['data']
-        self.logger.trace(50005, TopicManager.msgX[50005].format(queue_name=queue_name, size=len(data_queue)))
+        self.logger.trace(50005, TopicManager.msgX[50005], queue_name=queue_name, size=len(data_queue))
         if self.collect_wind_across_loops:
             collector = self.collector
         else:
@@ -1457,13 +2807,15 @@ class TopicManager():
         if not self.collect_wind_across_loops:
             data = collector.get_data()
             if data:
-                self.logger.debug(51008, TopicManager.msgX[51008].format(queue_name=queue_name, data=to_sorted_string(data)))
+                if self.logger.is_enabled('DEBUG', 51008):
+                    self.logger.debug(51008, TopicManager.msgX[51008], queue_name=queue_name, data=to_sorted_string(data))
                 yield data
 
         if self.collect_observations:
             data = observation_collector.get_data()
             if data:
-                self.logger.debug(51009, TopicManager.msgX[51009].format(queue_name=queue_name, data=to_sorted_string(data)))
+                if self.logger.is_enabled('DEBUG', 51009):
+                    self.logger.debug(51009, TopicManager.msgX[51009], queue_name=queue_name, data=to_sorted_string(data))
                 yield data
 
     def _process_queue(self, end_ts, collector, observation_collector, queue):
@@ -1473,16 +2825,16 @@ class TopicManager():
 
         while data_queue:
             if data_queue[0]['data']['dateTime'] > end_ts:
-                self.logger.trace(50006,
-                                  TopicManager.msgX[50006].format(queue_name=queue_name, size=len(queue), data_queue_content=data_queue[0]))
+                self.logger.trace(50006, TopicManager.msgX[50006], queue_name=queue_name, size=len(queue), data_queue_content=data_queue[0])
                 break
             payload = data_queue.popleft()
             if queue_type == 'collector':
                 fieldname = payload['fieldname']
-                self.logger.trace(50007, TopicManager.msgX[50007].
-                                  format(fieldname=fieldname,
-                                         dateTime=weeutil.weeutil.timestamp_to_string(payload['data']['dateTime']),
-                                         payload=to_sorted_string(payload)))
+                if self.logger.is_enabled('TRACE', 50007):
+                    self.logger.trace(50007, TopicManager.msgX[50007],
+                                      fieldname=fieldname,
+                                      dateTime=weeutil.weeutil.timestamp_to_string(payload['data']['dateTime']),
+                                      payload=to_sorted_string(payload))
                 data = collector.add_data(fieldname, payload['data'])
             elif self.collect_observations:
                 data = observation_collector.add_dict(payload['data'])
@@ -1490,7 +2842,8 @@ class TopicManager():
                 data = payload['data']
 
             if data:
-                self.logger.debug(51010, TopicManager.msgX[51010].format(queue_name=queue_name, data=to_sorted_string(data)))
+                if self.logger.is_enabled('DEBUG', 51010):
+                    self.logger.debug(51010, TopicManager.msgX[51010], queue_name=queue_name, data=to_sorted_string(data))
                 yield data
 
     def get_accumulated_data(self, queue, start_time, end_time, units):
@@ -1518,31 +2871,36 @@ class TopicManager():
         else:
             end_ts = end_time + adjust_end_time
 
-        self.logger.trace(50010, TopicManager.msgX[50010].format(start_ts=start_ts, end_ts=end_ts))
+        self.logger.trace(50010, TopicManager.msgX[50010], start_ts=start_ts, end_ts=end_ts)
         accumulator = weewx.accum.Accum(weeutil.weeutil.TimeSpan(start_ts, end_ts))
 
         for data in self.get_data(queue, end_ts):
             try:
-                self.logger.trace(50011, TopicManager.msgX[50011].format(queue_name=queue_name,
-                                                                         dateTime=weeutil.weeutil.timestamp_to_string(data['dateTime']),
-                                                                         data=to_sorted_string(data)))
+                if self.logger.is_enabled('TRACE', 50011):
+                    self.logger.trace(50011, TopicManager.msgX[50011],
+                                      queue_name=queue_name,
+                                      dateTime=weeutil.weeutil.timestamp_to_string(data['dateTime']),
+                                      data=to_sorted_string(data))
                 accumulator.addRecord(data)
             except weewx.accum.OutOfSpan:
-                self.logger.info(52001, TopicManager.msgX[52001].format(start_ts=start_ts,
-                                                                        end_ts=end_ts,
-                                                                        dateTime=data['dateTime'],
-                                                                        data=to_sorted_string(data)))
+                if self.logger.is_enabled('INFO'):
+                    self.logger.info(52001, TopicManager.msgX[52001],
+                                     start_ts=start_ts, end_ts=end_ts, dateTime=data['dateTime'], data=to_sorted_string(data))
 
         target_data = {}
         if not accumulator.isEmpty:
             aggregate_data = accumulator.getRecord()
-            self.logger.trace(50012, TopicManager.msgX[50012].format(queue_name=queue_name,
-                                                                     dateTime=weeutil.weeutil.timestamp_to_string(aggregate_data['dateTime']),
-                                                                     aggregate_data=to_sorted_string(aggregate_data)))
+            if self.logger.is_enabled('TRACE', 50012):
+                self.logger.trace(50012, TopicManager.msgX[50012],
+                                  queue_name=queue_name,
+                                  dateTime=weeutil.weeutil.timestamp_to_string(aggregate_data['dateTime']),
+                                  aggregate_data=to_sorted_string(aggregate_data))
             target_data = weewx.units.to_std_system(aggregate_data, units)
-            self.logger.trace(50013, TopicManager.msgX[50013].format(queue_name=queue_name,
-                                                                     dateTime=weeutil.weeutil.timestamp_to_string(target_data['dateTime']),
-                                                                     target_data=to_sorted_string(target_data)))
+            if self.logger.is_enabled('TRACE', 50013):
+                self.logger.trace(50013, TopicManager.msgX[50013],
+                                  queue_name=queue_name,
+                                  dateTime=weeutil.weeutil.timestamp_to_string(target_data['dateTime']),
+                                  target_data=to_sorted_string(target_data))
         else:
             self.logger.trace(50014, TopicManager.msgX[50014])
 
@@ -1550,14 +2908,15 @@ class TopicManager():
         if ignore_end_time:
             target_data['dateTime'] = end_time
 
-        self.logger.debug(51011, TopicManager.msgX[51011].format(queue_name=queue_name, target_data=to_sorted_string(target_data)))
+        if self.logger.is_enabled('DEBUG', 51011):
+            self.logger.debug(51011, TopicManager.msgX[51011], queue_name=queue_name, target_data=to_sorted_string(target_data))
         return target_data
 
-    def _queue_size_check(self, queue, max_queue):
-        while len(queue) >= max_queue:
+    def _queue_size_check(self, queue, max_queue, count=1):
+        # Makes room for count elements
+        while queue and len(queue) + count > max_queue:
             element = queue.popleft()
-            self.logger.error(54001,
-                              TopicManager.msgX[54001].format(max_queue=int(max_queue), element=element))
+            self.logger.error(54001, TopicManager.msgX[54001], max_queue=int(max_queue), element=element)
 
     def get_fields(self, topic):
         """ Get the fields. """
@@ -1603,46 +2962,150 @@ class TopicManager():
         """ Get the ignore_msg_id_field value """
         return self._get_value('fields_ignoring_msg_id', topic)
 
-    def _get_queue(self, topic):
-        return self._get_value('queue', topic)
-
-    def _get_value(self, value, topic):
+    def get_decompressor(self, topic):
+        """ Get the decompressor of the topic, None when its payloads are not compressed. """
         subscribed_topic = self._lookup_topic(topic)
-        return self.subscribed_topics[subscribed_topic][value]
+        # Kept for the life of the topic manager, so that the counts are not lost when a plan is compiled again.
+        if subscribed_topic not in self.decompressors:
+            message_dict = self.get_message_dict(topic)
+            compression = message_dict.get('compression', 'none')
+            decompressor = None
+            if compression != 'none':
+                decompressor = Decompressor(compression, to_int(message_dict.get('max_decompressed_size', 1048576)))
+            self.decompressors[subscribed_topic] = decompressor
+        return self.decompressors[subscribed_topic]
+
+    def log_compression_statistics(self):
+        """ Log the compression counts of the topics with compressed payloads. """
+        for topic, decompressor in self.decompressors.items():
+            if decompressor is None:
+                continue
+            ratio = decompressor.decompressed_bytes / decompressor.compressed_bytes if decompressor.compressed_bytes else 0.0
+            self.logger.info(52002, TopicManager.msgX[52002],
+                             topic=topic,
+                             count=decompressor.count,
+                             compressed_bytes=decompressor.compressed_bytes,
+                             decompressed_bytes=decompressor.decompressed_bytes,
+                             ratio=ratio,
+                             seconds=decompressor.seconds,
+                             errors=decompressor.errors)
+
+    def get_duplicate_filter(self, topic):
+        """ Get the duplicate filter of the topic, None when duplicate messages are not suppressed. """
+        subscribed_topic = self._lookup_topic(topic)
+        # Kept for the life of the topic manager, so that the messages and counts are not lost when a plan is compiled again.
+        if subscribed_topic not in self.duplicate_filters:
+            message_dict = self.get_message_dict(topic)
+            duplicate_key = message_dict.get('duplicate_key', 'none')
+            duplicate_filter = None
+            if duplicate_key != 'none':
+                duplicate_filter = DuplicateFilter(duplicate_key,
+                                                   to_float(message_dict.get('duplicate_window', 60)),
+                                                   to_int(message_dict.get('max_duplicates', 1024)))
+            self.duplicate_filters[subscribed_topic] = duplicate_filter
+        return self.duplicate_filters[subscribed_topic]
+
+    def log_duplicate_statistics(self):
+        """ Log the duplicate message counts of the topics that suppress duplicate messages. """
+        for topic, duplicate_filter in self.duplicate_filters.items():
+            if duplicate_filter is None:
+                continue
+            self.logger.info(52003, TopicManager.msgX[52003],
+                             topic=topic,
+                             suppressed=duplicate_filter.suppressed,
+                             count=duplicate_filter.count)
 
-    def _lookup_topic(self, topic):
-        if topic in self.topics:
-            return self.topics[topic]
+    def get_circuit_breaker(self, topic):
+        """ Get the circuit breaker of the topic, None when its messages are never dropped. """
+        subscribed_topic = self._lookup_topic(topic)
+        # Kept for the life of the topic manager, so that the state and counts are not lost when a plan is compiled again.
+        if subscribed_topic not in self.circuit_breakers:
+            message_dict = self.get_message_dict(topic)
+            failures = to_int(message_dict.get('circuit_breaker_failures', 0))
+            circuit_breaker = None
+            if failures > 0:
+                circuit_breaker = CircuitBreaker(subscribed_topic,
+                                                 failures,
+                                                 to_float(message_dict.get('circuit_breaker_interval', 60)),
+                                                 self.logger)
+            self.circuit_breakers[subscribed_topic] = circuit_breaker
+        return self.circuit_breakers[subscribed_topic]
+
+    def log_circuit_breaker_statistics(self):
+        """ Log the dropped and failed message counts of the topics with a circuit breaker. """
+        for topic, circuit_breaker in self.circuit_breakers.items():
+            if circuit_breaker is None:
+                continue
+            self.logger.info(52004, TopicManager.msgX[52004],
+                             topic=topic,
+                             dropped=circuit_breaker.dropped,
+                             failed=circuit_breaker.failed)
 
-        for subscribed_topic in self.subscribed_topics:
-            if mqtt.topic_matches_sub(subscribed_topic, topic):
-                self.topics[topic] = subscribed_topic
-                return subscribed_topic
+    def get_plan(self, topic):
+        """ Get the plan for processing the messages of the topic. """
+        subscribed_topic = self._lookup_topic(topic)
+        plan = self.plans.get(subscribed_topic)
+        if plan is None or plan.unit_config_version != ManageWeewxConfig.unit_config_version:
+            # Compiled on the first message, after the message callback provider has completed the configuration.
+            plan = self.plans[subscribed_topic] = TopicPlan(self, topic)
+        return plan
+
+    def get_subscribe(self, topic):
+        """ Get whether the topic is subscribed to. """
+        return self._get_value('subscribe', topic)
+
+    def get_queue(self, topic):
+        """ Get the queue. """
+        return self._get_value('queue', topic)
 
-        raise ValueError(TopicManager.msgX[59005].format(topic=topic))
+    def get_use_server_datetime(self, topic):
+        """ Get the use_server_datetime value. """
+        return self._get_value('use_server_datetime', topic)
 
-    def _to_epoch(self, datetime_input, datetime_format, offset_format=None):
-        self.logger.trace(50015, TopicManager.msgX[50015].format(datetime_input=datetime_input,
-                                                                 datetime_format=datetime,
-                                                                 offset_format=offset_format))
-        if offset_format:
-            offset_start = len(datetime_input) - len(offset_format)
-            offset = re.sub(r"\D", "", datetime_input[offset_start:])  # remove everything but the numbers from the UTC offset
-            sign = datetime_input[offset_start - 1:offset_start]  # offset plus or minus
-            offset_delta = datetime.timedelta(hours=int(offset[:2]), minutes=int(offset[2:]))
-            if sign == '-':
-                offset_delta = -offset_delta
+    def get_datetime_format(self, topic):
+        """ Get the datetime_format value. """
+        return self._get_value('datetime_format', topic)
 
-            datetime_string = datetime_input[:offset_start - 1].strip()
+    def get_offset_format(self, topic):
+        """ Get the offset_format value. """
+        return self._get_value('offset_format', topic)
 
-            self.logger.trace(50016, TopicManager.msgX[50016].format(offset=offset, sign=sign))
+    def _get_queue(self, topic):
+        return self._get_value('queue', topic)
 
-        else:
-            datetime_string = datetime_input
-            offset_delta = datetime.timedelta(hours=0, minutes=0)
+    def _get_value(self, value, topic):
+        subscribed_topic = self._lookup_topic(topic)
+        return self.subscribed_topics[subscribed_topic][value]
 
-        epoch = time.mktime((datetime.datetime.strptime(datetime_string, datetime_format) + offset_delta).timetuple())
-        self.logger.trace(50017, TopicManager.msgX[50017].format(datetime_string=datetime_string, epoch=epoch))
+    def _lookup_topic(self, topic):
+        subscribed_topic = self.topics.get(topic)
+        if subscribed_topic is not None:
+            return subscribed_topic
+
+        # When more than one subscription matches, the first one configured is used.
+        index = min(self.topic_matcher.iter_match(topic), default=None)
+        if index is None:
+            raise ValueError(TopicManager.msgX[59005].format(topic=topic))
+
+        subscribed_topic = self.subscribed_topic_names[index]
+        if self.topics.put(topic, subscribed_topic) and self.topics.evictions == 1:
+            self.logger.debug(51012, TopicManager.msgX[51012], size=self.topics.max_size)
+        return subscribed_topic
+
+    def _to_epoch(self, timestamp_parser, datetime_input):
+        if not self.logger.is_enabled('TRACE', 50015):
+            return timestamp_parser.to_epoch(datetime_input)
+
+        self.logger.trace(50015, TopicManager.msgX[50015],
+                          datetime_input=datetime_input,
+                          datetime_format=timestamp_parser.datetime_format,
+                          offset_format=timestamp_parser.offset_format)
+        (datetime_string, offset, sign, offset_delta) = timestamp_parser.split_offset(datetime_input)
+        if timestamp_parser.offset_format:
+            self.logger.trace(50016, TopicManager.msgX[50016], offset=offset, sign=sign)
+
+        epoch = timestamp_parser.parse(datetime_string, offset_delta)
+        self.logger.trace(50017, TopicManager.msgX[50017], datetime_string=datetime_string, epoch=epoch)
 
         return epoch
 
@@ -1668,6 +3131,10 @@ class AbstractMessageCallbackProvider():  # pylint: disable=too-few-public-metho
         self.logger = logger
         self.topic_manager = topic_manager
         self.previous_values = {}
+        # Called with the message, when processing it raises an exception.
+        self.exception_callback = None
+        # Counts the exceptions, when set only the first of each topic and exception type is logged in a report interval.
+        self.message_errors = None
 
     def get_callback(self):
         """ Get the MQTT callback. """
@@ -1676,6 +3143,9 @@ class AbstractMessageCallbackProvider():  # pylint: disable=too-few-public-metho
     def _update_data(self, orig_name, orig_value, fields, default_field_conversion_func, unit_system):
         # pylint: disable=too-many-arguments
         value = self._convert_value(fields, default_field_conversion_func, orig_name, orig_value)
+        return self._update_value(orig_name, value, fields, unit_system)
+
+    def _update_value(self, orig_name, value, fields, unit_system):
         fieldname = fields.get(orig_name, {}).get('name', orig_name)
 
         if orig_name in fields and 'units' in fields[orig_name]:  # TODO - simplify, if possible
@@ -1683,33 +3153,34 @@ class AbstractMessageCallbackProvider():  # pylint: disable=too-few-public-metho
             (value, _, _) = weewx.units.convert((value, fields[orig_name]['units'], None), to_units)
 
         if fields.get(orig_name, {}).get('contains_total', False):
-            current_value = value
-            total_wrap_around = fields.get(orig_name, {}).get('total_wrap_around', False)
-            value = self._calc_increment(orig_name, current_value, self.previous_values.get(orig_name), total_wrap_around)
-            self.previous_values[orig_name] = current_value
+            value = self._get_increment(orig_name, value, fields[orig_name])
 
         return fieldname, value
 
+    def _get_increment(self, orig_name, current_value, field):
+        total_wrap_around = field.get('total_wrap_around', False)
+        value = self._calc_increment(orig_name, current_value, self.previous_values.get(orig_name), total_wrap_around)
+        self.previous_values[orig_name] = current_value
+        return value
+
     def _calc_increment(self, observation, current_total, previous_total, wrap_around):
-        self.logger.trace(90001, AbstractMessageCallbackProvider.msgX[90001].
-                          format(observation=observation,
-                                 current_total=current_total,
-                                 previous_total=previous_total is None and 'None' or str(previous_total)))
+        self.logger.trace(90001, AbstractMessageCallbackProvider.msgX[90001],
+                          observation=observation,
+                          current_total=current_total,
+                          previous_total=previous_total is None and 'None' or str(previous_total))
 
         if current_total is not None and previous_total is not None:
             if current_total >= previous_total:
                 return current_total - previous_total
 
             if wrap_around and current_total < previous_total:
-                self.logger.trace(90002, AbstractMessageCallbackProvider.msgX[90002].format(observation=observation,
-                                                                                            current_total=current_total,
-                                                                                            previous_total=previous_total))
+                self.logger.trace(90002, AbstractMessageCallbackProvider.msgX[90002],
+                                  observation=observation, current_total=current_total, previous_total=previous_total)
 
                 return current_total
 
-            self.logger.trace(90003, AbstractMessageCallbackProvider.msgX[90003].format(observation=observation,
-                                                                                        current_total=current_total,
-                                                                                        previous_total=previous_total))
+            self.logger.trace(90003, AbstractMessageCallbackProvider.msgX[90003],
+                              observation=observation, current_total=current_total, previous_total=previous_total)
 
         return None
 
@@ -1737,6 +3208,7 @@ class MessageCallbackProvider(AbstractMessageCallbackProvider):
         40003: "MessageCallbackProvider on_message_individual ignoring field: {key}",
         # debug messages
         41001: "MessageCallbackProvider data-> incoming topic: {topic}, QOS: {qos}, retain: {retain}, payload: {payload}",
+        41002: "MessageCallbackProvider suppressed duplicate message {topic} : {payload} with {duplicate_key}",
         # informational messages
         42001: "Message configuration found under [[MessageCallback]] and [[Topic]]. Ignoring [[MessageCallback]].",
         42002: "MessageCallbackProvider on_message_json filtered out {topic} : {payload} with {lookup_key}={filter}",
@@ -1755,6 +3227,7 @@ class MessageCallbackProvider(AbstractMessageCallbackProvider):
         49001: "{topic} topic is missing '[[[[message]]]]' section",
         49002: "{topic} topic is missing '[[[[message]]]] type=' section",
         49003: "Invalid type configured: {message_type}",
+        49004: "{topic} topic duplicate_key = {duplicate_key} is not supported by the {message_type} type, use duplicate_key = payload.",
     }
 
     def __init__(self, config, logger, topic_manager):
@@ -1776,11 +3249,32 @@ class MessageCallbackProvider(AbstractMessageCallbackProvider):
             message_type = topic_manager.subscribed_topics[topic][topic_manager.message_config_name].get('type', None)
             if message_type is None:
                 raise ValueError(MessageCallbackProvider.msgX[49002].format(topic=topic))
-            if message_type not in ['json', 'keyword', 'individual']:
+            if message_type not in ['json', 'keyword', 'individual', 'msgpack', 'cbor', 'xml']:
                 raise ValueError(MessageCallbackProvider.msgX[49003].format(message_type=message_type))
+            # Fail at startup when the decoder is not valid or not installed
+            if message_type == 'json':
+                JSONDecoder(topic_manager.subscribed_topics[topic][topic_manager.message_config_name].get('json_decoder', 'auto'))
+            elif message_type in BinaryDecoder.codecs:
+                BinaryDecoder(message_type)
+            compression = topic_manager.subscribed_topics[topic][topic_manager.message_config_name].get('compression', 'none')
+            if compression != 'none':
+                Decompressor(compression)
+            duplicate_key = topic_manager.subscribed_topics[topic][topic_manager.message_config_name].get('duplicate_key', 'none')
+            if duplicate_key not in ('none', 'payload') and message_type in ('keyword', 'individual'):
+                raise ValueError(MessageCallbackProvider.msgX[49004].format(topic=topic, duplicate_key=duplicate_key, message_type=message_type))
 
             self._set_flatten_delimiter(topic, topic_manager)
 
+        self.handlers = {
+            'individual': self._on_message_individual,
+            'json': self._on_message_json,
+            'keyword': self._on_message_keyword,
+            # Decoded to the same objects as json, so processed the same way
+            'msgpack': self._on_message_json,
+            'cbor': self._on_message_json,
+            'xml': self._on_message_json,
+        }
+
     @staticmethod
     def _set_flatten_delimiter(topic, topic_manager):
         # ToDo Investigate this and copying, maybe a merge?
@@ -1813,14 +3307,11 @@ class MessageCallbackProvider(AbstractMessageCallbackProvider):
         # pylint: disable=too-many-arguments
         if new_key in fields and 'subfields' in fields[new_key]:
             if len(value) > len(fields[new_key]['subfields']):
-                self.logger.error(44001, MessageCallbackProvider.msgX[44002].format(new_key=new_key,
-                                                                                    value=value,
-                                                                                    subfields=fields[new_key]['subfields']))
+                self.logger.error(44001, MessageCallbackProvider.msgX[44002],
+                                  new_key=new_key, value=value, subfields=fields[new_key]['subfields'])
             elif len(value) < len(fields[new_key]['subfields']):
-                self.logger.error(44002,
-                                  MessageCallbackProvider.msgX[44002].format(new_key=new_key,
-                                                                             value=value,
-                                                                             subfields=fields[new_key]['subfields']))
+                self.logger.error(44002, MessageCallbackProvider.msgX[44002],
+                                  new_key=new_key, value=value, subfields=fields[new_key]['subfields'])
             else:
                 i = 0
                 for subvalue in value:
@@ -1833,161 +3324,276 @@ class MessageCallbackProvider(AbstractMessageCallbackProvider):
             pass
         else:
             # if not fields.get(lookup_key, {}).get('ignore', fields_ignore_default):
-            self.logger.error(44003, MessageCallbackProvider.msgX[44003].format(new_key=new_key, value=value))
+            self.logger.error(44003, MessageCallbackProvider.msgX[44003], new_key=new_key, value=value)
+
+    def _flatten_payload(self, plan, data):
+        # The ignored fields are still needed when they are traced.
+        if plan.extract_keys is not None and isinstance(data, dict) and not self.logger.is_enabled('TRACE', 40002):
+            data_flattened = {}
+            self._flatten_selected(plan, '', data_flattened, data)
+            return data_flattened
+
+        # Most payloads are a json object of values, which is already flat.
+        if type(data) is dict:  # pylint: disable=unidiomatic-typecheck
+            types = set(map(type, data.values()))
+            if dict not in types and list not in types:
+                return data
+
+        data_flattened = {}
+        self._flatten(plan.fields, plan.ignore_default, plan.message_dict['flatten_delimiter'], '', data_flattened, data)
+        return data_flattened
+
+    def _flatten_selected(self, plan, prefix, new_dict, old_dict):
+        # Like _flatten, but only the values in the plan's extraction spec are kept.
+        for key, value in old_dict.items():
+            new_key = prefix + key
+            if isinstance(value, dict):
+                if new_key + '_' in plan.extract_prefixes:
+                    self._flatten_selected(plan, new_key + '_', new_dict, value)
+            elif isinstance(value, list):
+                if new_key in plan.fields:
+                    self._flatten_list(plan.fields, plan.ignore_default, plan.message_dict['flatten_delimiter'],
+                                       prefix, new_key, value, new_dict)
+            elif new_key in plan.extract_keys:
+                new_dict[new_key] = value
+
+    def _update_field(self, plan, key, value):
+        # _update_data with the field's conversion functions from the plan
+        try:
+            value = plan.converters.get(key, plan.default_converter)(value)
+        except ValueError:
+            # Converted again for the error handling of _convert_value
+            value = self._convert_value(plan.fields, plan.conversion_func, key, value)
+
+        field = plan.fields.get(key)
+        if field is None:
+            return key, value
+
+        unit_converter = plan.unit_converters.get(key)
+        if unit_converter is not None:
+            value = unit_converter(value)
+
+        if field.get('contains_total', False):
+            value = self._get_increment(key, value, field)
+
+        return field.get('name', key), value
 
     def _log_message(self, msg):
-        self.logger.debug(41001, MessageCallbackProvider.msgX[41001].format(topic=msg.topic,
-                                                                            qos=msg.qos,
-                                                                            retain=msg.retain,
-                                                                            payload=msg.payload))
-
-    def _log_exception(self, method, exception, msg):
-        self.logger.error(44004, MessageCallbackProvider.msgX[44004].format(method=method, exception_type=type(exception), exception=exception))
-        self.logger.error(44005, MessageCallbackProvider.msgX[44005].format(topic=msg.topic, payload=msg.payload))
-        self.logger.error(44006, MessageCallbackProvider.msgX[44006].format(traceback=traceback.format_exc()))
-
-    def _on_message_keyword(self, msg):
-        # pylint: disable= too-many-locals
+        self.logger.debug(41001, MessageCallbackProvider.msgX[41001], topic=msg.topic, qos=msg.qos, retain=msg.retain, payload=msg.payload)
+
+    def _log_exception(self, method, exception, msg, plan=None):
+        if plan is not None and plan.circuit_breaker is not None:
+            plan.circuit_breaker.failure()
+        message_errors = self.message_errors
+        if message_errors is None or message_errors.add(msg.topic, exception):
+            self.logger.error(44004, MessageCallbackProvider.msgX[44004], method=method, exception_type=type(exception), exception=exception)
+            self.logger.error(44005, MessageCallbackProvider.msgX[44005], topic=msg.topic, payload=msg.payload)
+            if self.logger.is_enabled('ERROR'):
+                self.logger.error(44006, MessageCallbackProvider.msgX[44006], traceback=traceback.format_exc())
+        if message_errors is not None:
+            message_errors.write_dead_letter(msg, exception)
+        if self.exception_callback:
+            self.exception_callback(msg)
+
+    def _on_message_keyword(self, msg, plan):
         # Wrap all the processing in a try, so it doesn't crash and burn on any error
         try:
             self._log_message(msg)
-            message_dict = self.topic_manager.get_message_dict(msg.topic)
-            fields = self.topic_manager.get_fields(msg.topic)
-            fields_ignore_default = self.topic_manager.get_ignore_value(msg.topic)
-            fields_conversion_func = self.topic_manager.get_conversion_func(msg.topic)
 
-            payload_str = msg.payload.decode('utf-8')
+            missing = []
+            ignored = [] if self.logger.is_enabled('TRACE') else None
+            pairs = plan.keyword_decoder.decode(msg.payload.decode('utf-8'), missing, ignored)
 
-            fielddata = payload_str.split(message_dict['keyword_delimiter'])
-            data = {}
-            unit_system = self.topic_manager.get_unit_system(msg.topic)
-            for field in fielddata:
-                eq_index = field.find(message_dict['keyword_separator'])
-                # Ignore all fields that do not have the separator
-                if eq_index == -1:
-                    self.logger.error(44007, MessageCallbackProvider.msgX[44007].format(keyword_separator=message_dict['keyword_separator']))
-                    self.logger.error(44008, MessageCallbackProvider.msgX[44008].format(field=field))
-                    continue
+            # Ignore all fields that do not have the separator
+            for field in missing:
+                self.logger.error(44007, MessageCallbackProvider.msgX[44007], keyword_separator=plan.keyword_decoder.separator)
+                self.logger.error(44008, MessageCallbackProvider.msgX[44008], field=field)
+            if ignored:
+                for key in ignored:
+                    self.logger.trace(40001, MessageCallbackProvider.msgX[40001], key=key)
 
-                key = field[:eq_index].strip()
-                if not fields.get(key, {}).get('ignore', fields_ignore_default):
-                    (fieldname, value) = self._update_data(key, field[eq_index + 1:].strip(), fields, fields_conversion_func, unit_system)
-                    data[fieldname] = value
-                else:
-                    self.logger.trace(40001, MessageCallbackProvider.msgX[40001].format(key=key))
+            data = {}
+            for key, value in pairs:
+                (fieldname, value) = self._update_field(plan, key, value)
+                data[fieldname] = value
 
             if data:
                 self.topic_manager.append_data(msg.topic, data)
             else:
-                self.logger.error(44009, MessageCallbackProvider.msgX[44009].format(topic=msg.topic, payload=msg.payload))
+                # A malformed payload raises no exception, it still counts against the circuit breaker
+                if plan.circuit_breaker is not None:
+                    plan.circuit_breaker.failure()
+                self.logger.error(44009, MessageCallbackProvider.msgX[44009], topic=msg.topic, payload=msg.payload)
 
         except Exception as exception:  # (want to catch all) pylint: disable=broad-except
-            self._log_exception('on_message_keyword', exception, msg)
+            self._log_exception('on_message_keyword', exception, msg, plan)
 
-    def _on_message_json(self, msg):
-        # pylint: disable=too-many-branches
+    def _on_message_json(self, msg, plan):
         # Wrap all the processing in a try, so it doesn't crash and burn on any error
         try:
             self._log_message(msg)
-            message_dict = self.topic_manager.get_message_dict(msg.topic)
-            fields = self.topic_manager.get_fields(msg.topic)
-            fields_ignore_default = self.topic_manager.get_ignore_value(msg.topic)
 
-            payload_str = msg.payload.decode('utf-8')
+            data = plan.payload_decoder.decode(msg.payload)
+            if plan.batch and isinstance(data, list):
+                self._on_batch(msg, plan, data)
+                return
 
-            data_flattened = {}
-            self._flatten(fields, fields_ignore_default, message_dict['flatten_delimiter'], '', data_flattened, json.loads(payload_str))
+            data_flattened = self._flatten_payload(plan, data)
 
-            data_final = self._process_json_dict(msg, fields, fields_ignore_default, data_flattened)
+            data_final = self._process_json_dict(msg, plan, data_flattened)
 
             if data_final:
                 self.topic_manager.append_data(msg.topic, data_final)
 
         except Exception as exception:  # (want to catch all) pylint: disable=broad-except
-            self._log_exception('on_message_json', exception, msg)
+            self._log_exception('on_message_' + plan.message_type, exception, msg, plan)
 
-    def _process_json_dict(self, msg, fields, fields_ignore_default, data_flattened):
-        # pylint: disable= too-many-locals
-        msg_id_field = self.topic_manager.get_msg_id_field(msg.topic)
-        fields_ignoring_msg_id = self.topic_manager.get_fields_ignoring_msg_id(msg.topic)
-        unit_system = self.topic_manager.get_unit_system(msg.topic)
-        filters = self.topic_manager.get_filters(msg.topic)
-        fields_conversion_func = self.topic_manager.get_conversion_func(msg.topic)
+    def _on_batch(self, msg, plan, data):
+        # Each element of the array is a record, the records are queued together
+        records = []
+        for element in data:
+            data_final = self._process_json_dict(msg, plan, self._flatten_payload(plan, element))
+            if data_final:
+                records.append(data_final)
 
-        data_final = {}
-        msg_id = ''
-        if msg_id_field:
-            msg_id = data_flattened[msg_id_field]
+        if records:
+            self.topic_manager.append_batch(msg.topic, records)
 
+    @staticmethod
+    def _is_filtered(plan, lookup_key, value):
+        if plan.text_values:
+            # Compared with the filter values as the field's type
+            value = plan.converters.get(lookup_key, plan.default_converter)(value)
+        try:
+            return value in plan.filter_sets[lookup_key]
+        except TypeError:
+            # An unhashable value
+            return value in plan.filters[lookup_key]
+
+    def _log_filtered(self, msg, plan, lookup_key):
+        self.logger.info(42002, MessageCallbackProvider.msgX[42002],
+                         topic=msg.topic, payload=msg.payload, lookup_key=lookup_key, filter=plan.filters[lookup_key])
+
+    def _process_msg_id_dict(self, msg, plan, data_flattened):
+        # _process_json_dict with the plan's routes of the msg_id's keys
+        msg_id_suffix = "_" + str(data_flattened[plan.msg_id_field])
+        (routes, filter_keys) = plan.get_msg_id_routes(msg_id_suffix)
+
+        # Filtered messages are discarded before any field is processed
+        for key, lookup_key in filter_keys:
+            if key in data_flattened and self._is_filtered(plan, lookup_key, data_flattened[key]):
+                self._log_filtered(msg, plan, lookup_key)
+                return None
+
+        trace = self.logger.is_enabled('TRACE', 40002)
+        data_final = {}
         for key, value in data_flattened.items():
-            if msg_id_field and key not in fields_ignoring_msg_id:
-                lookup_key = key + "_" + str(msg_id)  # todo - cleanup
-            else:
-                lookup_key = key
-            if lookup_key in filters and value in filters[lookup_key]:
-                self.logger.info(42002, MessageCallbackProvider.msgX[42002].format(topic=msg.topic,
-                                                                                   payload=msg.payload,
-                                                                                   lookup_key=lookup_key,
-                                                                                   filter=filters[lookup_key]))
+            route = routes.get(key)
+            if route is None:
+                route = plan.add_msg_id_route(routes, msg_id_suffix, key)
+            (lookup_key, ignored) = route
+            if not ignored:
+                (fieldname, value) = self._update_field(plan, lookup_key, value)
+                data_final[fieldname] = value
+            elif trace:
+                self.logger.trace(40002, MessageCallbackProvider.msgX[40002], lookup_key=lookup_key or key + msg_id_suffix)
+
+        return data_final
+
+    def _is_duplicate_record(self, msg, plan, data):
+        duplicate_filter = plan.duplicate_filter
+        value = data.get(duplicate_filter.key)
+        if value is None:
+            return False
+        # The devices sharing a msg_id_field topic can publish the same value
+        key = (msg.topic, data.get(plan.msg_id_field), value) if plan.msg_id_field else (msg.topic, value)
+        if duplicate_filter.is_duplicate(key):
+            self.logger.debug(41002, MessageCallbackProvider.msgX[41002],
+                              topic=msg.topic, payload=msg.payload, duplicate_key=duplicate_filter.key)
+            return True
+        return False
+
+    def _process_json_dict(self, msg, plan, data_flattened):
+        if plan.duplicate_filter is not None and plan.duplicate_filter.key != 'payload' and \
+           self._is_duplicate_record(msg, plan, data_flattened):
+            return None
+
+        if plan.msg_id_field:
+            return self._process_msg_id_dict(msg, plan, data_flattened)
+
+        # Filtered messages are discarded before any field is processed
+        for lookup_key in plan.filter_sets:
+            if lookup_key in data_flattened and self._is_filtered(plan, lookup_key, data_flattened[lookup_key]):
+                self._log_filtered(msg, plan, lookup_key)
                 return None
-            if not fields.get(lookup_key, {}).get('ignore', fields_ignore_default):
-                (fieldname, value) = self._update_data(lookup_key, value, fields, fields_conversion_func, unit_system)
+
+        field_ignore = plan.field_ignore
+        data_final = {}
+        for lookup_key, value in data_flattened.items():
+            if not field_ignore.get(lookup_key, plan.ignore_default):
+                (fieldname, value) = self._update_field(plan, lookup_key, value)
                 data_final[fieldname] = value
             else:
-                self.logger.trace(40002, MessageCallbackProvider.msgX[40002].format(lookup_key=lookup_key))
+                self.logger.trace(40002, MessageCallbackProvider.msgX[40002], lookup_key=lookup_key)
 
         return data_final
 
-    def _on_message_individual(self, msg):
-
+    def _on_message_individual(self, msg, plan):
         # Wrap all the processing in a try, so it doesn't crash and burn on any error
         try:
             self._log_message(msg)
-            fields = self.topic_manager.get_fields(msg.topic)
-            fields_ignore_default = self.topic_manager.get_ignore_value(msg.topic)
-            fields_conversion_func = self.topic_manager.get_conversion_func(msg.topic)
-            topic_tail_is_fieldname = self.topic_manager.get_topic_tail_is_fieldname(msg.topic)
-
-            payload_str = msg.payload
 
             key = msg.topic
-            if topic_tail_is_fieldname:
+            if plan.topic_tail_is_fieldname:
                 key = key.rpartition('/')[2]
 
-            if msg.payload is not None:
-                payload_str = msg.payload.decode('utf-8')
-
-            unit_system = self.topic_manager.get_unit_system(msg.topic)
-            if not fields.get(key, {}).get('ignore', fields_ignore_default):
-                (fieldname, value) = self._update_data(key, payload_str, fields, fields_conversion_func, unit_system)
+            if not plan.field_ignore.get(key, plan.ignore_default):
+                # Only decoded when the field is used
+                payload_str = msg.payload
+                if payload_str is not None:
+                    payload_str = payload_str.decode('utf-8')
+                (fieldname, value) = self._update_field(plan, key, payload_str)
                 data = {}
                 data[fieldname] = value
                 self.topic_manager.append_data(msg.topic, data, fieldname)
             else:
-                self.logger.trace(40003, MessageCallbackProvider.msgX[40003].format(key=key))
+                self.logger.trace(40003, MessageCallbackProvider.msgX[40003], key=key)
 
         except Exception as exception:  # (want to catch all) pylint: disable=broad-except
-            self._log_exception('on_message_individual', exception, msg)
+            self._log_exception('on_message_individual', exception, msg, plan)
 
     def on_message_multi(self, msg):
         ''' The on message call back.'''
+        plan = None
         # Wrap all the processing in a try, so it doesn't crash and burn on any error
         try:
-            message_dict = self.topic_manager.get_message_dict(msg.topic)
-            message_type = message_dict['type']
-            # ToDo: eliminate if/elif?
-            if message_type == 'individual':
-                self._on_message_individual(msg)
-            elif message_type == 'json':
-                self._on_message_json(msg)
-            elif message_type == 'keyword':
-                self._on_message_keyword(msg)
+            plan = self.topic_manager.get_plan(msg.topic)
+            handler = self.handlers.get(plan.message_type)
+            if handler is None:
+                self.logger.error(44010, MessageCallbackProvider.msgX[44010],
+                                  message_type=plan.message_type, topic=msg.topic, payload=msg.payload)
+                return
+            circuit_breaker = plan.circuit_breaker
+            if circuit_breaker is not None and not circuit_breaker.allow():
+                return
+            if plan.duplicate_filter is not None and plan.duplicate_filter.key == 'payload' and \
+               plan.duplicate_filter.is_duplicate(hash((msg.topic, msg.payload))):
+                self.logger.debug(41002, MessageCallbackProvider.msgX[41002],
+                                  topic=msg.topic, payload=msg.payload, duplicate_key='payload')
+                return
+            if plan.decompressor is not None:
+                # The handlers decode the decompressed payload
+                msg.payload = plan.decompressor.decompress(msg.payload)
+            if circuit_breaker is None:
+                handler(msg, plan)
             else:
-                self.logger.error(44010, MessageCallbackProvider.msgX[44010].format(message_type=message_type,
-                                                                                    topic=msg.topic,
-                                                                                    payload=msg.payload))
+                # The handlers log their exceptions, which counts them as failed
+                failed = circuit_breaker.failed
+                handler(msg, plan)
+                if circuit_breaker.failed == failed:
+                    circuit_breaker.success()
         except Exception as exception:  # (want to catch all) pylint: disable=broad-except
-            self._log_exception('on_message_multi', exception, msg)
+            self._log_exception('on_message_multi', exception, msg, plan)
 
 class ManageWeewxConfig():
     ''' Manage the WeeWX configuration. '''
@@ -2002,6 +3608,9 @@ class ManageWeewxConfig():
         119003: "Invalid unit_system {unit_system} for {unit}.",
     }
 
+    # Changed when the unit configuration is updated, so that the unit conversions are resolved again.
+    unit_config_version = 0
+
     @staticmethod
     def _add_unit_group(unit_config, unit):
         group = unit_config.get('group')
@@ -2047,6 +3656,7 @@ class ManageWeewxConfig():
         ''' Update the unit sections of the WeeWX configuration.'''
         units = weewx_config.get('units')
         if units:
+            ManageWeewxConfig.unit_config_version += 1
             for unit in units.sections:
                 unit_config = units.get(unit)
 
@@ -2060,9 +3670,215 @@ class ManageWeewxConfig():
         ''' Add the observations to WeeWX's unit dictionart. '''
         observations = weewx_config.get('observations')
         if observations:
+            ManageWeewxConfig.unit_config_version += 1
             for observation in observations.keys():
                 weewx.units.obs_group_dict.extend({observation: observations[observation]})
 
+class FlightRecorder():
+    """ Keep the last messages received in a fixed size ring buffer, so that they can be written to a file after a problem. """
+    msgX = {
+        # trace message
+        # debug messages
+        # informational messages
+        132001: "Flight recorder is keeping the last {size} messages received.",
+        132002: "Flight recorder wrote {count} messages to {filename}.",
+        # error messages
+        134001: "Flight recorder failed writing to {filename}, '{exception}'.",
+        134002: "Flight recorder is unable to use {signal_name}, '{exception}'.",
+        # exception messages
+        139001: "'{signal_name}' is not a valid signal.",
+    }
+
+    def __init__(self, config, logger):
+        self.logger = logger
+        self.size = to_int(config.get('size', 100))
+        self.filename = config.get('filename', '/var/tmp/MQTTSubscribe_flight_recorder.jsonl')
+        self.dump_on_exception = to_bool(config.get('dump_on_exception', True))
+        self.dump_interval = to_int(config.get('dump_interval', 300))
+        self.next_dump = 0
+
+        # Preallocated, so that recording a message is only a few assignments.
+        self.index = 0
+        self.count = 0
+        self.topics = [None] * self.size
+        self.received = [0.0] * self.size
+        self.qos = [0] * self.size
+        self.payloads = [None] * self.size
+
+        signal_name = config.get('signal', None)
+        if signal_name and signal_name != 'None':
+            signal_number = getattr(signal, signal_name, None)
+            if not isinstance(signal_number, signal.Signals):
+                raise ValueError(FlightRecorder.msgX[139001].format(signal_name=signal_name))
+            try:
+                signal.signal(signal_number, self._on_signal)
+            except ValueError as exception:
+                # Signal handlers can only be set in the main thread
+                self.logger.error(134002, FlightRecorder.msgX[134002], signal_name=signal_name, exception=exception)
+
+        self.logger.info(132001, FlightRecorder.msgX[132001], size=self.size)
+
+    def get_callback(self, callback):
+        """ Get a callback that records the message and then calls 'callback'. """
+        record = self.record
+
+        def on_message(msg):
+            record(msg)
+            callback(msg)
+
+        return on_message
+
+    def record(self, msg):
+        """ Record a MQTT message. """
+        index = self.index
+        self.topics[index] = msg.topic
+        self.received[index] = time.time()
+        self.qos[index] = msg.qos
+        self.payloads[index] = msg.payload
+        self.index = (index + 1) % self.size
+        self.count += 1
+
+    def messages(self):
+        """ The recorded messages, oldest first, as (topic, received, qos, payload). """
+        if self.count < self.size:
+            indices = range(self.count)
+        else:
+            index = self.index
+            indices = list(range(index, self.size)) + list(range(index))
+        return [(self.topics[i], self.received[i], self.qos[i], self.payloads[i]) for i in indices]
+
+    def dump(self, filename=None):
+        """ Write the recorded messages to a file, one JSON object per line. """
+        if filename is None:
+            filename = self.filename
+        messages = self.messages()
+        try:
+            with open(filename, 'w', encoding='utf-8') as file_object:
+                for topic, received, qos, payload in messages:
+                    file_object.write(json.dumps(self.message_to_dict(topic, received, qos, payload)) + '\n')
+        except OSError as exception:
+            self.logger.error(134001, FlightRecorder.msgX[134001], filename=filename, exception=exception)
+            return 0
+
+        self.logger.info(132002, FlightRecorder.msgX[132002], count=len(messages), filename=filename)
+        return len(messages)
+
+    @staticmethod
+    def message_to_dict(topic, received, qos, payload):
+        """ The JSON object of a message, a payload that is not UTF-8 is base64 encoded. """
+        message = {'topic': topic, 'received': received, 'qos': qos}
+        try:
+            message['payload'] = payload.decode('utf-8')
+        except UnicodeDecodeError:
+            message['payload_base64'] = base64.b64encode(payload).decode('ascii')
+        return message
+
+    @staticmethod
+    def message_from_dict(message):
+        """ The topic and payload bytes of a message's JSON object. """
+        if 'payload_base64' in message:
+            return message['topic'], base64.b64decode(message['payload_base64'])
+        return message['topic'], message['payload'].encode('utf-8')
+
+    def on_exception(self, _msg):
+        """ Write the recorded messages, at most once every 'dump_interval' seconds. """
+        now = time.time()
+        if now < self.next_dump:
+            return
+        self.next_dump = now + self.dump_interval
+        self.dump()
+
+    def _on_signal(self, _signum, _frame):
+        self.dump()
+
+class MessageErrors():
+    """ Count the errors processing messages by topic and exception type, so that only the first of each is logged in a report interval.
+        And append the messages to a dead letter file. """
+    msgX = {
+        # trace message
+        # debug messages
+        # informational messages
+        142001: "Dead letter file {filename} reached {max_size} bytes, no more messages are written.",
+        # error messages
+        144001: "{count} more {exception_type} errors processing {topic} messages were not logged.",
+        144002: "Dead letter file {filename} could not be written, '{exception}'.",
+        # exception messages
+    }
+
+    def __init__(self, config, logger):
+        self.logger = logger
+        self.report_interval = to_int(config.get('report_interval', 300))
+        self.dead_letter_filename = config.get('dead_letter_filename', None)
+        if self.dead_letter_filename == 'None':
+            self.dead_letter_filename = None
+        self.max_dead_letter_size = to_int(config.get('max_dead_letter_size', 1048576))
+
+        self.dead_letter_size = 0
+        if self.dead_letter_filename:
+            try:
+                self.dead_letter_size = os.path.getsize(self.dead_letter_filename)
+            except OSError:
+                pass
+
+        # The number of errors not logged, by topic and exception type, in the report interval
+        self.errors = {}
+        self.next_report = time.time() + self.report_interval
+
+    def add(self, topic, exception):
+        """ Count the error, returns True when it is the first of its topic and exception type in the report interval. """
+        if self.report_interval <= 0:
+            return True
+
+        now = time.time()
+        if now >= self.next_report:
+            self.report(now)
+
+        key = (topic, type(exception).__name__)
+        count = self.errors.get(key)
+        if count is None:
+            self.errors[key] = 0
+            return True
+        self.errors[key] = count + 1
+        return False
+
+    def report(self, now=None):
+        """ Log the number of errors that were not logged, and start a new report interval. """
+        # Swapped out before it is walked, report_due runs on a different thread than the one adding the errors.
+        errors, self.errors = self.errors, {}
+        self.next_report = (now or time.time()) + self.report_interval
+        for (topic, exception_type), count in errors.items():
+            if count:
+                self.logger.error(144001, MessageErrors.msgX[144001], count=count, exception_type=exception_type, topic=topic)
+
+    def report_due(self):
+        """ Log the number of errors that were not logged, when the report interval has passed.
+            Called periodically, so that they are logged even when no more errors occur. """
+        now = time.time()
+        if self.errors and now >= self.next_report:
+            self.report(now)
+
+    def write_dead_letter(self, msg, exception):
+        """ Append the message to the dead letter file, until it reaches its maximum size. """
+        if not self.dead_letter_filename or self.dead_letter_size >= self.max_dead_letter_size:
+            return
+
+        message = FlightRecorder.message_to_dict(msg.topic, time.time(), msg.qos, msg.payload)
+        message['exception'] = f"{type(exception).__name__}: {exception}"
+        line = (json.dumps(message) + '\n').encode('utf-8')
+        if self.dead_letter_size + len(line) > self.max_dead_letter_size:
+            self.dead_letter_size = self.max_dead_letter_size
+            self.logger.info(142001, MessageErrors.msgX[142001], filename=self.dead_letter_filename, max_size=self.max_dead_letter_size)
+            return
+
+        try:
+            with open(self.dead_letter_filename, 'ab') as file_object:
+                file_object.write(line)
+        except OSError as exception_:
+            self.logger.error(144002, MessageErrors.msgX[144002], filename=self.dead_letter_filename, exception=exception_)
+            self.dead_letter_filename = None
+            return
+        self.dead_letter_size += len(line)
+
 class MQTTSubscriber():
     """ Manage MQTT sunscriptions. """
     msgX = {
@@ -2180,6 +3996,13 @@ class MQTTSubscriber():
         self.cached_fields = None
         self.cached_fields = self.manager.cached_fields
 
+        self.flight_recorder = None
+        flight_recorder_config = service_dict.get('flight_recorder', {})
+        if to_bool(flight_recorder_config.get('enable', False)):
+            self.flight_recorder = FlightRecorder(flight_recorder_config, self.logger)
+
+        self.message_errors = MessageErrors(service_dict.get('message_errors', {}), self.logger)
+
         weewx_config = service_dict.get('weewx')
         if weewx_config:
             manage_weewx_config = ManageWeewxConfig()
@@ -2225,6 +4048,12 @@ class MQTTSubscriber():
                                                                     self.logger,
                                                                     self.manager)
         self.callback = message_callback_provider.get_callback()
+        if hasattr(message_callback_provider, 'message_errors'):
+            message_callback_provider.message_errors = self.message_errors
+        if self.flight_recorder:
+            self.callback = self.flight_recorder.get_callback(self.callback)
+            if self.flight_recorder.dump_on_exception and hasattr(message_callback_provider, 'exception_callback'):
+                message_callback_provider.exception_callback = self.flight_recorder.on_exception
 
         self.set_callbacks(mqtt_options)
 
@@ -2351,6 +4180,14 @@ class MQTTSubscriber():
     def disconnect(self):
         """ shut it down """
         self.client.disconnect()
+        self.manager.log_compression_statistics()
+        self.manager.log_duplicate_statistics()
+        self.manager.log_circuit_breaker_statistics()
+        self.message_errors.report()
+
+    def report_due(self):
+        """ Log the summaries whose report interval has passed. """
+        self.message_errors.report_due()
 
     def _subscribe(self, client):
         for topic, info in self.manager.subscribed_topics.items():
@@ -2596,7 +4433,10 @@ class MQTTSubscribeService(StdService):
         logging_level = service_dict.get('logging_level', 'NOTSET')
         console = to_bool(service_dict.get('console', False))
 
-        self.logger = Logger({'mode': 'Service', 'throttle': service_dict.get('logging', {}).get('throttle', {})},
+        self.logger = Logger({'mode': 'Service',
+                              'throttle': service_dict.get('logging', {}).get('throttle', {}),
+                              'queue': service_dict.get('logging', {}).get('queue', {}),
+                              'sample': service_dict.get('logging', {}).get('sample', {})},
                              level=logging_level,
                              filename=logging_filename,
                              console=console)
@@ -2621,7 +4461,7 @@ class MQTTSubscribeService(StdService):
 
         self.subscriber = MQTTSubscriber.get_subscriber(service_dict, self.logger)
 
-        self.logger.info(22003, MQTTSubscribeService.msgX[22003].format(binding=self.binding))
+        self.logger.info(22003, MQTTSubscribeService.msgX[22003], binding=self.binding)
 
         self.subscriber.start()
 
@@ -2640,57 +4480,69 @@ class MQTTSubscribeService(StdService):
         """Run when an engine shutdown is requested."""
         if self.subscriber:
             self.subscriber.disconnect()
+        self.logger.close()
 
     def new_loop_packet(self, event):
         """ Handle the new loop packet event. """
+        self.logger.report_due()
+        self.subscriber.report_due()
         # packet has traveled back in time
         if self.end_ts > event.packet['dateTime']:
-            self.logger.error(24001, MQTTSubscribeService.msgX[24001].format(dateTime=event.packet['dateTime'], end_ts=self.end_ts))
+            self.logger.error(24001, MQTTSubscribeService.msgX[24001], dateTime=event.packet['dateTime'], end_ts=self.end_ts)
         else:
             start_ts = self.end_ts
             self.end_ts = event.packet['dateTime']
 
             for queue in self.subscriber.queues:  # topics might not be cached.. therefore use subscribed?
-                self.logger.trace(20001,
-                                  MQTTSubscribeService.msgX[20001].format(dateTime=weeutil.weeutil.timestamp_to_string(event.packet['dateTime']),
-                                                                          packet=to_sorted_string(event.packet)))
+                if self.logger.is_enabled('TRACE', 20001):
+                    self.logger.trace(20001, MQTTSubscribeService.msgX[20001],
+                                      dateTime=weeutil.weeutil.timestamp_to_string(event.packet['dateTime']),
+                                      packet=to_sorted_string(event.packet))
                 target_data = self.subscriber.get_accumulated_data(queue,
                                                                    start_ts, self.end_ts, event.packet['usUnits'])
-                self.logger.trace(20002, MQTTSubscribeService.msgX[20002].format(queue_name=queue['name'], target_data=target_data))
+                self.logger.trace(20002, MQTTSubscribeService.msgX[20002], queue_name=queue['name'], target_data=target_data)
                 event.packet.update(target_data)
-                self.logger.trace(20003,
-                                  MQTTSubscribeService.msgX[20003].format(dateTime=weeutil.weeutil.timestamp_to_string(event.packet['dateTime']),
-                                                                          packet=to_sorted_string(event.packet)))
+                if self.logger.is_enabled('TRACE', 20003):
+                    self.logger.trace(20003, MQTTSubscribeService.msgX[20003],
+                                      dateTime=weeutil.weeutil.timestamp_to_string(event.packet['dateTime']),
+                                      packet=to_sorted_string(event.packet))
 
             if self.subscriber.cached_fields:
                 for field in self.subscriber.cached_fields:
                     if field in event.packet:
                         self.cache.invalidate_value(field, event.packet['dateTime'])
-            self.logger.debug(21001,
-                              MQTTSubscribeService.msgX[21001].format(dateTime=weeutil.weeutil.timestamp_to_string(event.packet['dateTime']),
-                                                                      packet=to_sorted_string(event.packet)))
+            if self.logger.is_enabled('DEBUG', 21001):
+                self.logger.debug(21001, MQTTSubscribeService.msgX[21001],
+                                  dateTime=weeutil.weeutil.timestamp_to_string(event.packet['dateTime']),
+                                  packet=to_sorted_string(event.packet))
 
     # this works for hardware generation, but software generation does not 'quality control'
     # the archive record, so this data is not 'QC' in this case.
     # If this is important, bind to the loop packet.
     def new_archive_record(self, event):
         """ Handle the new archive record event. """
-        self.logger.debug(21002, MQTTSubscribeService.msgX[21002].format(dateTime=weeutil.weeutil.timestamp_to_string(event.record['dateTime']),
-                                                                         record=to_sorted_string(event.record)))
+        self.logger.report_due()
+        self.subscriber.report_due()
+        if self.logger.is_enabled('DEBUG', 21002):
+            self.logger.debug(21002, MQTTSubscribeService.msgX[21002],
+                              dateTime=weeutil.weeutil.timestamp_to_string(event.record['dateTime']),
+                              record=to_sorted_string(event.record))
         if self.binding == 'archive':
             end_ts = event.record['dateTime']
             start_ts = end_ts - event.record['interval'] * 60
 
             for queue in self.subscriber.queues:
-                self.logger.trace(20004,
-                                  MQTTSubscribeService.msgX[20004].format(dateTime=weeutil.weeutil.timestamp_to_string(event.record['dateTime']),
-                                                                          record=to_sorted_string(event.record)))
+                if self.logger.is_enabled('TRACE', 20004):
+                    self.logger.trace(20004, MQTTSubscribeService.msgX[20004],
+                                      dateTime=weeutil.weeutil.timestamp_to_string(event.record['dateTime']),
+                                      record=to_sorted_string(event.record))
                 target_data = self.subscriber.get_accumulated_data(queue, start_ts, end_ts, event.record['usUnits'])
-                self.logger.trace(20005, MQTTSubscribeService.msgX[20005].format(queue_name=queue['name'], target_data=target_data))
+                self.logger.trace(20005, MQTTSubscribeService.msgX[20005], queue_name=queue['name'], target_data=target_data)
                 event.record.update(target_data)
-                self.logger.trace(20006,
-                                  MQTTSubscribeService.msgX[20006].format(dateTime=weeutil.weeutil.timestamp_to_string(event.record['dateTime']),
-                                                                          record=to_sorted_string(event.record)))
+                if self.logger.is_enabled('TRACE', 20006):
+                    self.logger.trace(20006, MQTTSubscribeService.msgX[20006],
+                                      dateTime=weeutil.weeutil.timestamp_to_string(event.record['dateTime']),
+                                      record=to_sorted_string(event.record))
 
         if self.subscriber.cached_fields:
             target_data = {}
@@ -2707,8 +4559,10 @@ class MQTTSubscribeService(StdService):
                                                               self.subscriber.cached_fields[field]['expires_after'])
             event.record.update(target_data)
 
-        self.logger.debug(21003, MQTTSubscribeService.msgX[21003].format(dateTime=weeutil.weeutil.timestamp_to_string(event.record['dateTime']),
-                                                                         record=to_sorted_string(event.record)))
+        if self.logger.is_enabled('DEBUG', 21003):
+            self.logger.debug(21003, MQTTSubscribeService.msgX[21003],
+                              dateTime=weeutil.weeutil.timestamp_to_string(event.record['dateTime']),
+                              record=to_sorted_string(event.record))
         self.next_archive_timestamp = int(event.record['dateTime'] + event.record['interval'] * 120)
 
     def end_archive_period(self, _event):
@@ -2757,11 +4611,16 @@ class MQTTSubscribeDriver(weewx.drivers.AbstractDevice):
         console = to_bool(stn_dict.get('console', False))
         logging_filename = stn_dict.get('logging_filename', None)
         logging_level = stn_dict.get('logging_level', 'NOTSET').upper()
-        self.logger = Logger({'mode': 'Driver'}, level=logging_level, filename=logging_filename, console=console)
+        self.logger = Logger({'mode': 'Driver',
+                              'queue': stn_dict.get('logging', {}).get('queue', {}),
+                              'sample': stn_dict.get('logging', {}).get('sample', {})},
+                             level=logging_level,
+                             filename=logging_filename,
+                             console=console)
         self.logger.log_environment(config_dict)
 
         self.max_loop_interval = to_int(stn_dict.get('max_loop_interval', 0))
-        self.logger.info(12001, MQTTSubscribeDriver.msgX[12001].format(max_loop_interval=self.max_loop_interval))
+        self.logger.info(12001, MQTTSubscribeDriver.msgX[12001], max_loop_interval=self.max_loop_interval)
         self.last_loop_packet_ts = 0
         self.start_loop_period_ts = 0
 
@@ -2779,7 +4638,7 @@ class MQTTSubscribeDriver(weewx.drivers.AbstractDevice):
 
         self.queue = next((q for q in self.subscriber.queues if q['name'] == self.archive_topic), None)
 
-        self.logger.info(12002, MQTTSubscribeDriver.msgX[12002].format(wait_before_retry=self.wait_before_retry))
+        self.logger.info(12002, MQTTSubscribeDriver.msgX[12002], wait_before_retry=self.wait_before_retry)
         self.subscriber.start()
 
     @property
@@ -2799,11 +4658,14 @@ class MQTTSubscribeDriver(weewx.drivers.AbstractDevice):
     def closePort(self):  # need to override parent - pylint: disable=invalid-name
         """ Called to perform any close/cleanup before termination. """
         self.subscriber.disconnect()
+        self.logger.close()
 
     def new_archive_record(self, event):
         """ Handle the new archive record event. """
-        self.logger.debug(11002, MQTTSubscribeDriver.msgX[11002].format(dateTime=weeutil.weeutil.timestamp_to_string(event.record['dateTime']),
-                                                                        record=to_sorted_string(event.record)))
+        if self.logger.is_enabled('DEBUG', 11002):
+            self.logger.debug(11002, MQTTSubscribeDriver.msgX[11002],
+                              dateTime=weeutil.weeutil.timestamp_to_string(event.record['dateTime']),
+                              record=to_sorted_string(event.record))
         self.next_archive_timestamp = int(event.record['dateTime'] + event.record['interval'] * 120)
 
     def end_archive_period(self, _event):
@@ -2814,6 +4676,8 @@ class MQTTSubscribeDriver(weewx.drivers.AbstractDevice):
     def genLoopPackets(self):  # need to override parent - pylint: disable=invalid-name
         """ Called to generate loop packets. """
         while True:
+            self.logger.report_due()
+            self.subscriber.report_due()
             packet_count = 0
             for data in self._process_queues():
                 packet_count += 1
@@ -2833,16 +4697,16 @@ class MQTTSubscribeDriver(weewx.drivers.AbstractDevice):
                 if data:
                     archive_start = weeutil.weeutil.startOfInterval(data['dateTime'], self._archive_interval)
                     if archive_start < self.prev_archive_start:
-                        self.logger.error(14001, MQTTSubscribeDriver.msgX[14001].format(archive_start=archive_start,
-                                                                                        prev_archive_start=self.prev_archive_start,
-                                                                                        data=to_sorted_string(data)))
+                        self.logger.error(14001, MQTTSubscribeDriver.msgX[14001],
+                                          archive_start=archive_start, prev_archive_start=self.prev_archive_start, data=to_sorted_string(data))
                     else:
                         self.last_loop_packet_ts = data['dateTime']
                         self.prev_archive_start = archive_start
-                        self.logger.debug(11003,
-                                          MQTTSubscribeDriver.msgX[11003].format(queue_name=queue['name'],
-                                                                                 dateTime=weeutil.weeutil.timestamp_to_string(data['dateTime']),
-                                                                                 data=to_sorted_string(data)))
+                        if self.logger.is_enabled('DEBUG', 11003):
+                            self.logger.debug(11003, MQTTSubscribeDriver.msgX[11003],
+                                              queue_name=queue['name'],
+                                              dateTime=weeutil.weeutil.timestamp_to_string(data['dateTime']),
+                                              data=to_sorted_string(data))
                         yield data
 
     def _handle_empty_queue(self):
@@ -2857,9 +4721,10 @@ class MQTTSubscribeDriver(weewx.drivers.AbstractDevice):
                     data['MQTTSubscribe'] = None  # WeeWX accumulator requires at least one observation
                     data['usUnits'] = 1
                     self.last_loop_packet_ts = data['dateTime']
-                    self.logger.trace(10002,
-                                      MQTTSubscribeDriver.msgX[10002].format(dateTime=weeutil.weeutil.timestamp_to_string(data['dateTime']),
-                                                                             data=to_sorted_string(data)))
+                    if self.logger.is_enabled('TRACE', 10002):
+                        self.logger.trace(10002, MQTTSubscribeDriver.msgX[10002],
+                                          dateTime=weeutil.weeutil.timestamp_to_string(data['dateTime']),
+                                          data=to_sorted_string(data))
                     return data
 
                 self.start_loop_period_ts = start_loop_period_ts
@@ -2875,9 +4740,11 @@ class MQTTSubscribeDriver(weewx.drivers.AbstractDevice):
 
         for data in self.subscriber.get_data(self.queue):
             if data:
-                self.logger.debug(11005, MQTTSubscribeDriver.msgX[11005].format(archive_topic=self.archive_topic,
-                                                                                dateTime=weeutil.weeutil.timestamp_to_string(data['dateTime']),
-                                                                                data=to_sorted_string(data)))
+                if self.logger.is_enabled('DEBUG', 11005):
+                    self.logger.debug(11005, MQTTSubscribeDriver.msgX[11005],
+                                      archive_topic=self.archive_topic,
+                                      dateTime=weeutil.weeutil.timestamp_to_string(data['dateTime']),
+                                      data=to_sorted_string(data))
                 if lastgood_ts is None or data['dateTime'] > lastgood_ts:
                     yield data
             else:
@@ -2915,7 +4782,8 @@ class MQTTSubscribeDriverConfEditor(weewx.drivers.AbstractConfEditor):  # pragma
                     settings['topics'][topic] = {}
                     settings['topics'][topic]['message'] = {}
                     print("Enter the MQTT paylod type: individual|json|keyword")
-                    settings['topics'][topic]['message']['type'] = self._prompt('type', 'json', ['individual', 'json', 'keyword'])
+                    settings['topics'][topic]['message']['type'] = self._prompt('type', 'json',
+                                                                                ['individual', 'json', 'keyword', 'msgpack', 'cbor', 'xml'])
                 else:
                     if len(settings['topics']) == 1:
                         topic = 'REPLACE_ME'
@@ -3035,6 +4903,8 @@ class MQTTSubscribeConfiguration():
             'clean_start': ['MQTTSubscribe'],
             'clientid': ['MQTTSubscribe'],
             'console': ['MQTTSubscribe'],
+            'flight_recorder': ['MQTTSubscribe'],
+            'message_errors': ['MQTTSubscribe'],
             'keepalive': ['MQTTSubscribe'],
             'protocol': ['MQTTSubscribe'],
             'logging': ['MQTTSubscribe'],
@@ -3061,6 +4931,7 @@ class MQTTSubscribeConfiguration():
             'qos': ['MQTTSubscribe', 'topics'],
             'single_queue': ['MQTTSubscribe', 'topics'],
             'subscribe': ['MQTTSubscribe', 'topics'],
+            'topic_cache_size': ['MQTTSubscribe', 'topics'],
             'topic_tail_is_fieldname': ['MQTTSubscribe', 'topics'],
             'use_server_datetime': ['MQTTSubscribe', 'topics'],
             'use_topic_as_fieldname': ['MQTTSubscribe', 'topics'],
@@ -3069,6 +4940,15 @@ class MQTTSubscribeConfiguration():
             'flatten_delimiter': ['MQTTSubscribe', 'topics', 'REPLACE_ME', 'message'],
             'keyword_delimiter': ['MQTTSubscribe', 'topics', 'REPLACE_ME', 'message'],
             'keyword_separator': ['MQTTSubscribe', 'topics', 'REPLACE_ME', 'message'],
+            'json_decoder': ['MQTTSubscribe', 'topics', 'REPLACE_ME', 'message'],
+            'batch': ['MQTTSubscribe', 'topics', 'REPLACE_ME', 'message'],
+            'compression': ['MQTTSubscribe', 'topics', 'REPLACE_ME', 'message'],
+            'max_decompressed_size': ['MQTTSubscribe', 'topics', 'REPLACE_ME', 'message'],
+            'duplicate_key': ['MQTTSubscribe', 'topics', 'REPLACE_ME', 'message'],
+            'duplicate_window': ['MQTTSubscribe', 'topics', 'REPLACE_ME', 'message'],
+            'max_duplicates': ['MQTTSubscribe', 'topics', 'REPLACE_ME', 'message'],
+            'circuit_breaker_failures': ['MQTTSubscribe', 'topics', 'REPLACE_ME', 'message'],
+            'circuit_breaker_interval': ['MQTTSubscribe', 'topics', 'REPLACE_ME', 'message'],
             'conversion_error_to_none': ['MQTTSubscribe', 'topics', 'REPLACE_ME', 'REPLACE_ME'],
             'conversion_func': ['MQTTSubscribe', 'topics', 'REPLACE_ME', 'REPLACE_ME'],
             'conversion_type': ['MQTTSubscribe', 'topics', 'REPLACE_ME', 'REPLACE_ME'],
@@ -3231,6 +5111,9 @@ class Parser():
     description = '''
 '''
 
+    # The size of the reads of the message file
+    chunk_size = 65536
+
     class Msg:
         ''' A MQTT message.'''
         # pylint: disable=too-few-public-methods
@@ -3247,11 +5130,12 @@ class Parser():
                             required=True,
                             help="The WeeWX configuration file. Typically weewx.conf.")
         parser.add_argument("--topic",
-                            required=True,
-                            help="The topic to 'publish' the '--message-file' message.")
+                            help="The topic to 'publish' the '--message-file' message. Required, unless '--jsonl' is specified.")
         parser.add_argument("--message-file",
                             required=True,
                             help="The file containing the MQTT message.")
+        parser.add_argument("--jsonl", action="store_true", dest="jsonl",
+                            help="The '--message-file' is a flight recorder or dead letter file, a JSON object per line.")
         parser.add_argument("--top-level", action="store_true", dest="top_level",
                             help="Use the complete input configuration as the MQTTSubscribeDriver/MQTTSubscribeService configuration section.")
         parser.add_argument("--console", action="store_true", dest="console",
@@ -3282,6 +5166,9 @@ class Parser():
     def __init__(self, parser, options):
         self.topic = options.topic
         self.message_file = options.message_file
+        self.jsonl = options.jsonl
+        if self.topic is None and not self.jsonl:
+            parser.error("the following arguments are required: --topic")
 
         config_path = os.path.abspath(options.conf)
         config_input_dict = configobj.ConfigObj(config_path, encoding='utf-8', file_error=True)
@@ -3296,9 +5183,9 @@ class Parser():
         if options.top_level:
             if len(config_input_dict.sections) > 1:
                 parser.error(f"When specifying '--top-level, only one top level section is allowed. Found {config_input_dict.sections}")
-                self.config_dict = weeutil.config.deep_copy(config_input_dict[config_input_dict.sections[0]])
-            else:
-                self.config_dict = weeutil.config.deep_copy(config_input_dict[self.section])
+            self.config_dict = weeutil.config.deep_copy(config_input_dict[config_input_dict.sections[0]])
+        else:
+            self.config_dict = weeutil.config.deep_copy(config_input_dict[self.section])
 
         topics_dict = self.config_dict.get('topics', None)
         if topics_dict is None:
@@ -3331,14 +5218,14 @@ class Parser():
 
     def parse_single(self):
         ''' Parse it'''
-        payload = ''
-        with open(self.message_file, encoding='UTF-8') as file_object:
-            message = file_object.readline()
-            while message:
-                payload += message
-                message = file_object.readline()
-
-        payload = payload.encode("utf-8")
+        chunks = []
+        with open(self.message_file, 'rb') as file_object:
+            chunk = file_object.read(Parser.chunk_size)
+            while chunk:
+                chunks.append(chunk)
+                chunk = file_object.read(Parser.chunk_size)
+
+        payload = b''.join(chunks)
         msg = self.Msg(self.topic, payload, 0, 0)
 
         self.message_callback_provider.on_message_multi(msg)
@@ -3350,11 +5237,9 @@ class Parser():
 
     def parse(self):
         ''' Parse it'''
-        payload = ''
-        with open(self.message_file, encoding='UTF-8') as file_object:
-            message = file_object.readline()
-            while message:
-                payload = message.encode("utf-8")
+        # Each line is a message, the file is read in binary so the lines are payloads as received from MQTT.
+        with open(self.message_file, 'rb', buffering=Parser.chunk_size) as file_object:
+            for payload in file_object:
                 msg = self.Msg(self.topic, payload, 0, 0)
 
                 self.message_callback_provider.on_message_multi(msg)
@@ -3364,7 +5249,23 @@ class Parser():
                 for data in data_queue:
                     print(data)
 
-                message = file_object.readline()
+    def parse_jsonl(self):
+        ''' Parse the messages of a flight recorder or dead letter file, the '--topic' replaces their topic. '''
+        with open(self.message_file, 'r', encoding='utf-8') as file_object:
+            for line in file_object:
+                if not line.strip():
+                    continue
+                (topic, payload) = FlightRecorder.message_from_dict(json.loads(line))
+                if self.topic:
+                    topic = self.topic
+                msg = self.Msg(topic, payload, 0, 0)
+
+                self.message_callback_provider.on_message_multi(msg)
+
+                queue = self.manager._get_queue(topic)  # pylint: disable=protected-access
+                data_queue = self.manager.get_data(queue)
+                for data in data_queue:
+                    print(data)
 
 class Simulator():
     """ Run the service or driver. """
@@ -3890,7 +5791,10 @@ if __name__ == '__main__':  # pragma: no cover
 
         if options.command == 'parse':
             parser = Parser(parser_subparser, options)
-            parser.parse()
+            if parser.jsonl:
+                parser.parse_jsonl()
+            else:
+                parser.parse()
         elif options.command == 'simulate':
             simulator = Simulator(simulator_subparser, options)
             simulator.init_configuration(simulator_subparser)
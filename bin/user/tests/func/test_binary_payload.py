@@ -0,0 +1,149 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+'''
+This is a set of 'function' tests.
+These test that msgpack and cbor payloads are processed like json payloads.
+'''
+
+import unittest
+
+import configobj
+import importlib
+import random
+import string
+import time
+
+from io import StringIO
+
+from user.MQTTSubscribe import Logger, MessageCallbackProvider, TopicManager
+
+def random_string(length=32):
+    return ''.join([random.choice(string.ascii_letters + string.digits) for n in range(length)])
+
+def import_codec(module_name):
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        return None
+
+msgpack = import_codec('msgpack')
+cbor2 = import_codec('cbor2')
+
+class Msg:
+    def __init__(self, topic, payload, qos, retain):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+
+class BinaryMessageTests:
+    message_type = None
+
+    @staticmethod
+    def encode(payload_dict):
+        raise NotImplementedError
+
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = Logger({'mode': 'FuncTest'}, level='ERROR', console=True)
+
+        cls.topic = random_string()
+        cls.config_str = '''
+[MQTTSubscribe]
+    [[topics]]
+        [[[%s]]]
+            [[[[message]]]]
+                type = %s
+            [[[[temps]]]]
+                [[[[[subfields]]]]]
+                    [[[[[[temp1]]]]]]
+                    [[[[[[temp2]]]]]]
+'''
+
+    def run_test(self, payload_dict, expected_data):
+        config = configobj.ConfigObj(StringIO(self.config_str % (self.topic, self.message_type)))
+
+        topic_manager = TopicManager(None, config['MQTTSubscribe']['topics'], self.logger)
+
+        message_callback = MessageCallbackProvider(None, self.logger, topic_manager)
+
+        msg = Msg(self.topic, self.encode(payload_dict), 0, 0)
+        message_callback.on_message_multi(msg)
+
+        queue = topic_manager._get_queue(self.topic)
+        data = queue['data'].popleft()['data']
+
+        self.assertDictEqual(data, expected_data)
+
+    def test_basic_message(self):
+        payload_dict = {
+            'dateTime': time.time(),
+            'usUnits': random.randint(1, 10),
+            'inTemp': round(random.uniform(10, 100), 2),
+            'outTemp': round(random.uniform(1, 100), 2),
+        }
+
+        self.run_test(payload_dict, payload_dict)
+
+    def test_nested_message(self):
+        payload_dict = {
+            'dateTime': time.time(),
+            'usUnits': random.randint(1, 10),
+            'outdoor': {
+                'temp': round(random.uniform(10, 100), 2),
+                'humidity': round(random.uniform(1, 100), 2),
+            },
+            'temps': [round(random.uniform(10, 100), 2), round(random.uniform(1, 100), 2)],
+        }
+
+        expected_data = {
+            'dateTime': payload_dict['dateTime'],
+            'usUnits': payload_dict['usUnits'],
+            'outdoor_temp': payload_dict['outdoor']['temp'],
+            'outdoor_humidity': payload_dict['outdoor']['humidity'],
+            'temp1': payload_dict['temps'][0],
+            'temp2': payload_dict['temps'][1],
+        }
+
+        self.run_test(payload_dict, expected_data)
+
+    def test_integer_keys(self):
+        payload_dict = {
+            'dateTime': time.time(),
+            'usUnits': random.randint(1, 10),
+            1: round(random.uniform(10, 100), 2),
+            'sensor': {
+                2: round(random.uniform(1, 100), 2),
+            },
+        }
+
+        expected_data = {
+            'dateTime': payload_dict['dateTime'],
+            'usUnits': payload_dict['usUnits'],
+            '1': payload_dict[1],
+            'sensor_2': payload_dict['sensor'][2],
+        }
+
+        self.run_test(payload_dict, expected_data)
+
+@unittest.skipIf(msgpack is None, "msgpack is not installed")
+class TestMsgpackMessage(BinaryMessageTests, unittest.TestCase):
+    message_type = 'msgpack'
+
+    @staticmethod
+    def encode(payload_dict):
+        return msgpack.packb(payload_dict)
+
+@unittest.skipIf(cbor2 is None, "cbor2 is not installed")
+class TestCBORMessage(BinaryMessageTests, unittest.TestCase):
+    message_type = 'cbor'
+
+    @staticmethod
+    def encode(payload_dict):
+        return cbor2.dumps(payload_dict)
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
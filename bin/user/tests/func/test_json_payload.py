@@ -11,6 +11,7 @@ These test that the MQTTSubscribe configuration is correct for the payload.
 import unittest
 
 import configobj
+import gzip
 import json
 import random
 import string
@@ -18,7 +19,7 @@ import time
 
 from io import StringIO
 
-from user.MQTTSubscribe import Logger, MessageCallbackProvider, TopicManager
+from user.MQTTSubscribe import JSONDecoder, Logger, MessageCallbackProvider, TopicManager
 
 def random_string(length=32):
     return ''.join([random.choice(string.ascii_letters + string.digits) for n in range(length)])
@@ -30,6 +31,16 @@ class Msg:
         self.qos = qos
         self.retain = retain
 
+def installed_json_decoders():
+    json_decoders = []
+    for json_decoder in JSONDecoder.decoders:
+        try:
+            JSONDecoder(json_decoder)
+            json_decoders.append(json_decoder)
+        except ValueError:
+            pass
+    return json_decoders
+
 class TestJSONMessage(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -42,24 +53,27 @@ class TestJSONMessage(unittest.TestCase):
         [[[%s]]]
             [[[[message]]]]
                 type = json
+                json_decoder = %s
 '''
 
     def run_test(self, payload_dict, expected_data):
-        config = configobj.ConfigObj(StringIO(self.config_str % self.topic))
+        for json_decoder in installed_json_decoders():
+            with self.subTest(json_decoder=json_decoder):
+                config = configobj.ConfigObj(StringIO(self.config_str % (self.topic, json_decoder)))
 
-        topic_manager = TopicManager(None, config['MQTTSubscribe']['topics'], self.logger)
+                topic_manager = TopicManager(None, config['MQTTSubscribe']['topics'], self.logger)
 
-        message_callback = MessageCallbackProvider(None, self.logger, topic_manager)
+                message_callback = MessageCallbackProvider(None, self.logger, topic_manager)
 
-        payload = json.dumps(payload_dict).encode("utf-8")
+                payload = json.dumps(payload_dict).encode("utf-8")
 
-        msg = Msg(self.topic, payload, 0, 0)
-        message_callback._on_message_json(msg)
+                msg = Msg(self.topic, payload, 0, 0)
+                message_callback.on_message_multi(msg)
 
-        queue = topic_manager._get_queue(self.topic)
-        data = queue['data'].popleft()['data']
+                queue = topic_manager._get_queue(self.topic)
+                data = queue['data'].popleft()['data']
 
-        self.assertDictEqual(data, expected_data)
+                self.assertDictEqual(data, expected_data)
 
     def test_basic_message(self):
         payload_dict = {
@@ -203,6 +217,436 @@ class TestJSONMessage(unittest.TestCase):
 
         self.run_test(payload_dict, expected_data)
 
+class TestOptInJSONMessage(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = Logger({'mode': 'FuncTest'}, level='ERROR', console=True)
+
+        cls.topic = random_string()
+        cls.config_str = '''
+[MQTTSubscribe]
+    [[topics]]
+        [[[%s]]]
+            ignore = True
+            [[[[message]]]]
+                type = json
+            [[[[dateTime]]]]
+                ignore = False
+            [[[[outdoor_temp]]]]
+                ignore = False
+            [[[[outdoor_wind_speed]]]]
+                name = windSpeed
+                ignore = False
+            [[[[status]]]]
+                filter_out_message_when = 0,
+            [[[[temps]]]]
+                [[[[[subfields]]]]]
+                    [[[[[[temp1]]]]]]
+                        ignore = False
+                    [[[[[[temp2]]]]]]
+'''
+
+    def run_test(self, payload_dict):
+        config = configobj.ConfigObj(StringIO(self.config_str % self.topic))
+
+        topic_manager = TopicManager(None, config['MQTTSubscribe']['topics'], self.logger)
+
+        message_callback = MessageCallbackProvider(None, self.logger, topic_manager)
+
+        msg = Msg(self.topic, json.dumps(payload_dict).encode("utf-8"), 0, 0)
+        message_callback.on_message_multi(msg)
+
+        queue = topic_manager._get_queue(self.topic)
+        return [item['data'] for item in queue['data']]
+
+    def test_opted_in_fields(self):
+        payload_dict = {
+            'dateTime': time.time(),
+            'status': 1,
+            'outdoor': {
+                'temp': round(random.uniform(1, 100), 2),
+                'humidity': round(random.uniform(1, 100), 2),
+                'wind': {
+                    'speed': round(random.uniform(1, 100), 2),
+                    'dir': round(random.uniform(1, 360), 2),
+                },
+            },
+            'indoor': {
+                'temp': round(random.uniform(1, 100), 2),
+            },
+            'temps': [round(random.uniform(1, 100), 2), round(random.uniform(1, 100), 2)],
+            'others': [round(random.uniform(1, 100), 2)],
+        }
+
+        expected_data = {
+            'dateTime': payload_dict['dateTime'],
+            'usUnits': 1,
+            'outdoor_temp': payload_dict['outdoor']['temp'],
+            'windSpeed': payload_dict['outdoor']['wind']['speed'],
+            'temp1': payload_dict['temps'][0],
+        }
+
+        self.assertEqual(self.run_test(payload_dict), [expected_data])
+
+    def test_filtered_field(self):
+        payload_dict = {
+            'dateTime': time.time(),
+            'status': 0,
+            'outdoor': {
+                'temp': round(random.uniform(1, 100), 2),
+            },
+        }
+
+        self.assertEqual(self.run_test(payload_dict), [])
+
+class TestMsgIdJSONMessage(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = Logger({'mode': 'FuncTest'}, level='ERROR', console=True)
+
+        cls.topic = random_string()
+        cls.config_str = '''
+[MQTTSubscribe]
+    [[topics]]
+        [[[%s]]]
+            ignore = True
+            msg_id_field = id
+            [[[[message]]]]
+                type = json
+            [[[[dateTime]]]]
+                ignore = False
+                ignore_msg_id_field = True
+            [[[[temperature_C_1]]]]
+                name = outTemp
+                ignore = False
+            [[[[temperature_C_2]]]]
+                name = inTemp
+                ignore = False
+            [[[[battery_ok_2]]]]
+                filter_out_message_when = 0,
+'''
+
+    def run_test(self, payload_dicts):
+        config = configobj.ConfigObj(StringIO(self.config_str % self.topic))
+
+        topic_manager = TopicManager(None, config['MQTTSubscribe']['topics'], self.logger)
+
+        message_callback = MessageCallbackProvider(None, self.logger, topic_manager)
+
+        for payload_dict in payload_dicts:
+            msg = Msg(self.topic, json.dumps(payload_dict).encode("utf-8"), 0, 0)
+            message_callback.on_message_multi(msg)
+
+        queue = topic_manager._get_queue(self.topic)
+        return [item['data'] for item in queue['data']]
+
+    def test_fields_are_routed_by_msg_id(self):
+        date_time = time.time()
+        payload_dicts = [
+            {'dateTime': date_time, 'id': 1, 'temperature_C': 20.5, 'battery_ok': 0},
+            {'dateTime': date_time, 'id': 2, 'temperature_C': 21.5, 'battery_ok': 1},
+            {'dateTime': date_time, 'id': 3, 'temperature_C': 22.5, 'battery_ok': 0},
+            {'dateTime': date_time, 'id': 4, 'temperature_C': 23.5, 'battery_ok': 0},
+            {'dateTime': date_time, 'id': 1, 'temperature_C': 24.5, 'battery_ok': 1},
+        ]
+
+        expected_data = [
+            {'dateTime': date_time, 'usUnits': 1, 'outTemp': 20.5},
+            {'dateTime': date_time, 'usUnits': 1, 'inTemp': 21.5},
+            {'dateTime': date_time, 'usUnits': 1},
+            {'dateTime': date_time, 'usUnits': 1},
+            {'dateTime': date_time, 'usUnits': 1, 'outTemp': 24.5},
+        ]
+
+        self.assertEqual(self.run_test(payload_dicts), expected_data)
+
+    def test_filtered_msg_id(self):
+        payload_dicts = [
+            {'dateTime': time.time(), 'id': 2, 'temperature_C': 21.5, 'battery_ok': 0},
+        ]
+
+        self.assertEqual(self.run_test(payload_dicts), [])
+
+class TestCompressedJSONMessage(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = Logger({'mode': 'FuncTest'}, level='ERROR', console=True)
+
+        cls.topic = random_string()
+        cls.config_str = '''
+[MQTTSubscribe]
+    [[topics]]
+        [[[%s]]]
+            [[[[message]]]]
+                type = json
+                compression = %s
+'''
+
+    def run_test(self, compression, payload):
+        config = configobj.ConfigObj(StringIO(self.config_str % (self.topic, compression)))
+
+        topic_manager = TopicManager(None, config['MQTTSubscribe']['topics'], self.logger)
+
+        message_callback = MessageCallbackProvider(None, self.logger, topic_manager)
+
+        message_callback.on_message_multi(Msg(self.topic, payload, 0, 0))
+
+        queue = topic_manager._get_queue(self.topic)
+        return queue['data'].popleft()['data']
+
+    def test_gzip_message(self):
+        payload_dict = {
+            'dateTime': time.time(),
+            'usUnits': random.randint(1, 10),
+            'inTemp': round(random.uniform(10, 100), 2),
+        }
+
+        data = self.run_test('gzip', gzip.compress(json.dumps(payload_dict).encode("utf-8")))
+
+        self.assertDictEqual(data, payload_dict)
+
+    def test_auto_message_not_compressed(self):
+        payload_dict = {
+            'dateTime': time.time(),
+            'usUnits': random.randint(1, 10),
+            'inTemp': round(random.uniform(10, 100), 2),
+        }
+
+        data = self.run_test('auto', json.dumps(payload_dict).encode("utf-8"))
+
+        self.assertDictEqual(data, payload_dict)
+
+class TestBatchJSONMessage(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = Logger({'mode': 'FuncTest'}, level='ERROR', console=True)
+
+        cls.topic = random_string()
+        cls.config_str = '''
+[MQTTSubscribe]
+    [[topics]]
+        [[[%s]]]
+            [[[[message]]]]
+                type = json
+                batch = True
+            [[[[status]]]]
+                filter_out_message_when = 0,
+'''
+
+    def run_test(self, payload):
+        config = configobj.ConfigObj(StringIO(self.config_str % self.topic))
+
+        topic_manager = TopicManager(None, config['MQTTSubscribe']['topics'], self.logger)
+
+        message_callback = MessageCallbackProvider(None, self.logger, topic_manager)
+
+        msg = Msg(self.topic, json.dumps(payload).encode("utf-8"), 0, 0)
+        message_callback.on_message_multi(msg)
+
+        queue = topic_manager._get_queue(self.topic)
+        return [item['data'] for item in queue['data']]
+
+    def test_records(self):
+        payload = [
+            {
+                'dateTime': time.time() + i,
+                'usUnits': 1,
+                'outdoor': {
+                    'temp': round(random.uniform(1, 100), 2),
+                },
+            }
+            for i in range(3)
+        ]
+
+        expected_data = [
+            {
+                'dateTime': record['dateTime'],
+                'usUnits': 1,
+                'outdoor_temp': record['outdoor']['temp'],
+            }
+            for record in payload
+        ]
+
+        self.assertEqual(self.run_test(payload), expected_data)
+
+    def test_filtered_record(self):
+        payload = [
+            {'dateTime': time.time(), 'usUnits': 1, 'status': 0},
+            {'dateTime': time.time() + 1, 'usUnits': 1, 'status': 1},
+        ]
+
+        self.assertEqual(self.run_test(payload), [dict(payload[1], status=1.0)])
+
+    def test_single_record(self):
+        payload = {'dateTime': time.time(), 'usUnits': 1, 'inTemp': round(random.uniform(1, 100), 2)}
+
+        self.assertEqual(self.run_test(payload), [payload])
+
+class TestDuplicateJSONMessage(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = Logger({'mode': 'FuncTest'}, level='ERROR', console=True)
+
+        cls.topic = random_string()
+        cls.config_str = '''
+[MQTTSubscribe]
+    [[topics]]
+        [[[%s]]]
+            [[[[message]]]]
+                type = json
+                batch = True
+                duplicate_key = %s
+'''
+
+    def run_test(self, duplicate_key, payloads):
+        config = configobj.ConfigObj(StringIO(self.config_str % (self.topic, duplicate_key)))
+
+        topic_manager = TopicManager(None, config['MQTTSubscribe']['topics'], self.logger)
+
+        message_callback = MessageCallbackProvider(None, self.logger, topic_manager)
+
+        for payload in payloads:
+            msg = Msg(self.topic, json.dumps(payload).encode("utf-8"), 1, 0)
+            message_callback.on_message_multi(msg)
+
+        queue = topic_manager._get_queue(self.topic)
+        return [item['data'] for item in queue['data']]
+
+    def create_records(self, count):
+        return [
+            {'dateTime': time.time() + i, 'usUnits': 1, 'inTemp': round(random.uniform(1, 100), 2)}
+            for i in range(count)
+        ]
+
+    def test_redelivered_payload(self):
+        payload = self.create_records(2)
+
+        self.assertEqual(self.run_test('payload', [payload, payload]), payload)
+
+    def test_redelivered_records(self):
+        records = self.create_records(3)
+
+        self.assertEqual(self.run_test('dateTime', [records[:2], records[1:]]), records)
+
+class TestDuplicateOptInJSONMessage(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = Logger({'mode': 'FuncTest'}, level='ERROR', console=True)
+
+        cls.topic = random_string()
+        cls.config_str = '''
+[MQTTSubscribe]
+    [[topics]]
+        [[[%s]]]
+            ignore = True
+            [[[[message]]]]
+                type = json
+                duplicate_key = meta_seq
+            [[[[dateTime]]]]
+                ignore = False
+            [[[[inTemp]]]]
+                ignore = False
+'''
+
+    def test_redelivered_message(self):
+        config = configobj.ConfigObj(StringIO(self.config_str % self.topic))
+        topic_manager = TopicManager(None, config['MQTTSubscribe']['topics'], self.logger)
+        message_callback = MessageCallbackProvider(None, self.logger, topic_manager)
+        payload_dict = {
+            'dateTime': time.time(),
+            'inTemp': round(random.uniform(1, 100), 2),
+            'outTemp': round(random.uniform(1, 100), 2),
+            'meta': {'seq': random.randint(1, 1000)},
+        }
+
+        for _ in range(3):
+            message_callback.on_message_multi(Msg(self.topic, json.dumps(payload_dict).encode("utf-8"), 1, 0))
+
+        queue = topic_manager._get_queue(self.topic)
+        self.assertEqual([item['data'] for item in queue['data']],
+                         [{'dateTime': payload_dict['dateTime'], 'inTemp': payload_dict['inTemp'], 'usUnits': 1}])
+
+class TestDuplicateMsgIdJSONMessage(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = Logger({'mode': 'FuncTest'}, level='ERROR', console=True)
+
+        cls.topic = random_string()
+        cls.config_str = '''
+[MQTTSubscribe]
+    [[topics]]
+        [[[%s]]]
+            ignore = True
+            msg_id_field = id
+            [[[[message]]]]
+                type = json
+                duplicate_key = dateTime
+            [[[[dateTime]]]]
+                ignore = False
+                ignore_msg_id_field = True
+            [[[[temperature_C_1]]]]
+                name = outTemp
+                ignore = False
+            [[[[temperature_C_2]]]]
+                name = inTemp
+                ignore = False
+'''
+
+    def test_msg_ids_with_the_same_timestamp(self):
+        config = configobj.ConfigObj(StringIO(self.config_str % self.topic))
+        topic_manager = TopicManager(None, config['MQTTSubscribe']['topics'], self.logger)
+        message_callback = MessageCallbackProvider(None, self.logger, topic_manager)
+        date_time = time.time()
+        payload_dicts = [
+            {'dateTime': date_time, 'id': 1, 'temperature_C': 20.5},
+            {'dateTime': date_time, 'id': 2, 'temperature_C': 21.5},
+            {'dateTime': date_time, 'id': 1, 'temperature_C': 20.5},
+        ]
+
+        for payload_dict in payload_dicts:
+            message_callback.on_message_multi(Msg(self.topic, json.dumps(payload_dict).encode("utf-8"), 1, 0))
+
+        queue = topic_manager._get_queue(self.topic)
+        self.assertEqual([item['data'] for item in queue['data']],
+                         [{'dateTime': date_time, 'usUnits': 1, 'outTemp': 20.5},
+                          {'dateTime': date_time, 'usUnits': 1, 'inTemp': 21.5}])
+
+class TestCircuitBreakerJSONMessage(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = Logger({'mode': 'FuncTest'}, level='ERROR', console=True)
+
+        cls.topic = random_string()
+        cls.config_str = '''
+[MQTTSubscribe]
+    [[topics]]
+        [[[%s]]]
+            [[[[message]]]]
+                type = json
+                circuit_breaker_failures = 2
+                circuit_breaker_interval = 60
+'''
+
+    def test_messages_dropped_until_probed(self):
+        config = configobj.ConfigObj(StringIO(self.config_str % self.topic))
+        topic_manager = TopicManager(None, config['MQTTSubscribe']['topics'], self.logger)
+        message_callback = MessageCallbackProvider(None, self.logger, topic_manager)
+        record = {'dateTime': time.time(), 'usUnits': 1, 'inTemp': round(random.uniform(1, 100), 2)}
+
+        # The publisher changed its payload format
+        for _ in range(2):
+            message_callback.on_message_multi(Msg(self.topic, b'inTemp=1.0', 0, 0))
+        message_callback.on_message_multi(Msg(self.topic, json.dumps(record).encode("utf-8"), 0, 0))
+
+        # As if the interval has passed
+        circuit_breaker = topic_manager.get_circuit_breaker(self.topic)
+        circuit_breaker.retry_time = 0
+        message_callback.on_message_multi(Msg(self.topic, json.dumps(record).encode("utf-8"), 0, 0))
+
+        queue = topic_manager._get_queue(self.topic)
+        self.assertEqual([item['data'] for item in queue['data']], [record])
+        self.assertEqual(circuit_breaker.dropped, 1)
+
 if __name__ == '__main__':
     # test_suite = unittest.TestSuite()
     # test_suite.addTest(TestConfigureFields('test_use_topic_as_fieldname'))
@@ -0,0 +1,120 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+'''
+This is a set of 'function' tests.
+These test that xml payloads are processed like json payloads.
+'''
+
+import unittest
+
+import configobj
+import random
+import string
+import time
+
+from io import StringIO
+
+from user.MQTTSubscribe import Logger, MessageCallbackProvider, TopicManager
+
+def random_string(length=32):
+    return ''.join([random.choice(string.ascii_letters + string.digits) for n in range(length)])
+
+class Msg:
+    def __init__(self, topic, payload, qos, retain):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+
+class TestXMLMessage(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = Logger({'mode': 'FuncTest'}, level='ERROR', console=True)
+
+        cls.topic = random_string()
+        cls.config_str = '''
+[MQTTSubscribe]
+    [[topics]]
+        [[[%s]]]
+            ignore = %s
+            [[[[message]]]]
+                type = xml
+            [[[[dateTime]]]]
+                ignore = False
+            [[[[outdoor_temp]]]]
+                name = outTemp
+                ignore = False
+            [[[[outdoor_wind_speed]]]]
+                name = windSpeed
+                ignore = False
+            [[[[status]]]]
+                filter_out_message_when = 0,
+'''
+
+    def run_test(self, payload, ignore):
+        config = configobj.ConfigObj(StringIO(self.config_str % (self.topic, ignore)))
+
+        topic_manager = TopicManager(None, config['MQTTSubscribe']['topics'], self.logger)
+
+        message_callback = MessageCallbackProvider(None, self.logger, topic_manager)
+
+        msg = Msg(self.topic, payload.encode('utf-8'), 0, 0)
+        message_callback.on_message_multi(msg)
+
+        queue = topic_manager._get_queue(self.topic)
+        return [item['data'] for item in queue['data']]
+
+    def create_payload(self, date_time, status):
+        return f'''<?xml version="1.0"?>
+<observations>
+    <dateTime>{date_time}</dateTime>
+    <status>{status}</status>
+    <outdoor>
+        <temp>{self.temp}</temp>
+        <humidity>{self.humidity}</humidity>
+        <wind>
+            <speed>{self.wind_speed}</speed>
+        </wind>
+    </outdoor>
+</observations>
+'''
+
+    def setUp(self):
+        self.temp = round(random.uniform(1, 100), 2)
+        self.humidity = round(random.uniform(1, 100), 2)
+        self.wind_speed = round(random.uniform(1, 100), 2)
+
+    def test_all_fields(self):
+        date_time = int(time.time())
+
+        expected_data = {
+            'dateTime': float(date_time),
+            'usUnits': 1,
+            'status': 1.0,
+            'outTemp': self.temp,
+            'outdoor_humidity': self.humidity,
+            'windSpeed': self.wind_speed,
+        }
+
+        self.assertEqual(self.run_test(self.create_payload(date_time, 1), False), [expected_data])
+
+    def test_opted_in_fields(self):
+        date_time = int(time.time())
+
+        expected_data = {
+            'dateTime': float(date_time),
+            'usUnits': 1,
+            'outTemp': self.temp,
+            'windSpeed': self.wind_speed,
+        }
+
+        self.assertEqual(self.run_test(self.create_payload(date_time, 1), True), [expected_data])
+
+    def test_filtered_message(self):
+        self.assertEqual(self.run_test(self.create_payload(int(time.time()), 0), True), [])
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
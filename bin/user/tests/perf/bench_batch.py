@@ -0,0 +1,58 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+'''
+Benchmark the per record cost of a batched json payload, compared to a message per record.
+
+Run with: PYTHONPATH=bin python bin/user/tests/perf/bench_batch.py
+'''
+
+import json
+import time
+
+from harness import Msg, setup, time_messages, print_result
+
+CONFIG_STR = '''
+[MQTTSubscribe]
+    [[topics]]
+        [[[weather/json]]]
+            [[[[message]]]]
+                type = json
+        [[[weather/batch]]]
+            [[[[message]]]]
+                type = json
+                batch = True
+'''
+
+def main():
+    ''' Run the benchmarks. '''
+    records = 100
+    number = 200
+    topic_manager, message_callback_provider = setup(CONFIG_STR)
+    on_message = message_callback_provider.get_callback()
+
+    now = time.time()
+    payload = [
+        {
+            'dateTime': now + i,
+            'usUnits': 1,
+            'inTemp': 71.3,
+            'outTemp': 45.2,
+            'outHumidity': 88.0,
+            'barometer': 30.01,
+            'windSpeed': 3.4,
+            'windDir': 270.0,
+        }
+        for i in range(records)
+    ]
+    messages = [Msg('weather/json', json.dumps(record).encode('utf-8')) for record in payload]
+    batch_msg = Msg('weather/batch', json.dumps(payload).encode('utf-8'))
+
+    print(f"{records} records, {number} iterations, best of 5")
+    print_result('message per record', time_messages(topic_manager, on_message, messages, number), 'record')
+    print_result('batch', time_messages(topic_manager, on_message, [batch_msg], number) / records, 'record')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+'''
+Benchmark the per message cost of a topic whose messages always fail, without and with a circuit breaker.
+
+Run with: PYTHONPATH=bin python bin/user/tests/perf/bench_circuit_breaker.py
+'''
+
+from harness import Msg, create_logger, setup, time_message, print_result
+
+from user.MQTTSubscribe import MessageErrors
+
+CONFIG_STR = '''
+[MQTTSubscribe]
+    [[topics]]
+        [[[weather/json]]]
+            [[[[message]]]]
+                type = json
+                circuit_breaker_failures = %s
+'''
+
+def bench(circuit_breaker_failures, msg, number):
+    ''' Time processing the message, with the errors counted. '''
+    topic_manager, message_callback_provider = setup(CONFIG_STR % circuit_breaker_failures, level='ERROR')
+    message_callback_provider.message_errors = MessageErrors({}, create_logger('ERROR'))
+    return time_message(topic_manager, message_callback_provider.get_callback(), msg, number)
+
+def main():
+    ''' Run the benchmarks. '''
+    number = 20000
+    # A publisher that changed its payload format
+    msg = Msg('weather/json', b'outTemp=45.2,outHumidity=88.0')
+
+    print(f"Failing json message, errors counted, {number} iterations, best of 5")
+    print_result('no circuit breaker', bench(0, msg, number))
+    print_result('circuit breaker open', bench(5, msg, number))
+
+if __name__ == '__main__':
+    main()
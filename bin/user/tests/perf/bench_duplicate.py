@@ -0,0 +1,59 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+'''
+Benchmark the per message cost of suppressing a redelivered json payload, duplicate_key,
+compared to processing it again.
+
+Run with: PYTHONPATH=bin python bin/user/tests/perf/bench_duplicate.py
+'''
+
+import json
+import time
+
+from harness import Msg, setup, time_message, print_result
+
+CONFIG_STR = '''
+[MQTTSubscribe]
+    [[topics]]
+        [[[weather/json]]]
+            [[[[message]]]]
+                type = json
+        [[[weather/payload]]]
+            [[[[message]]]]
+                type = json
+                duplicate_key = payload
+        [[[weather/dateTime]]]
+            [[[[message]]]]
+                type = json
+                duplicate_key = dateTime
+'''
+
+def main():
+    ''' Run the benchmarks. '''
+    number = 20000
+    topic_manager, message_callback_provider = setup(CONFIG_STR)
+    on_message = message_callback_provider.get_callback()
+
+    payload = json.dumps({
+        'dateTime': time.time(),
+        'usUnits': 1,
+        'inTemp': 71.3,
+        'outTemp': 45.2,
+        'outHumidity': 88.0,
+        'barometer': 30.01,
+        'windSpeed': 3.4,
+        'windDir': 270.0,
+        'rain': 0.01,
+    }).encode('utf-8')
+
+    print(f"The same payload {number} times, best of 5")
+    for name, topic in (('processed again', 'weather/json'),
+                        ('duplicate payload', 'weather/payload'),
+                        ('duplicate dateTime', 'weather/dateTime')):
+        print_result(name, time_message(topic_manager, on_message, Msg(topic, payload, 1), number))
+
+if __name__ == '__main__':
+    main()
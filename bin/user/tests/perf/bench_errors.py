@@ -0,0 +1,40 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+'''
+Benchmark the per message cost of a malformed message, with every error logged and with the errors counted.
+
+Run with: PYTHONPATH=bin python bin/user/tests/perf/bench_errors.py
+'''
+
+from harness import Msg, create_logger, setup, time_message, print_result
+
+from user.MQTTSubscribe import MessageErrors
+
+CONFIG_STR = '''
+[MQTTSubscribe]
+    [[topics]]
+        [[[weather/json]]]
+            [[[[message]]]]
+                type = json
+'''
+
+def bench(report_interval, msg, number):
+    ''' Time processing the message. '''
+    topic_manager, message_callback_provider = setup(CONFIG_STR, level='ERROR')
+    message_callback_provider.message_errors = MessageErrors({'report_interval': report_interval}, create_logger('ERROR'))
+    return time_message(topic_manager, message_callback_provider.get_callback(), msg, number)
+
+def main():
+    ''' Run the benchmarks. '''
+    number = 5000
+    msg = Msg('weather/json', b'{"outTemp": 45.2, "dateTime": ')
+
+    print(f"Malformed json message, logging level ERROR, {number} iterations, best of 5")
+    print_result('every error logged', bench(0, msg, number))
+    print_result('errors counted', bench(300, msg, number))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+'''
+Benchmark the per message cost of a json payload that is filtered out, filter_out_message_when,
+compared to one that is not.
+
+Run with: PYTHONPATH=bin python bin/user/tests/perf/bench_filter.py
+'''
+
+import json
+import time
+
+from harness import Msg, setup, time_message, print_result
+
+CONFIG_STR = '''
+[MQTTSubscribe]
+    [[topics]]
+        [[[weather/json]]]
+            [[[[message]]]]
+                type = json
+            [[[[rain]]]]
+                contains_total = True
+            [[[[status]]]]
+                filter_out_message_when = 0, -999
+'''
+
+def create_message(status):
+    ''' A message with the status field. '''
+    payload = {
+        'dateTime': time.time(),
+        'usUnits': 1,
+        'inTemp': 71.3,
+        'outTemp': 45.2,
+        'outHumidity': 88.0,
+        'barometer': 30.01,
+        'windSpeed': 3.4,
+        'windDir': 270.0,
+        'rain': 10.01,
+        'status': status,
+    }
+    return Msg('weather/json', json.dumps(payload).encode('utf-8'))
+
+def main():
+    ''' Run the benchmarks. '''
+    number = 20000
+    topic_manager, message_callback_provider = setup(CONFIG_STR, level='WARNING')
+    on_message = message_callback_provider.get_callback()
+
+    print(f"{number} iterations, best of 5")
+    for name, msg in (('not filtered', create_message(1)), ('filtered', create_message(-999))):
+        print_result(name, time_message(topic_manager, on_message, msg, number))
+
+if __name__ == '__main__':
+    main()
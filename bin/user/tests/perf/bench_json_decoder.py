@@ -0,0 +1,65 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+'''
+Benchmark the installed JSON decoders over the payloads of the integration test fixtures.
+Each fixture file is also decoded whole, as a larger payload.
+
+Run with: PYTHONPATH=bin python bin/user/tests/perf/bench_json_decoder.py
+'''
+
+import glob
+import json
+import os
+
+from harness import best_of
+
+from user.MQTTSubscribe import JSONDecoder
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'integ', 'data')
+
+def get_payloads():
+    ''' Get the json payloads the integration tests send, by fixture. '''
+    payloads = {}
+    for filename in sorted(glob.glob(os.path.join(DATA_DIR, '*.json'))):
+        with open(filename, 'rb') as file_object:
+            document = file_object.read()
+        name = os.path.basename(filename)
+        payloads[name] = [document]
+        for testrun in json.loads(document).get('testruns', []):
+            for message in testrun['messages']:
+                for topic_info in message.values():
+                    if 'data' in topic_info:
+                        payloads[name].append(json.dumps(topic_info['data']).encode('utf-8'))
+    return payloads
+
+def bench_decoder(json_decoder, payloads, number):
+    ''' Time decoding each payload. '''
+    decode = json_decoder.decode
+
+    def run():
+        for payload in payloads:
+            decode(payload)
+
+    return best_of(run, number) / len(payloads)
+
+def main():
+    ''' Run the benchmarks. '''
+    number = 2000
+    json_decoders = []
+    for name in JSONDecoder.decoders:
+        try:
+            json_decoders.append(JSONDecoder(name))
+        except ValueError:
+            print(f"{name} is not installed")
+
+    print(f"{number} iterations, best of 5, us/payload")
+    print(f"{'fixture':32}" + ''.join(f"{json_decoder.name:>10}" for json_decoder in json_decoders))
+    for name, payloads in get_payloads().items():
+        results = [bench_decoder(json_decoder, payloads, number) for json_decoder in json_decoders]
+        print(f"{name:32}" + ''.join(f"{seconds * 1e6:10.2f}" for seconds in results))
+
+if __name__ == '__main__':
+    main()
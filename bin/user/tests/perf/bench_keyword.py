@@ -0,0 +1,48 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+'''
+Benchmark the throughput of keyword payloads, decoding only and the complete message processing.
+Half of the fields of each payload are ignored.
+
+Run with: PYTHONPATH=bin python bin/user/tests/perf/bench_keyword.py
+'''
+
+from harness import Msg, best_of, setup
+
+CONFIG_STR = '''
+[MQTTSubscribe]
+    [[topics]]
+        [[[weather/keyword]]]
+            [[[[message]]]]
+                type = keyword
+'''
+
+def main():
+    ''' Run the benchmarks. '''
+    number = 10000
+    print(f"{number} iterations, best of 5, messages/second")
+    print(f"{'fields':>8}{'decode':>12}{'message':>12}")
+    for field_count in (10, 50, 200):
+        # The odd numbered fields are ignored
+        config_str = CONFIG_STR + ''.join(f"            [[[[field{i}]]]]\n                ignore = True\n" for i in range(1, field_count, 2))
+        topic_manager, message_callback_provider = setup(config_str)
+        on_message = message_callback_provider.get_callback()
+        payload = ','.join(f"field{i}={i}.5" for i in range(field_count)).encode('utf-8')
+        msg = Msg('weather/keyword', payload)
+        keyword_decoder = topic_manager.get_plan(msg.topic).keyword_decoder
+        queue = topic_manager._get_queue(msg.topic)  # pylint: disable=protected-access
+
+        def decode():
+            keyword_decoder.decode(payload.decode('utf-8'), [])
+
+        def message():
+            on_message(msg)
+            queue['data'].clear()
+
+        print(f"{field_count:8}{1 / best_of(decode, number):12.0f}{1 / best_of(message, number):12.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+'''
+Benchmark the per message cost of logging when TRACE and DEBUG are not enabled.
+
+Run with: PYTHONPATH=bin python bin/user/tests/perf/bench_logging.py
+'''
+
+import json
+import time
+
+from harness import Msg, setup, time_message, print_result
+
+CONFIG_STR = '''
+[MQTTSubscribe]
+    [[topics]]
+        [[[weather/json]]]
+            [[[[message]]]]
+                type = json
+        [[[weather/keyword]]]
+            [[[[message]]]]
+                type = keyword
+        [[[weather/inTemp]]]
+            [[[[message]]]]
+                type = individual
+'''
+
+def main():
+    ''' Run the benchmarks. '''
+    number = 20000
+    topic_manager, message_callback_provider = setup(CONFIG_STR, level='INFO')
+    on_message = message_callback_provider.get_callback()
+
+    payload_dict = {
+        'dateTime': time.time(),
+        'usUnits': 1,
+        'inTemp': 71.3,
+        'outTemp': 45.2,
+        'outHumidity': 88.0,
+        'barometer': 30.01,
+        'windSpeed': 3.4,
+        'windDir': 270.0,
+        'rain': 0.01,
+    }
+    json_msg = Msg('weather/json', json.dumps(payload_dict).encode('utf-8'))
+    keyword_msg = Msg('weather/keyword', ','.join(f"{k}={v}" for k, v in payload_dict.items()).encode('utf-8'))
+    individual_msg = Msg('weather/inTemp', b'71.3')
+
+    print(f"Logging level INFO (TRACE and DEBUG disabled), {number} iterations, best of 5")
+    for name, msg in (('json message', json_msg), ('keyword message', keyword_msg), ('individual message', individual_msg)):
+        print_result(name, time_message(topic_manager, on_message, msg, number))
+
+if __name__ == '__main__':
+    main()
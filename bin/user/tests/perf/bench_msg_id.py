@@ -0,0 +1,67 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+'''
+Benchmark the per message cost of a json payload with a msg_id_field, the rtl_433 events topic,
+for the configured ids and for the ids of other devices.
+
+Run with: PYTHONPATH=bin python bin/user/tests/perf/bench_msg_id.py
+'''
+
+import json
+
+from harness import Msg, setup, time_message, time_messages, print_result
+
+CONFIG_STR = '''
+[MQTTSubscribe]
+    [[topics]]
+        unit_system = METRIC
+        [[[rtl_433/events]]]
+            ignore = True
+            msg_id_field = id
+            [[[[message]]]]
+                type = json
+            [[[[battery_ok]]]]
+                ignore_msg_id_field = True
+                filter_out_message_when = 0,
+            [[[[temperature_C_77]]]]
+                name = extraTemp4
+                ignore = False
+            [[[[temperature_C_16934]]]]
+                name = outTemp
+                ignore = False
+            [[[[humidity_16934]]]]
+                name = outHumidity
+                ignore = False
+'''
+
+def create_message(msg_id):
+    ''' An rtl_433 event of the device. '''
+    payload = {
+        'time': '2021-05-22 13:40:01',
+        'model': 'Acurite-00275rm',
+        'subtype': 2,
+        'id': msg_id,
+        'battery_ok': 1,
+        'temperature_C': 27.7,
+        'humidity': 55,
+        'temperature_1_C': 20.5,
+        'mic': 'CRC',
+    }
+    return Msg('rtl_433/events', json.dumps(payload).encode('utf-8'))
+
+def main():
+    ''' Run the benchmarks. '''
+    number = 20000
+    topic_manager, message_callback_provider = setup(CONFIG_STR)
+    on_message = message_callback_provider.get_callback()
+    unknown_msgs = [create_message(msg_id) for msg_id in range(100)]
+
+    print(f"{number} messages, best of 5")
+    print_result('configured id', time_message(topic_manager, on_message, create_message(16934), number))
+    print_result('other ids', time_messages(topic_manager, on_message, unknown_msgs, number // len(unknown_msgs)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+'''
+Benchmark converting timestamps to epoch with TimestampParser and with the previous strptime implementation.
+
+Run with: PYTHONPATH=bin python bin/user/tests/perf/bench_timestamp.py
+'''
+
+import datetime
+import re
+import time
+
+from harness import best_of
+
+from user.MQTTSubscribe import TimestampParser
+
+def strptime_to_epoch(datetime_input, datetime_format, offset_format=None):
+    ''' The conversion done by TopicManager before TimestampParser. '''
+    if offset_format:
+        offset_start = len(datetime_input) - len(offset_format)
+        offset = re.sub(r"\D", "", datetime_input[offset_start:])
+        sign = datetime_input[offset_start - 1:offset_start]
+        offset_delta = datetime.timedelta(hours=int(offset[:2]), minutes=int(offset[2:]))
+        if sign == '-':
+            offset_delta = -offset_delta
+        datetime_string = datetime_input[:offset_start - 1].strip()
+    else:
+        datetime_string = datetime_input
+        offset_delta = datetime.timedelta(hours=0, minutes=0)
+
+    return time.mktime((datetime.datetime.strptime(datetime_string, datetime_format) + offset_delta).timetuple())
+
+def bench(function, timestamps, number):
+    ''' Time converting a timestamp, cycling through the timestamps. '''
+    def run():
+        for timestamp in timestamps:
+            function(timestamp)
+
+    return best_of(run, number) / len(timestamps)
+
+def main():
+    ''' Run the benchmarks. '''
+    number = 200
+    now = int(time.time())
+    # Unique timestamps, so that every conversion is parsed.
+    unique = [datetime.datetime.fromtimestamp(now + i) for i in range(TimestampParser.memo_size * 4)]
+    # A device publishing several messages with the same second resolution timestamp, like rtl_433's "time".
+    repeated = [unique[i // 8] for i in range(len(unique))]
+
+    cases = [
+        ('%Y-%m-%d %H:%M:%S', None, unique, lambda value: value.strftime('%Y-%m-%d %H:%M:%S')),
+        ('%Y-%m-%d %H:%M:%S', 'hh:mm', unique, lambda value: value.strftime('%Y-%m-%d %H:%M:%S') + ' -04:00'),
+        ('%B %d %Y %H:%M:%S', None, unique, lambda value: value.strftime('%B %d %Y %H:%M:%S')),
+        ('%Y-%m-%d %H:%M:%S', None, repeated, lambda value: value.strftime('%Y-%m-%d %H:%M:%S')),
+    ]
+
+    print(f"{number} iterations, best of 5")
+    print(f"{'datetime_format':22} {'offset_format':14} {'timestamps':11} {'strptime':>12} {'parser':>12}")
+    for datetime_format, offset_format, values, to_string in cases:
+        timestamps = [to_string(value) for value in values]
+        before = bench(lambda timestamp, datetime_format=datetime_format, offset_format=offset_format:
+                       strptime_to_epoch(timestamp, datetime_format, offset_format), timestamps, number)
+        parser = TimestampParser(datetime_format, offset_format)
+        after = bench(parser.to_epoch, timestamps, number)
+        kind = 'repeated' if values is repeated else 'unique'
+        print(f"{datetime_format:22} {str(offset_format):14} {kind:11} {before * 1e6:9.2f} us {after * 1e6:9.2f} us")
+
+    timestamps = [value.isoformat() + '-04:00' for value in unique]
+    parser = TimestampParser('iso')
+    print(f"{'iso':22} {'None':14} {'unique':11} {'':>12} {bench(parser.to_epoch, timestamps, number) * 1e6:9.2f} us")
+
+if __name__ == '__main__':
+    main()
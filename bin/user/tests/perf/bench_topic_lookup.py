@@ -0,0 +1,60 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+'''
+Benchmark finding the subscription of a topic that has not been seen before,
+the trie in TopicManager compared to checking each subscription.
+
+Run with: PYTHONPATH=bin python bin/user/tests/perf/bench_topic_lookup.py
+'''
+
+import configobj
+import paho.mqtt.client as mqtt
+
+from harness import best_of, create_logger
+
+from user.MQTTSubscribe import TopicManager
+
+def linear_lookup(subscribed_topics, topic):
+    ''' The lookup before the trie. '''
+    for subscribed_topic in subscribed_topics:
+        if mqtt.topic_matches_sub(subscribed_topic, topic):
+            return subscribed_topic
+    return None
+
+def setup(count):
+    ''' Create a TopicManager with 'count' wildcard subscriptions. '''
+    config_dict = {}
+    for i in range(count):
+        if i % 2:
+            config_dict[f"rtl_433/{i}/devices/#"] = {}
+        else:
+            config_dict[f"weather/{i}/+/temperature"] = {}
+    return TopicManager(None, configobj.ConfigObj(config_dict), create_logger())
+
+def main():
+    ''' Run the benchmarks. '''
+    number = 2000
+    print(f"Lookup of a new topic, {number} iterations, best of 5")
+    print(f"{'subscriptions':>14} {'linear us':>10} {'trie us':>10}")
+    for count in (10, 100, 1000):
+        topic_manager = setup(count)
+        # The last subscription configured is the worst case for the linear scan.
+        topic = f"rtl_433/{count - 1}/devices/Acurite-Tower/1234/temperature_C"
+        assert linear_lookup(topic_manager.subscribed_topics, topic) == topic_manager._lookup_topic(topic)  # pylint: disable=protected-access
+
+        def trie():
+            topic_manager.topics.clear()
+            topic_manager._lookup_topic(topic)  # pylint: disable=protected-access
+
+        def linear():
+            linear_lookup(topic_manager.subscribed_topics, topic)
+
+        trie_time = best_of(trie, number)
+        linear_time = best_of(linear, number)
+        print(f"{count:>14} {linear_time * 1e6:10.2f} {trie_time * 1e6:10.2f}")
+
+if __name__ == '__main__':
+    main()
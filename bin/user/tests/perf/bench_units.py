@@ -0,0 +1,55 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+'''
+Benchmark the per message cost of converting the fields with units to the topic's unit system.
+
+Run with: PYTHONPATH=bin python bin/user/tests/perf/bench_units.py
+'''
+
+import json
+import time
+
+from harness import Msg, setup, time_message, print_result
+
+CONFIG_STR = '''
+[MQTTSubscribe]
+    [[topics]]
+        unit_system = US
+        [[[weather/json]]]
+            [[[[message]]]]
+                type = json
+            [[[[outTemp]]]]
+                units = degree_C
+            [[[[inTemp]]]]
+                units = degree_C
+            [[[[windSpeed]]]]
+                units = km_per_hour
+            [[[[barometer]]]]
+                units = mbar
+'''
+
+def main():
+    ''' Run the benchmark. '''
+    number = 20000
+    topic_manager, message_callback_provider = setup(CONFIG_STR)
+    on_message = message_callback_provider.get_callback()
+
+    payload_dict = {
+        'dateTime': time.time(),
+        'usUnits': 1,
+        'outTemp': 20.1,
+        'inTemp': 21.2,
+        'windSpeed': 3.4,
+        'barometer': 1013.2,
+        'outHumidity': 88.0,
+    }
+    msg = Msg('weather/json', json.dumps(payload_dict).encode('utf-8'))
+
+    print(f"json message with 4 fields with units, {number} iterations, best of 5")
+    print_result('json message', time_message(topic_manager, on_message, msg, number))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+'''
+Benchmark the per message cost of a large xml payload, with the example message callback provider
+and with the xml message type, for all of the fields and for a few opted in fields.
+
+Run with: PYTHONPATH=bin python bin/user/tests/perf/bench_xml.py
+'''
+
+from harness import Msg, setup, time_message, print_result
+
+from user.ExampleMessageCallbackProvider import MessageCallbackProvider as ExampleMessageCallbackProvider
+
+EXAMPLE_CONFIG_STR = '''
+[MQTTSubscribe]
+    [[topics]]
+        [[[gateway/example]]]
+'''
+
+CONFIG_STR = '''
+[MQTTSubscribe]
+    [[topics]]
+        [[[gateway/xml]]]
+            [[[[message]]]]
+                type = xml
+        [[[gateway/opted_in]]]
+            ignore = True
+            [[[[message]]]]
+                type = xml
+            [[[[sensor0_temperature]]]]
+                name = outTemp
+                ignore = False
+            [[[[sensor1_temperature]]]]
+                name = inTemp
+                ignore = False
+'''
+
+def create_payload(sensors):
+    ''' An xml document like the ones of the commercial weather gateways. '''
+    elements = ['<gateway>']
+    for i in range(sensors):
+        elements.append(f'<sensor{i} id="{i}">'
+                        f'<temperature>{20 + i / 10}</temperature><humidity>{50 + i % 40}</humidity>'
+                        f'<battery>{3.1}</battery><signal>{-70 - i % 20}</signal>'
+                        f'<wind><speed>{i % 15}</speed><direction>{i % 360}</direction></wind>'
+                        f'</sensor{i}>')
+    elements.append('</gateway>')
+    return ''.join(elements).encode('utf-8')
+
+def main():
+    ''' Run the benchmarks. '''
+    number = 200
+    sensors = 100
+    example_topic_manager, example_provider = setup(EXAMPLE_CONFIG_STR, provider_class=ExampleMessageCallbackProvider)
+    topic_manager, message_callback_provider = setup(CONFIG_STR)
+    on_message = message_callback_provider.get_callback()
+    payload = create_payload(sensors)
+
+    print(f"{len(payload)} byte payload, {sensors * 7} values, {number} iterations, best of 5")
+    for name, manager, callback, topic in (('example provider', example_topic_manager, example_provider.get_callback(), 'gateway/example'),
+                                           ('xml, all fields', topic_manager, on_message, 'gateway/xml'),
+                                           ('xml, 2 opted in fields', topic_manager, on_message, 'gateway/opted_in')):
+        print_result(name, time_message(manager, callback, Msg(topic, payload), number))
+
+if __name__ == '__main__':
+    main()
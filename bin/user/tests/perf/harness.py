@@ -0,0 +1,61 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+'''
+The code shared by the benchmarks, creating the objects under test and timing them.
+'''
+
+import timeit
+
+from io import StringIO
+
+import configobj
+
+from user.MQTTSubscribe import Logger, MessageCallbackProvider, TopicManager
+
+REPEAT = 5
+
+class Msg:
+    # pylint: disable=too-few-public-methods
+    def __init__(self, topic, payload, qos=0, retain=0):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+
+def create_logger(level='INFO'):
+    ''' A logger that does not write to the console. '''
+    return Logger({'mode': 'Benchmark'}, level=level)
+
+def setup(config_str, level='INFO', provider_class=MessageCallbackProvider):
+    ''' Create the topic manager and message callback provider of a [MQTTSubscribe] configuration. '''
+    logger = create_logger(level)
+    config = configobj.ConfigObj(StringIO(config_str))
+    topic_manager = TopicManager(None, config['MQTTSubscribe']['topics'], logger)
+    message_callback_provider = provider_class(None, logger, topic_manager)
+    return topic_manager, message_callback_provider
+
+def best_of(run, number):
+    ''' The seconds of the fastest call of run, best of REPEAT runs of 'number' calls. '''
+    return min(timeit.repeat(run, number=number, repeat=REPEAT)) / number
+
+def time_messages(topic_manager, on_message, messages, number):
+    ''' The seconds to process each of the messages, including draining the queue of their topic. '''
+    queue = topic_manager._get_queue(messages[0].topic)  # pylint: disable=protected-access
+
+    def run():
+        for msg in messages:
+            on_message(msg)
+        queue['data'].clear()
+
+    return best_of(run, number) / len(messages)
+
+def time_message(topic_manager, on_message, msg, number):
+    ''' The seconds to process the message, including draining the queue of its topic. '''
+    return time_messages(topic_manager, on_message, [msg], number)
+
+def print_result(name, seconds, unit='message'):
+    ''' Print the microseconds per unit. '''
+    print(f"{name:24} {seconds * 1e6:8.2f} us/{unit}")
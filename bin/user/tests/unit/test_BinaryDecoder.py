@@ -0,0 +1,83 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+
+# pylint: disable=wrong-import-order
+# pylint: disable=wrong-import-position
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+
+import unittest
+import mock
+
+import test_weewx_stubs
+from test_weewx_stubs import BaseTestClass, random_string
+# setup stubs before importing MQTTSubscribe
+test_weewx_stubs.setup_stubs()
+from user.MQTTSubscribe import BinaryDecoder
+
+class TestInit(BaseTestClass):
+    def test_codec_not_installed(self):
+        with mock.patch('user.MQTTSubscribe.importlib.import_module') as mock_import_module:
+            mock_import_module.side_effect = ImportError
+
+            with self.assertRaises(ValueError) as error:
+                BinaryDecoder('cbor')
+
+            self.assertEqual(error.exception.args[0], "cbor messages need one of the cbor2, cbor modules, none is installed.")
+
+    def test_cbor_falls_back_to_cbor_module(self):
+        mock_cbor = mock.Mock()
+
+        def import_module(name):
+            if name == 'cbor':
+                return mock_cbor
+            raise ImportError
+
+        with mock.patch('user.MQTTSubscribe.importlib.import_module') as mock_import_module:
+            mock_import_module.side_effect = import_module
+
+            SUT = BinaryDecoder('cbor')
+
+            self.assertEqual(SUT.name, 'cbor')
+
+class TestDecode(BaseTestClass):
+    def test_msgpack_decodes_strings(self):
+        mock_msgpack = mock.Mock()
+        payload = random_string().encode('utf-8')
+
+        with mock.patch('user.MQTTSubscribe.importlib.import_module') as mock_import_module:
+            mock_import_module.return_value = mock_msgpack
+
+            SUT = BinaryDecoder('msgpack')
+
+        self.assertEqual(SUT.decode(payload), mock_msgpack.unpackb.return_value)
+        mock_msgpack.unpackb.assert_called_once_with(payload, raw=False, strict_map_key=False)
+
+    def test_cbor_decodes(self):
+        mock_cbor2 = mock.Mock()
+        payload = random_string().encode('utf-8')
+
+        with mock.patch('user.MQTTSubscribe.importlib.import_module') as mock_import_module:
+            mock_import_module.return_value = mock_cbor2
+
+            SUT = BinaryDecoder('cbor')
+
+        self.assertEqual(SUT.decode(payload), mock_cbor2.loads.return_value)
+        mock_cbor2.loads.assert_called_once_with(payload)
+
+    def test_integer_keys_are_strings(self):
+        mock_cbor2 = mock.Mock()
+        mock_cbor2.loads.return_value = {1: 20.5, 'sensor': {2: 55, 'id': 7}, 'readings': [{3: 1.5}]}
+
+        with mock.patch('user.MQTTSubscribe.importlib.import_module') as mock_import_module:
+            mock_import_module.return_value = mock_cbor2
+
+            SUT = BinaryDecoder('cbor')
+
+        self.assertEqual(SUT.decode(b''), {'1': 20.5, 'sensor': {'2': 55, 'id': 7}, 'readings': [{'3': 1.5}]})
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
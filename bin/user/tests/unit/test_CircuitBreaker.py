@@ -0,0 +1,102 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+
+# pylint: disable=wrong-import-order
+# pylint: disable=wrong-import-position
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+
+import random
+import unittest
+import mock
+
+import test_weewx_stubs
+from test_weewx_stubs import BaseTestClass, random_string
+# setup stubs before importing MQTTSubscribe
+test_weewx_stubs.setup_stubs()
+from user.MQTTSubscribe import CircuitBreaker, Logger
+
+class TestCircuitBreaker(BaseTestClass):
+    def test_opens_after_consecutive_failures(self):
+        mock_logger = mock.Mock(spec=Logger)
+        topic = random_string()
+        failures = random.randint(2, 10)
+        interval = random.randint(60, 600)
+
+        with mock.patch('user.MQTTSubscribe.time') as mock_time:
+            mock_time.monotonic.return_value = 1000
+            SUT = CircuitBreaker(topic, failures, interval, mock_logger)
+            for _ in range(failures - 1):
+                SUT.failure()
+            self.assertTrue(SUT.allow())
+
+            SUT.failure()
+
+            self.assertFalse(SUT.allow())
+            self.assertFalse(SUT.allow())
+
+        self.assertEqual(SUT.state, CircuitBreaker.OPEN)
+        self.assertEqual(SUT.dropped, 2)
+        mock_logger.error.assert_called_once_with(174001, CircuitBreaker.msgX[174001], topic=topic, failures=failures, interval=interval)
+
+    def test_success_resets_failures(self):
+        mock_logger = mock.Mock(spec=Logger)
+
+        SUT = CircuitBreaker(random_string(), 2, 60, mock_logger)
+        SUT.failure()
+        SUT.success()
+        SUT.failure()
+
+        self.assertEqual(SUT.state, CircuitBreaker.CLOSED)
+        self.assertEqual(SUT.failed, 2)
+        mock_logger.error.assert_not_called()
+
+    def test_probe_succeeds(self):
+        mock_logger = mock.Mock(spec=Logger)
+        topic = random_string()
+        interval = random.randint(60, 600)
+
+        with mock.patch('user.MQTTSubscribe.time') as mock_time:
+            mock_time.monotonic.return_value = 1000
+            SUT = CircuitBreaker(topic, 1, interval, mock_logger)
+            SUT.failure()
+            SUT.allow()
+
+            mock_time.monotonic.return_value = 1000 + interval
+            self.assertTrue(SUT.allow())
+            self.assertEqual(SUT.state, CircuitBreaker.PROBING)
+            SUT.success()
+
+        self.assertEqual(SUT.state, CircuitBreaker.CLOSED)
+        self.assertEqual(SUT.failures, 0)
+        mock_logger.info.assert_has_calls([
+            mock.call(172002, CircuitBreaker.msgX[172002], topic=topic, interval=interval),
+            mock.call(172001, CircuitBreaker.msgX[172001], topic=topic, dropped=1),
+        ])
+
+    def test_probe_fails(self):
+        mock_logger = mock.Mock(spec=Logger)
+        topic = random_string()
+        interval = random.randint(60, 600)
+
+        with mock.patch('user.MQTTSubscribe.time') as mock_time:
+            mock_time.monotonic.return_value = 1000
+            SUT = CircuitBreaker(topic, 1, interval, mock_logger)
+            SUT.failure()
+
+            mock_time.monotonic.return_value = 1000 + interval
+            self.assertTrue(SUT.allow())
+            SUT.failure()
+
+            mock_time.monotonic.return_value = 1000 + interval * 2 - 1
+            self.assertFalse(SUT.allow())
+            mock_time.monotonic.return_value = 1000 + interval * 2
+            self.assertTrue(SUT.allow())
+
+        mock_logger.error.assert_called_with(174002, CircuitBreaker.msgX[174002], topic=topic, interval=interval)
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
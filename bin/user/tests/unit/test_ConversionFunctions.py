@@ -0,0 +1,75 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+
+# pylint: disable=wrong-import-order
+# pylint: disable=wrong-import-position
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+
+import random
+
+import unittest
+
+import test_weewx_stubs
+from test_weewx_stubs import BaseTestClass, random_string
+# setup stubs before importing MQTTSubscribe
+test_weewx_stubs.setup_stubs()
+from user.MQTTSubscribe import ConversionFunctions
+
+class TestGet(BaseTestClass):
+    def test_conversion_types(self):
+        for conversion_type, source in (('bool', 'lambda x: to_bool(x)'),
+                                        ('float', 'lambda x: to_float(x)'),
+                                        ('int', 'lambda x: to_int(x)'),
+                                        (random_string(), 'lambda x: x')):
+            with self.subTest(conversion_type=conversion_type):
+                conversion_func = ConversionFunctions.get(conversion_type)
+
+                self.assertEqual(conversion_func['source'], source)
+
+    def test_source_is_compiled_once(self):
+        value = random_string()
+        source = f"lambda x: x + '{value}'"
+
+        conversion_func = ConversionFunctions.get('float', source)
+
+        self.assertEqual(conversion_func['source'], source)
+        self.assertEqual(conversion_func['compiled']('a'), 'a' + value)
+        self.assertIs(ConversionFunctions.get(None, source)['compiled'], conversion_func['compiled'])
+
+class TestConvert(BaseTestClass):
+    def test_float(self):
+        convert = ConversionFunctions.get('float')['compiled']
+        value = round(random.uniform(1, 100), 2)
+
+        self.assertEqual(convert(str(value)), value)
+        self.assertIsNone(convert('None'))
+        self.assertIsNone(convert(None))
+        with self.assertRaises(ValueError):
+            convert(random_string())
+
+    def test_int(self):
+        convert = ConversionFunctions.get('int')['compiled']
+        value = random.randint(1, 100)
+
+        self.assertEqual(convert(str(value)), value)
+        self.assertIsNone(convert('None'))
+        self.assertIsNone(convert(''))
+
+    def test_bool(self):
+        convert = ConversionFunctions.get('bool')['compiled']
+
+        self.assertTrue(convert('true'))
+        self.assertFalse(convert('0'))
+
+    def test_no_conversion(self):
+        convert = ConversionFunctions.get('none')['compiled']
+        value = random_string()
+
+        self.assertIs(convert(value), value)
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
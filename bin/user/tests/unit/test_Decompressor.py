@@ -0,0 +1,109 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+
+# pylint: disable=wrong-import-order
+# pylint: disable=wrong-import-position
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+
+import unittest
+
+import gzip
+import zlib
+
+import test_weewx_stubs
+from test_weewx_stubs import BaseTestClass, random_string
+# setup stubs before importing MQTTSubscribe
+test_weewx_stubs.setup_stubs()
+from user.MQTTSubscribe import Decompressor
+
+class TestInit(BaseTestClass):
+    def test_invalid_compression(self):
+        compression = random_string()
+
+        with self.assertRaises(ValueError) as error:
+            Decompressor(compression)
+
+        self.assertEqual(error.exception.args[0], f"Invalid compression configured: {compression}")
+
+class TestDecompress(BaseTestClass):
+    def test_zlib(self):
+        payload = random_string().encode('utf-8')
+
+        SUT = Decompressor('zlib')
+
+        self.assertEqual(SUT.decompress(zlib.compress(payload)), payload)
+
+    def test_gzip(self):
+        payload = random_string().encode('utf-8')
+
+        SUT = Decompressor('gzip')
+
+        self.assertEqual(SUT.decompress(gzip.compress(payload)), payload)
+
+    def test_auto(self):
+        payload = random_string().encode('utf-8')
+
+        SUT = Decompressor('auto')
+
+        self.assertEqual(SUT.decompress(zlib.compress(payload)), payload)
+        self.assertEqual(SUT.decompress(gzip.compress(payload)), payload)
+        self.assertEqual(SUT.count, 2)
+
+    def test_auto_not_compressed(self):
+        SUT = Decompressor('auto')
+
+        for payload in [b'{"inTemp": 71.3}', b'80.5', b'']:
+            with self.subTest(payload=payload):
+                self.assertEqual(SUT.decompress(payload), payload)
+
+        self.assertEqual(SUT.count, 0)
+
+    def test_not_compressed(self):
+        SUT = Decompressor('zlib')
+
+        with self.assertRaises(ValueError) as error:
+            SUT.decompress(b'{"inTemp": 71.3}')
+
+        self.assertTrue(error.exception.args[0].startswith("Payload is not zlib compressed"))
+        self.assertEqual(SUT.errors, 1)
+
+    def test_truncated(self):
+        SUT = Decompressor('gzip')
+
+        with self.assertRaises(ValueError) as error:
+            SUT.decompress(gzip.compress(random_string(1000).encode('utf-8'))[:-20])
+
+        self.assertEqual(error.exception.args[0], "Payload is not gzip compressed, 'incomplete or truncated stream'.")
+
+    def test_too_large(self):
+        max_size = 1000
+
+        SUT = Decompressor('zlib', max_size)
+
+        SUT.decompress(zlib.compress(b'0' * max_size))
+        with self.assertRaises(ValueError) as error:
+            SUT.decompress(zlib.compress(b'0' * 100000000))
+
+        self.assertEqual(error.exception.args[0], f"Decompressed payload is larger than {max_size} bytes.")
+        self.assertEqual(SUT.count, 1)
+        self.assertEqual(SUT.errors, 1)
+
+    def test_counts(self):
+        payload = random_string(1000).encode('utf-8')
+        compressed_payload = zlib.compress(payload)
+
+        SUT = Decompressor('zlib')
+        SUT.decompress(compressed_payload)
+        SUT.decompress(compressed_payload)
+
+        self.assertEqual(SUT.count, 2)
+        self.assertEqual(SUT.compressed_bytes, 2 * len(compressed_payload))
+        self.assertEqual(SUT.decompressed_bytes, 2 * len(payload))
+        self.assertGreater(SUT.seconds, 0)
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
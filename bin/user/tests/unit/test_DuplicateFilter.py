@@ -0,0 +1,70 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+
+# pylint: disable=wrong-import-order
+# pylint: disable=wrong-import-position
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+
+import random
+import unittest
+import mock
+
+import test_weewx_stubs
+from test_weewx_stubs import BaseTestClass, random_string
+# setup stubs before importing MQTTSubscribe
+test_weewx_stubs.setup_stubs()
+from user.MQTTSubscribe import DuplicateFilter
+
+class TestIsDuplicate(BaseTestClass):
+    def test_duplicate_within_window(self):
+        key = random_string()
+
+        with mock.patch('user.MQTTSubscribe.time') as mock_time:
+            mock_time.monotonic.return_value = 1000
+            SUT = DuplicateFilter('payload', 60)
+
+            self.assertFalse(SUT.is_duplicate(key))
+            mock_time.monotonic.return_value = 1059
+            self.assertTrue(SUT.is_duplicate(key))
+            self.assertFalse(SUT.is_duplicate(random_string()))
+
+        self.assertEqual(SUT.count, 3)
+        self.assertEqual(SUT.suppressed, 1)
+
+    def test_forgotten_after_window(self):
+        key = random_string()
+
+        with mock.patch('user.MQTTSubscribe.time') as mock_time:
+            mock_time.monotonic.return_value = 1000
+            SUT = DuplicateFilter('payload', 60)
+
+            self.assertFalse(SUT.is_duplicate(key))
+            mock_time.monotonic.return_value = 1060
+            self.assertFalse(SUT.is_duplicate(key))
+
+        self.assertEqual(SUT.suppressed, 0)
+        self.assertEqual(len(SUT.received), 1)
+
+    def test_oldest_forgotten_when_full(self):
+        size = random.randint(2, 10)
+        keys = [random_string() for _ in range(size + 1)]
+
+        SUT = DuplicateFilter('payload', 60, size)
+        for key in keys:
+            SUT.is_duplicate(key)
+
+        self.assertEqual(list(SUT.received), keys[1:])
+        self.assertFalse(SUT.is_duplicate(keys[0]))
+
+    def test_unhashable_key(self):
+        SUT = DuplicateFilter('dateTime')
+
+        self.assertFalse(SUT.is_duplicate((random_string(), [1])))
+        self.assertFalse(SUT.is_duplicate((random_string(), [1])))
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,154 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+
+# pylint: disable=wrong-import-order
+# pylint: disable=wrong-import-position
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+
+import base64
+import json
+import os
+import random
+import signal
+import tempfile
+
+import unittest
+import mock
+
+import test_weewx_stubs
+from test_weewx_stubs import BaseTestClass, random_string
+# setup stubs before importing MQTTSubscribe
+test_weewx_stubs.setup_stubs()
+from user.MQTTSubscribe import FlightRecorder, Logger
+
+class Msg:
+    # pylint: disable=too-few-public-methods
+    def __init__(self, topic, payload, qos=0, retain=0):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+
+class TestRecord(BaseTestClass):
+    def test_callback_records_message(self):
+        mock_logger = mock.Mock(spec=Logger)
+        mock_callback = mock.Mock()
+        msg = Msg(random_string(), random_string().encode('utf-8'), random.randint(0, 2))
+
+        SUT = FlightRecorder({}, mock_logger)
+        callback = SUT.get_callback(mock_callback)
+        callback(msg)
+
+        mock_callback.assert_called_once_with(msg)
+        messages = SUT.messages()
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(messages[0][0], msg.topic)
+        self.assertEqual(messages[0][2], msg.qos)
+        self.assertEqual(messages[0][3], msg.payload)
+
+    def test_oldest_messages_are_replaced(self):
+        mock_logger = mock.Mock(spec=Logger)
+        size = random.randint(2, 10)
+        payloads = [str(i).encode('utf-8') for i in range(size * 2 + 1)]
+
+        SUT = FlightRecorder({'size': size}, mock_logger)
+        for payload in payloads:
+            SUT.record(Msg(random_string(), payload))
+
+        self.assertEqual([message[3] for message in SUT.messages()], payloads[-size:])
+
+class TestDump(BaseTestClass):
+    def test_dump(self):
+        mock_logger = mock.Mock(spec=Logger)
+        text_msg = Msg(random_string(), random_string().encode('utf-8'), 1)
+        binary_msg = Msg(random_string(), b'\xff\xfe\x00', 0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, random_string())
+            SUT = FlightRecorder({'filename': filename}, mock_logger)
+            SUT.record(text_msg)
+            SUT.record(binary_msg)
+
+            count = SUT.dump()
+
+            with open(filename, encoding='utf-8') as file_object:
+                lines = [json.loads(line) for line in file_object]
+
+        self.assertEqual(count, 2)
+        self.assertEqual(lines[0]['topic'], text_msg.topic)
+        self.assertEqual(lines[0]['qos'], 1)
+        self.assertEqual(lines[0]['payload'], text_msg.payload.decode('utf-8'))
+        self.assertEqual(base64.b64decode(lines[1]['payload_base64']), binary_msg.payload)
+        mock_logger.info.assert_called_with(132002, FlightRecorder.msgX[132002], count=2, filename=filename)
+
+    def test_dump_fails(self):
+        mock_logger = mock.Mock(spec=Logger)
+        filename = os.path.join(random_string(), random_string())
+
+        SUT = FlightRecorder({'filename': filename}, mock_logger)
+
+        self.assertEqual(SUT.dump(), 0)
+        mock_logger.error.assert_called_once_with(134001, FlightRecorder.msgX[134001], filename=filename, exception=mock.ANY)
+
+    def test_dump_on_exception_is_limited(self):
+        mock_logger = mock.Mock(spec=Logger)
+        dump_interval = random.randint(60, 600)
+
+        with mock.patch('user.MQTTSubscribe.time') as mock_time:
+            mock_time.time.return_value = 0
+            SUT = FlightRecorder({'dump_interval': dump_interval}, mock_logger)
+            with mock.patch.object(SUT, 'dump') as mock_dump:
+                SUT.on_exception(None)
+                mock_time.time.return_value = dump_interval - 1
+                SUT.on_exception(None)
+
+                mock_dump.assert_called_once()
+
+                mock_time.time.return_value = dump_interval
+                SUT.on_exception(None)
+
+                self.assertEqual(mock_dump.call_count, 2)
+
+class TestMessageDict(BaseTestClass):
+    def test_text_payload_round_trip(self):
+        topic = random_string()
+        payload = random_string().encode('utf-8')
+
+        message = json.loads(json.dumps(FlightRecorder.message_to_dict(topic, 0, 0, payload)))
+
+        self.assertEqual(message['payload'], payload.decode('utf-8'))
+        self.assertEqual(FlightRecorder.message_from_dict(message), (topic, payload))
+
+    def test_binary_payload_round_trip(self):
+        topic = random_string()
+        payload = b'\xff\xfe\x00'
+
+        message = json.loads(json.dumps(FlightRecorder.message_to_dict(topic, 0, 0, payload)))
+
+        self.assertNotIn('payload', message)
+        self.assertEqual(FlightRecorder.message_from_dict(message), (topic, payload))
+
+class TestSignal(BaseTestClass):
+    def test_invalid_signal(self):
+        mock_logger = mock.Mock(spec=Logger)
+        signal_name = random_string()
+
+        with self.assertRaises(ValueError) as error:
+            FlightRecorder({'signal': signal_name}, mock_logger)
+
+        self.assertEqual(error.exception.args[0], f"'{signal_name}' is not a valid signal.")
+
+    def test_signal_is_set(self):
+        mock_logger = mock.Mock(spec=Logger)
+
+        with mock.patch('user.MQTTSubscribe.signal.signal') as mock_signal:
+            SUT = FlightRecorder({'signal': 'SIGUSR2'}, mock_logger)
+
+            mock_signal.assert_called_once_with(signal.SIGUSR2, SUT._on_signal)
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,95 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+
+# pylint: disable=wrong-import-order
+# pylint: disable=wrong-import-position
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+
+import json
+import random
+
+import unittest
+import mock
+
+import test_weewx_stubs
+from test_weewx_stubs import BaseTestClass, random_string
+# setup stubs before importing MQTTSubscribe
+test_weewx_stubs.setup_stubs()
+from user.MQTTSubscribe import JSONDecoder
+
+class TestInit(BaseTestClass):
+    def test_invalid_decoder(self):
+        json_decoder = random_string()
+
+        with self.assertRaises(ValueError) as error:
+            JSONDecoder(json_decoder)
+
+        self.assertEqual(error.exception.args[0], f"Invalid json_decoder configured: {json_decoder}")
+
+    def test_decoder_not_installed(self):
+        with mock.patch('user.MQTTSubscribe.importlib.import_module') as mock_import_module:
+            mock_import_module.side_effect = ImportError
+
+            with self.assertRaises(ValueError) as error:
+                JSONDecoder('orjson')
+
+            self.assertEqual(error.exception.args[0], "json_decoder orjson is not installed.")
+
+    def test_auto_uses_first_installed(self):
+        mock_ujson = mock.Mock()
+
+        def import_module(name):
+            if name == 'ujson':
+                return mock_ujson
+            raise ImportError
+
+        with mock.patch('user.MQTTSubscribe.importlib.import_module') as mock_import_module:
+            mock_import_module.side_effect = import_module
+
+            SUT = JSONDecoder()
+
+            self.assertEqual(SUT.name, 'ujson')
+
+    def test_auto_falls_back_to_json(self):
+        with mock.patch('user.MQTTSubscribe.importlib.import_module') as mock_import_module:
+            mock_import_module.side_effect = ImportError
+
+            SUT = JSONDecoder('auto')
+
+            self.assertEqual(SUT.name, 'json')
+
+class TestDecode(BaseTestClass):
+    def test_json_decodes_bytes(self):
+        payload_dict = {random_string(): random.uniform(1, 100), random_string(): random_string()}
+
+        SUT = JSONDecoder('json')
+
+        self.assertEqual(SUT.decode(json.dumps(payload_dict).encode('utf-8')), payload_dict)
+
+    def test_json_invalid_payload(self):
+        SUT = JSONDecoder('json')
+
+        with self.assertRaises(json.JSONDecodeError):
+            SUT.decode(random_string().encode('utf-8'))
+
+    def test_rejected_payload_is_decoded_by_json(self):
+        mock_orjson = mock.Mock()
+        mock_orjson.loads.side_effect = ValueError
+        payload = b'{"outTemp": NaN}'
+
+        with mock.patch('user.MQTTSubscribe.importlib.import_module') as mock_import_module:
+            mock_import_module.return_value = mock_orjson
+
+            SUT = JSONDecoder('orjson')
+            data = SUT.decode(payload)
+
+        mock_orjson.loads.assert_called_once_with(payload)
+        self.assertEqual(list(data), ['outTemp'])
+        self.assertNotEqual(data['outTemp'], data['outTemp'])
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,71 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+
+# pylint: disable=wrong-import-order
+# pylint: disable=wrong-import-position
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+
+import unittest
+
+import test_weewx_stubs
+from test_weewx_stubs import BaseTestClass, random_string
+# setup stubs before importing MQTTSubscribe
+test_weewx_stubs.setup_stubs()
+from user.MQTTSubscribe import KeywordDecoder
+
+class TestDecode(BaseTestClass):
+    def test_pairs(self):
+        SUT = KeywordDecoder(',', '=', {}, False)
+
+        pairs = SUT.decode('inTemp=71.3,outTemp=45.2', [])
+
+        self.assertEqual(pairs, [('inTemp', '71.3'), ('outTemp', '45.2')])
+
+    def test_whitespace_is_stripped(self):
+        SUT = KeywordDecoder(',', '=', {'inTemp': False}, False)
+
+        pairs = SUT.decode(' inTemp = 71.3 , outTemp= 45.2', [])
+
+        self.assertEqual(pairs, [('inTemp', '71.3'), ('outTemp', '45.2')])
+
+    def test_value_with_separator(self):
+        SUT = KeywordDecoder(',', '=', {}, False)
+
+        pairs = SUT.decode('station=a=b', [])
+
+        self.assertEqual(pairs, [('station', 'a=b')])
+
+    def test_missing_separator(self):
+        field = random_string()
+        missing = []
+        SUT = KeywordDecoder(',', '=', {}, False)
+
+        pairs = SUT.decode(f"inTemp=71.3,{field}", missing)
+
+        self.assertEqual(pairs, [('inTemp', '71.3')])
+        self.assertEqual(missing, [field])
+
+    def test_ignored_fields(self):
+        ignored = []
+        SUT = KeywordDecoder(',', '=', {'inTemp': True}, False)
+
+        pairs = SUT.decode('inTemp=71.3, outTemp=45.2', [], ignored)
+
+        self.assertEqual(pairs, [('outTemp', '45.2')])
+        self.assertEqual(ignored, ['inTemp'])
+
+    def test_ignore_default(self):
+        ignored = []
+        SUT = KeywordDecoder(',', '=', {'inTemp': False}, True)
+
+        pairs = SUT.decode('inTemp=71.3, outTemp=45.2', [], ignored)
+
+        self.assertEqual(pairs, [('inTemp', '71.3')])
+        self.assertEqual(ignored, ['outTemp'])
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
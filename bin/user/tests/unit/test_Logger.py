@@ -9,16 +9,19 @@ import mock
 
 import configobj
 import copy
+import logging
+import queue
 import random
 import sys
-import time
 
 import test_weewx_stubs
 from test_weewx_stubs import BaseTestClass, random_string
 # setup stubs before importing MQTTSubscribe
 test_weewx_stubs.setup_stubs()
 
-from user.MQTTSubscribe import Logger
+from user.MQTTSubscribe import Logger, LogQueueHandler
+from user.MQTTSubscribe import CountThrottle, FixedWindowThrottle, SlidingWindowThrottle, TokenBucketThrottle
+from user.MQTTSubscribe import Sampler
 
 class TestInintialization(BaseTestClass):
     def test_init_set_trace_log_level(self):
@@ -416,10 +419,9 @@ class TestInintialization(BaseTestClass):
         config = configobj.ConfigObj(config_dict)
 
         SUT = Logger(config)
-        with mock.patch.object(Logger, '_check_message') as mock_check_message:
-            SUT._is_throttled(logging_level, msg_id_int)
+        throttle_config = SUT._get_throttle_config(logging_level, msg_id_int)
 
-            mock_check_message.assert_called_once_with(msg_id_int, config_dict['throttle']['messages'][message_id])
+        self.assertEqual(throttle_config, config_dict['throttle']['messages'][message_id])
 
     def test_is_throttled_all_level_set(self):
         logging_level = 'ERROR'
@@ -451,10 +453,9 @@ class TestInintialization(BaseTestClass):
         config = configobj.ConfigObj(config_dict)
 
         SUT = Logger(config)
-        with mock.patch.object(Logger, '_check_message') as mock_check_message:
-            SUT._is_throttled(logging_level, random_message_id)
+        throttle_config = SUT._get_throttle_config(logging_level, random_message_id)
 
-            mock_check_message.assert_called_once_with(random_message_id, config_dict['throttle']['category'][logging_level])
+        self.assertEqual(throttle_config, config_dict['throttle']['category'][logging_level])
 
     def test_is_throttled_all_set(self):
         logging_level = 'ERROR'
@@ -485,10 +486,9 @@ class TestInintialization(BaseTestClass):
         }
         config = configobj.ConfigObj(config_dict)
         SUT = Logger(config)
-        with mock.patch.object(Logger, '_check_message') as mock_check_message:
-            SUT._is_throttled(random_string(), random_message_id)
+        throttle_config = SUT._get_throttle_config(random_string(), random_message_id)
 
-            mock_check_message.assert_called_once_with(random_message_id, config_dict['throttle']['category']['ALL'])
+        self.assertEqual(throttle_config, config_dict['throttle']['category']['ALL'])
 
     def test_is_throttled_no_match(self):
         logging_level = 'ERROR'
@@ -515,11 +515,47 @@ class TestInintialization(BaseTestClass):
         }
         config = configobj.ConfigObj(config_dict)
 
-        with mock.patch.object(Logger, '_check_message') as mock_check_message:
-            SUT = Logger(config)
-            SUT._is_throttled(random_string(), random_message_id)
+        SUT = Logger(config)
+
+        self.assertIsNone(SUT._get_throttle_config('INFO', random_message_id))
+        self.assertFalse(SUT._is_throttled('INFO', random_message_id))
+
+    def test_invalid_algorithm(self):
+        config_dict = {
+            'mode': random_string(),
+            'throttle': {
+                'algorithm': random_string(),
+            }
+        }
+        config = configobj.ConfigObj(config_dict)
+
+        with self.assertRaises(ValueError) as error:
+            Logger(config)
+
+        self.assertEqual(error.exception.args[0],
+                         f"{config_dict['throttle']['algorithm']} is not a valid throttle algorithm. "
+                         f"Valid algorithms are {list(Logger.throttle_algorithms)}")
 
-            mock_check_message.assert_not_called()
+    def test_message_algorithm(self):
+        msg_id_int = random.randint(1000, 9999)
+
+        config_dict = {
+            'mode': random_string(),
+            'throttle': {
+                'messages': {
+                    str(msg_id_int): {
+                        'duration': random.randint(1, 10),
+                        'max': random.randint(1, 10),
+                        'algorithm': 'token_bucket',
+                    }
+                }
+            }
+        }
+        config = configobj.ConfigObj(config_dict)
+
+        SUT = Logger(config)
+
+        self.assertIsInstance(SUT._get_throttle('ERROR', msg_id_int), TokenBucketThrottle)
 
 class TestLogging(BaseTestClass):
     @staticmethod
@@ -604,88 +640,155 @@ class TestLogging(BaseTestClass):
 
                 SUT._logmsg.log.assert_called_once_with(5, SUT.MSG_FORMAT, mode, thread_id, -1, message)
 
+    @staticmethod
+    def test_message_formatted_with_arguments():
+        with mock.patch('user.MQTTSubscribe.logging') as mock_logging:
+            with mock.patch('user.MQTTSubscribe.threading') as mock_threading:
+                mock_logging._checkLevel.return_value = 0
+                thread_id = random.randint(10000, 99999)
+                mock_threading.get_native_id.return_value = thread_id
+                mode = random_string()
+                value = random_string()
+
+                SUT = Logger({'mode': mode})
+
+                SUT.info(random.randint(1, 100), "value is {value}", value=value)
+
+                SUT._logmsg.info.assert_called_once_with(SUT.MSG_FORMAT, mode, thread_id, -1, f"value is {value}")
+
+    @staticmethod
+    def test_message_not_formatted_when_level_disabled():
+        with mock.patch('user.MQTTSubscribe.logging') as mock_logging:
+            mock_logging._checkLevel.return_value = 0
+            mock_msg_text = mock.Mock()
+
+            SUT = Logger({'mode': random_string()})
+            SUT._logmsg.isEnabledFor.return_value = False
+
+            SUT.trace(random.randint(1, 100), mock_msg_text, value=random_string())
+            SUT.debug(random.randint(1, 100), mock_msg_text, value=random_string())
+
+            mock_msg_text.format.assert_not_called()
+            SUT._logmsg.log.assert_not_called()
+            SUT._logmsg.debug.assert_not_called()
+
+    def test_is_enabled_trace_with_debug_set(self):
+        with mock.patch('user.MQTTSubscribe.logging') as mock_logging:
+            mock_logging._checkLevel.return_value = 0
+
+            SUT = Logger({'mode': random_string()})
+            SUT.weewx_debug = 2
+
+            self.assertEqual(SUT.is_enabled('TRACE'), SUT._logmsg.isEnabledFor.return_value)
+            SUT._logmsg.isEnabledFor.assert_called_once_with(mock_logging.DEBUG)
+
+    def test_is_enabled_trace_with_debug_not_set(self):
+        with mock.patch('user.MQTTSubscribe.logging') as mock_logging:
+            mock_logging._checkLevel.return_value = 0
+
+            SUT = Logger({'mode': random_string()})
+            SUT.weewx_debug = 0
+
+            self.assertEqual(SUT.is_enabled('TRACE'), SUT._logmsg.isEnabledFor.return_value)
+            SUT._logmsg.isEnabledFor.assert_called_once_with(5)
+
 class TestThrottling(BaseTestClass):
     def test_duration_is_zero(self):
+        SUT = CountThrottle(3)
+
+        throttled = [SUT.is_throttled(0) for _ in range(7)]
+
+        self.assertEqual(throttled, [False, True, True, False, True, True, False])
+        self.assertEqual(SUT.suppressed, 4)
+
+    def test_fixed_window(self):
+        SUT = FixedWindowThrottle(2, 60)
+
+        self.assertEqual([SUT.is_throttled(60) for _ in range(3)], [False, False, True])
+        self.assertTrue(SUT.is_throttled(119))
+        self.assertFalse(SUT.is_throttled(120))
+        self.assertEqual(SUT.suppressed, 2)
+
+    def test_sliding_window(self):
+        SUT = SlidingWindowThrottle(2, 60)
+
+        self.assertEqual([SUT.is_throttled(0) for _ in range(3)], [False, False, True])
+        # Half of the previous window's 2 messages are still in the sliding window.
+        self.assertEqual([SUT.is_throttled(90) for _ in range(2)], [False, True])
+        self.assertEqual([SUT.is_throttled(150) for _ in range(3)], [False, False, True])
+        # More than a window has passed.
+        self.assertEqual([SUT.is_throttled(300) for _ in range(3)], [False, False, True])
+
+    def test_token_bucket(self):
+        SUT = TokenBucketThrottle(2, 60)
+
+        self.assertEqual([SUT.is_throttled(0) for _ in range(3)], [False, False, True])
+        self.assertEqual([SUT.is_throttled(30) for _ in range(2)], [False, True])
+        self.assertEqual([SUT.is_throttled(1000) for _ in range(3)], [False, False, True])
+
+    def test_max_is_none(self):
         msg_id_int = random.randint(1000, 9999)
-        msg_id = str(msg_id_int)
-        duration = 0
-        max_count = random.randint(1, 1000)
 
         config_dict = {
             'mode': random_string(),
             'throttle': {
                 'messages': {
-                    msg_id: {
-                        'duration': duration,
-                        'max': max_count,
+                    str(msg_id_int): {
+                        'duration': random.randint(1, 10),
+                        'max': 'None',
                     }
                 }
             }
         }
         config = configobj.ConfigObj(config_dict)
 
-        with mock.patch('user.MQTTSubscribe.logging') as mock_logging:
-            with mock.patch('user.MQTTSubscribe.time') as mock_time:
-                mock_logging._checkLevel.return_value = 0
-
-                SUT = Logger(config)
+        SUT = Logger(config)
 
-                SUT.logged_ids = {
-                    msg_id: {
-                        'count': random.randint(1, 10),
-                    }
-                }
+        self.assertFalse(SUT._is_throttled('ERROR', msg_id_int))
+        self.assertIsNone(SUT.throttles['ERROR'][msg_id_int])
 
-                throttle = SUT._check_message(msg_id, SUT.throttle_config['message'][msg_id_int])
+    def test_not_throttled(self):
+        SUT = Logger({'mode': random_string()})
 
-                self.assertTrue(throttle, f"SUT logged ids: {SUT.logged_ids}")
-                self.assertEqual(len(SUT.logged_ids), 1)
-                self.assertEqual(mock_time.timer.call_count, 0)
+        self.assertFalse(SUT._is_throttled('ERROR', random.randint(1000, 9999)))
+        self.assertEqual(SUT.throttles, {})
 
-    def test_first_message_duration_is_zero(self):
+    def test_throttle_resolved_once(self):
         msg_id_int = random.randint(1000, 9999)
-        msg_id = str(msg_id_int)
-        duration = 0
-        max_count = random.randint(1, 1000)
 
         config_dict = {
             'mode': random_string(),
             'throttle': {
-                'messages': {
-                    msg_id: {
-                        'duration': duration,
-                        'max': max_count,
-                    }
-                }
+                'category': {
+                    'ALL': {
+                        'duration': random.randint(60, 600),
+                        'max': random.randint(5, 10),
+                    },
+                },
             }
         }
         config = configobj.ConfigObj(config_dict)
 
-        with mock.patch('user.MQTTSubscribe.logging') as mock_logging:
-            with mock.patch('user.MQTTSubscribe.time') as mock_time:
-                mock_logging._checkLevel.return_value = 0
-
-                SUT = Logger(config)
-
-                throttle = SUT._check_message(msg_id, SUT.throttle_config['message'][msg_id_int])
+        SUT = Logger(config)
+        with mock.patch.object(SUT, '_get_throttle_config', wraps=SUT._get_throttle_config) as mock_get_throttle_config:
+            SUT._is_throttled('ERROR', msg_id_int)
+            SUT._is_throttled('ERROR', msg_id_int)
 
-                self.assertTrue(throttle)
-                self.assertEqual(len(SUT.logged_ids), 1)
-                self.assertEqual(mock_time.timer.call_count, 0)
+            mock_get_throttle_config.assert_called_once_with('ERROR', msg_id_int)
 
-    def test_max_is_none(self):
+    def test_suppressed_reported(self):
+        mode = random_string()
         msg_id_int = random.randint(1000, 9999)
-        msg_id = str(msg_id_int)
-        duration = random.randint(60, 600)
-        max_count = 'None'
+        report_interval = random.randint(60, 600)
 
         config_dict = {
-            'mode': random_string(),
+            'mode': mode,
             'throttle': {
+                'report_interval': report_interval,
                 'messages': {
-                    msg_id: {
-                        'duration': duration,
-                        'max': max_count,
+                    str(msg_id_int): {
+                        'duration': report_interval,
+                        'max': 1,
                     }
                 }
             }
@@ -694,30 +797,39 @@ class TestThrottling(BaseTestClass):
 
         with mock.patch('user.MQTTSubscribe.logging') as mock_logging:
             with mock.patch('user.MQTTSubscribe.time') as mock_time:
-                mock_logging._checkLevel.return_value = 0
+                with mock.patch('user.MQTTSubscribe.threading') as mock_threading:
+                    mock_logging._checkLevel.return_value = 0
+                    mock_time.time.return_value = 0
+                    thread_id = random.randint(10000, 99999)
+                    mock_threading.get_native_id.return_value = thread_id
 
-                SUT = Logger(config)
+                    SUT = Logger(config)
+
+                    throttled = [SUT._is_throttled('ERROR', msg_id_int) for _ in range(3)]
+
+                    self.assertEqual(throttled, [False, True, True])
+                    SUT._logmsg.error.assert_not_called()
 
-                throttle = SUT._check_message(msg_id, SUT.throttle_config['message'][msg_id_int])
+                    mock_time.time.return_value = report_interval
+                    self.assertFalse(SUT._is_throttled('ERROR', msg_id_int))
 
-                self.assertFalse(throttle)
-                self.assertEqual(len(SUT.logged_ids), 0)
-                self.assertEqual(mock_time.timer.call_count, 0)
+                    message_text = f"2 messages have been suppressed by throttling, by message id: {msg_id_int}: 2."
+                    SUT._logmsg.error.assert_called_once_with(SUT.MSG_FORMAT, mode, thread_id, -1, message_text)
+                    self.assertEqual(SUT.suppressed_throttles, [])
 
-    def test_first_time_message_is_logged(self):
+    def test_suppressed_reported_by_report_due(self):
+        mode = random_string()
         msg_id_int = random.randint(1000, 9999)
-        msg_id = str(msg_id_int)
-        duration = random.randint(60, 600)
-        max_count = random.randint(1, 1000)
-        now = int(time.time())
+        report_interval = random.randint(60, 600)
 
         config_dict = {
-            'mode': random_string(),
+            'mode': mode,
             'throttle': {
+                'report_interval': report_interval,
                 'messages': {
-                    msg_id: {
-                        'duration': duration,
-                        'max': max_count,
+                    str(msg_id_int): {
+                        'duration': report_interval,
+                        'max': 1,
                     }
                 }
             }
@@ -726,233 +838,242 @@ class TestThrottling(BaseTestClass):
 
         with mock.patch('user.MQTTSubscribe.logging') as mock_logging:
             with mock.patch('user.MQTTSubscribe.time') as mock_time:
-                mock_logging._checkLevel.return_value = 0
-                mock_time.time.return_value = now
+                with mock.patch('user.MQTTSubscribe.threading') as mock_threading:
+                    mock_logging._checkLevel.return_value = 0
+                    mock_time.time.return_value = 0
+                    thread_id = random.randint(10000, 99999)
+                    mock_threading.get_native_id.return_value = thread_id
+
+                    SUT = Logger(config)
 
-                SUT = Logger(config)
+                    for _ in range(3):
+                        SUT._is_throttled('ERROR', msg_id_int)
 
-                throttle = SUT._check_message(msg_id, SUT.throttle_config['message'][msg_id_int])
+                    SUT.report_due()
+                    SUT._logmsg.error.assert_not_called()
 
-                logged_ids = {
-                    msg_id: {
-                        'window': int(now // duration),
-                        'count': 1,
-                    }
-                }
+                    mock_time.time.return_value = report_interval
+                    SUT.report_due()
 
-                self.assertFalse(throttle)
-                self.assertEqual(len(SUT.logged_ids), 1)
-                self.assertDictEqual(SUT.logged_ids, logged_ids)
+                    message_text = f"2 messages have been suppressed by throttling, by message id: {msg_id_int}: 2."
+                    SUT._logmsg.error.assert_called_once_with(SUT.MSG_FORMAT, mode, thread_id, -1, message_text)
+                    self.assertEqual(SUT.suppressed_throttles, [])
+                    self.assertEqual(SUT.throttle_next_report, 2 * report_interval)
 
-    def test_new_window(self):
-        msg_id = random_string()
+    def test_suppressed_reported_on_close(self):
         msg_id_int = random.randint(1000, 9999)
-        msg_id = str(msg_id_int)
-        duration = random.randint(60, 600)
-        max_count = random.randint(1, 1000)
-        count = random.randint(1, 100)
-        now = time.time()
 
         config_dict = {
             'mode': random_string(),
             'throttle': {
                 'messages': {
-                    msg_id: {
-                        'duration': duration,
-                        'max': max_count,
+                    str(msg_id_int): {
+                        'duration': 0,
+                        'max': 10,
                     }
                 }
             }
         }
         config = configobj.ConfigObj(config_dict)
 
-        with mock.patch('user.MQTTSubscribe.logging') as mock_logging:
-            with mock.patch('user.MQTTSubscribe.time') as mock_time:
-                mock_logging._checkLevel.return_value = 0
-                mock_time.time.return_value = now
+        SUT = Logger(config)
+        SUT._is_throttled('ERROR', msg_id_int)
+        SUT._is_throttled('ERROR', msg_id_int)
 
-                SUT = Logger(config)
+        with mock.patch.object(SUT, 'error') as mock_error:
+            SUT.close()
 
-                SUT.logged_ids = {
-                    msg_id: {
-                        'window': -1,
-                        'count': count,
-                    }
-                }
+            mock_error.assert_called_once_with(None, Logger.msgX[124001], count=1, messages=f"{msg_id_int}: 1")
 
-                throttle = SUT._check_message(msg_id, SUT.throttle_config['message'][msg_id_int])
+class TestSampling(BaseTestClass):
+    def test_every(self):
+        SUT = Sampler(3, None)
 
-                logged_ids = {
-                    msg_id: {
-                        'window': int(now // duration),
-                        'count': 1,
-                    }
-                }
+        sampled = [SUT.sample(None) for _ in range(7)]
 
-                self.assertFalse(throttle)
-                self.assertEqual(len(SUT.logged_ids), 1)
-                self.assertDictEqual(SUT.logged_ids, logged_ids)
+        self.assertEqual(sampled, [True, False, False, True, False, False, True])
 
-    def test_message_within_threshold(self):
-        msg_id_int = random.randint(1000, 9999)
-        msg_id = str(msg_id_int)
-        duration = random.randint(60, 600)
-        count = random.randint(1, 100)
-        max_count = count + 1
-        now = time.time()
+    def test_interval_per_topic(self):
+        topic1 = random_string()
+        topic2 = random_string()
+
+        with mock.patch('user.MQTTSubscribe.time') as mock_time:
+            mock_time.time.return_value = 0
+            SUT = Sampler(None, 10)
 
+            self.assertTrue(SUT.sample(topic1))
+            self.assertTrue(SUT.sample(topic2))
+            self.assertFalse(SUT.sample(topic1))
+
+            mock_time.time.return_value = 10
+            self.assertTrue(SUT.sample(topic1))
+
+    def test_peek_does_not_count(self):
+        SUT = Sampler(2, None)
+
+        self.assertTrue(SUT.peek(None))
+        self.assertTrue(SUT.peek(None))
+        self.assertTrue(SUT.sample(None))
+        self.assertFalse(SUT.peek(None))
+        self.assertFalse(SUT.sample(None))
+
+    def test_invalid_category(self):
         config_dict = {
             'mode': random_string(),
-            'throttle': {
+            'sample': {
+                'category': {
+                    'ERROR': {
+                        'every': random.randint(2, 10),
+                    },
+                },
+            }
+        }
+
+        with self.assertRaises(ValueError) as error:
+            Logger(configobj.ConfigObj(config_dict))
+
+        self.assertEqual(error.exception.args[0], f"ERROR is not valid for sampling. Valid categories are {Logger.valid_sample_categories}")
+
+    def test_message_sampled_before_formatting(self):
+        msg_id = random.randint(1000, 9999)
+        every = random.randint(2, 10)
+        config_dict = {
+            'mode': random_string(),
+            'sample': {
+                'category': {
+                    'DEBUG': {
+                        'every': random.randint(2, 10),
+                    },
+                },
                 'messages': {
-                    msg_id: {
-                        'duration': duration,
-                        'max': max_count,
-                    }
-                }
+                    str(msg_id): {
+                        'every': every,
+                    },
+                },
             }
         }
-        config = configobj.ConfigObj(config_dict)
 
         with mock.patch('user.MQTTSubscribe.logging') as mock_logging:
-            with mock.patch('user.MQTTSubscribe.time') as mock_time:
-                mock_logging._checkLevel.return_value = 0
-                mock_time.time.return_value = now
+            mock_logging._checkLevel.return_value = 0
+            SUT = Logger(configobj.ConfigObj(config_dict))
+            mock_msg_text = mock.Mock()
 
-                SUT = Logger(config)
+            for _ in range(every + 1):
+                SUT.debug(msg_id, mock_msg_text, topic=random_string())
 
-                SUT.logged_ids = {
-                    msg_id: {
-                        'window': -1,
-                        'count': count,
-                    }
-                }
+            self.assertEqual(mock_msg_text.format.call_count, 2)
+            self.assertEqual(SUT.samplers['DEBUG'][msg_id].every, every)
 
-                throttle = SUT._check_message(msg_id, SUT.throttle_config['message'][msg_id_int])
+    def test_is_enabled_checks_sampling(self):
+        msg_id = random.randint(1000, 9999)
+        config_dict = {
+            'mode': random_string(),
+            'sample': {
+                'messages': {
+                    str(msg_id): {
+                        'every': 2,
+                    },
+                },
+            }
+        }
 
-                logged_ids = {
-                    msg_id: {
-                        'window': int(now // duration),
-                        'count': 1,
-                    }
-                }
+        with mock.patch('user.MQTTSubscribe.logging') as mock_logging:
+            mock_logging._checkLevel.return_value = 0
+            SUT = Logger(configobj.ConfigObj(config_dict))
+            SUT.weewx_debug = 0
 
-                self.assertFalse(throttle)
-                self.assertEqual(len(SUT.logged_ids), 1)
-                self.assertDictEqual(SUT.logged_ids, logged_ids)
+            self.assertTrue(SUT.is_enabled('TRACE', msg_id))
+            SUT.trace(msg_id, random_string())
+            self.assertFalse(SUT.is_enabled('TRACE', msg_id))
+            self.assertTrue(SUT.is_enabled('TRACE', random.randint(1000, 9999)))
 
-    def test_passed_threshold_multiple_times(self):
-        mode = random_string()
-        msg_id_int = random.randint(1000, 9999)
-        msg_id = str(msg_id_int)
-        duration = random.randint(60, 600)
-        max_count = random.randint(1, 100)
-        count = max_count * random.randint(2, 9) - 1
-        threshold = count + 1
-        now = duration
-        window = int(now // duration)
+class TestQueuedLogging(BaseTestClass):
+    @staticmethod
+    def create_record(msg):
+        return logging.LogRecord(random_string(), logging.INFO, __file__, 0, msg, None, None)
 
+    def test_init_queue_enabled(self):
         config_dict = {
-            'mode': mode,
-            'throttle': {
-                'messages': {
-                    msg_id: {
-                        'duration': duration,
-                        'max': max_count,
-                    }
-                }
+            'mode': random_string(),
+            'queue': {
+                'enable': True,
+                'max_size': random.randint(10, 100),
             }
         }
-        config = configobj.ConfigObj(config_dict)
 
         with mock.patch('user.MQTTSubscribe.logging') as mock_logging:
-            with mock.patch('user.MQTTSubscribe.time') as mock_time:
-                with mock.patch('user.MQTTSubscribe.threading') as mock_threading:
-                    mock_logging._checkLevel.return_value = 0
-                    mock_time.time.return_value = now
-                    thread_id = random.randint(10000, 99999)
-                    mock_threading.get_native_id.return_value = thread_id
+            with mock.patch('user.MQTTSubscribe.LogQueueListener') as mock_listener_class:
+                mock_logging._checkLevel.return_value = 0
+                mock_handler = mock.Mock()
+                mock_logger = mock.Mock()
+                mock_logger.handlers = [mock_handler]
+                mock_logger.parent = None
+                mock_logging.getLogger.return_value = mock_logger
 
-                    SUT = Logger(config)
+                SUT = Logger(configobj.ConfigObj(config_dict))
 
-                    SUT.logged_ids = {
-                        msg_id: {
-                            'window': window,
-                            'count': count,
-                        }
-                    }
+                self.assertEqual(SUT.queue_handler.queue.maxsize, config_dict['queue']['max_size'])
+                SUT._logmsg.removeHandler.assert_called_once_with(mock_handler)
+                SUT._logmsg.addHandler.assert_called_once_with(SUT.queue_handler)
+                mock_listener_class.assert_called_once_with(SUT.queue_handler.queue, mock.ANY, respect_handler_level=True)
+                mock_listener_class.return_value.start.assert_called_once()
 
-                    throttle = SUT._check_message(msg_id, SUT.throttle_config['message'][msg_id_int])
+                SUT.close()
 
-                    logged_ids = {
-                        msg_id: {
-                            'window': window,
-                            'count': threshold,
-                        }
-                    }
+                mock_listener_class.return_value.stop.assert_called_once()
+                self.assertIsNone(SUT.queue_listener)
 
-                    message_text = f"{threshold - max_count} messages have been suppressed in window id: {window}."
+    def test_queue_full(self):
+        SUT = LogQueueHandler(queue.Queue(1), 300, random_string())
 
-                    self.assertFalse(throttle)
-                    self.assertEqual(len(SUT.logged_ids), 1)
-                    self.assertDictEqual(SUT.logged_ids, logged_ids)
-                    SUT._logmsg.error.assert_called_once_with(SUT.MSG_FORMAT, mode, thread_id, -1, message_text)
+        SUT.emit(self.create_record(random_string()))
+        SUT.emit(self.create_record(random_string()))
 
-    def test_message_is_over_threshold(self):
-        mode = random_string()
-        msg_id_int = random.randint(1000, 9999)
-        msg_id = str(msg_id_int)
-        duration = random.randint(60, 600)
-        count = random.randint(10, 100)
-        max_count = count - 3
-        now = duration
+        self.assertEqual(SUT.queue.qsize(), 1)
+        self.assertEqual(SUT.dropped, 1)
+
+    def test_dropped_count_reported(self):
+        SUT = LogQueueHandler(queue.Queue(1), 0, random_string())
+        message = random_string()
+
+        SUT.emit(self.create_record(random_string()))
+        SUT.emit(self.create_record(random_string()))
+        SUT.emit(self.create_record(random_string()))
+        SUT.queue.get_nowait()
+
+        SUT.emit(self.create_record(message))
 
+        self.assertIn("2 messages have been dropped because the logging queue was full.", SUT.queue.get_nowait().getMessage())
+        self.assertEqual(SUT.dropped, 1)
+
+    def test_report_due_reports_dropped(self):
         config_dict = {
-            'mode': mode,
-            'throttle': {
-                'messages': {
-                    msg_id: {
-                        'duration': duration,
-                        'max': max_count,
-                    }
-                }
+            'mode': random_string(),
+            'queue': {
+                'enable': True,
+                'report_interval': 0,
             }
         }
-        config = configobj.ConfigObj(config_dict)
 
         with mock.patch('user.MQTTSubscribe.logging') as mock_logging:
-            with mock.patch('user.MQTTSubscribe.time') as mock_time:
-                with mock.patch('user.MQTTSubscribe.threading') as mock_threading:
-                    mock_logging._checkLevel.return_value = 0
-                    mock_time.time.return_value = now
-                    thread_id = random.randint(10000, 99999)
-                    mock_threading.get_native_id.return_value = thread_id
-
-                    SUT = Logger(config)
-
-                    SUT.logged_ids = {
-                        msg_id: {
-                            'window': int(now // duration),
-                            'count': count,
-                        }
-                    }
+            with mock.patch('user.MQTTSubscribe.LogQueueListener'):
+                mock_logging._checkLevel.return_value = 0
+                mock_logging.getLogger.return_value.handlers = []
+                mock_logging.getLogger.return_value.parent = None
 
-                    throttle = SUT._check_message(msg_id, SUT.throttle_config['message'][msg_id_int])
+                SUT = Logger(configobj.ConfigObj(config_dict))
+                with mock.patch.object(SUT.queue_handler, 'report_dropped') as mock_report_dropped:
+                    SUT.report_due()
+                    mock_report_dropped.assert_not_called()
 
-                    logged_ids = {
-                        msg_id: {
-                            'window': int(now // duration),
-                            'count': count + 1,
-                        }
-                    }
+                    SUT.queue_handler.dropped = random.randint(1, 10)
+                    SUT.report_due()
 
-                    self.assertTrue(throttle, f"SUT logged ids: {SUT.logged_ids} expected: {logged_ids}")
-                    self.assertEqual(len(SUT.logged_ids), 1)
-                    self.assertDictEqual(SUT.logged_ids, logged_ids)
+                    mock_report_dropped.assert_called_once_with(SUT._logmsg.name)
 
 if __name__ == '__main__':
     # testcase = sys.argv[1]
-    testcase = 'test_message_is_over_threshold'
+    testcase = 'test_suppressed_reported'
 
     test_suite = unittest.TestSuite()
     test_suite.addTest(TestThrottling(testcase))
@@ -114,7 +114,8 @@ class TestDefaultConfiguration(unittest.TestCase):
             # Configuration information about the MQTT message format for this topic
             [[[[message]]]]
                 # The format of the MQTT payload.
-                # Currently support: individual, json, keyword.
+                # Currently support: individual, json, keyword, msgpack, cbor, xml.
+                # msgpack needs the msgpack module and cbor the cbor2 or cbor module.
                 # Must be specified.
                 type = REPLACE_ME
             
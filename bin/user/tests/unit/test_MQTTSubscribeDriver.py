@@ -69,8 +69,9 @@ class TestclosePort(unittest.TestCase):
                 SUT.new_archive_record(event)
 
             SUT.logger.debug.assert_called_with(11002,
-                                                (f"data-> final record is {timestamp_to_string(event.record['dateTime'])}: "
-                                                 f"{to_sorted_string(event.record)}"))
+                                                MQTTSubscribeDriver.msgX[11002],
+                                                dateTime=timestamp_to_string(event.record['dateTime']),
+                                                record=to_sorted_string(event.record))
 
 class TestArchiveInterval(unittest.TestCase):
     def setUp(self):
@@ -192,10 +193,14 @@ class TestgenLoopPackets(unittest.TestCase):
                 gen = SUT.genLoopPackets()
                 next(gen, None)
 
+            SUT.logger.report_due.assert_called()
+            SUT.subscriber.report_due.assert_called()
             start_of_interval = startOfInterval(self.queue_data['dateTime'], SUT._archive_interval)
-            SUT.logger.error.assert_called_once_with(14001, (f"Ignoring record because {start_of_interval} archival start is "
-                                                             f"before previous archive start {prev_archive_start}: "
-                                                             f"{to_sorted_string(self.queue_data)}"))
+            SUT.logger.error.assert_called_once_with(14001,
+                                                     MQTTSubscribeDriver.msgX[14001],
+                                                     archive_start=start_of_interval,
+                                                     prev_archive_start=prev_archive_start,
+                                                     data=to_sorted_string(self.queue_data))
 
     def test_queue_empty(self):
         mock_engine = mock.Mock()
@@ -238,7 +238,11 @@ class Testnew_loop_packet(unittest.TestCase):
             SUT = user.MQTTSubscribe.MQTTSubscribeService(self.mock_StdEngine, self.config_dict)
             SUT.end_ts = start_ts
 
-            SUT.new_loop_packet(mock_new_loop_packet_event)
+            with mock.patch.object(SUT.logger, 'report_due') as mock_report_due:
+                SUT.new_loop_packet(mock_new_loop_packet_event)
+
+                mock_report_due.assert_called_once()
+                SUT.subscriber.report_due.assert_called_once()
 
             self.assertDictEqual(mock_new_loop_packet_event.packet, self.final_packet_data)
 
@@ -396,7 +400,11 @@ class Testnew_archive_record(unittest.TestCase):
             SUT = user.MQTTSubscribe.MQTTSubscribeService(self.mock_StdEngine, self.config_dict)
             SUT.end_ts = start_ts
 
-            SUT.new_archive_record(mock_new_archive_record_event)
+            with mock.patch.object(SUT.logger, 'report_due') as mock_report_due:
+                SUT.new_archive_record(mock_new_archive_record_event)
+
+                mock_report_due.assert_called_once()
+                SUT.subscriber.report_due.assert_called_once()
 
             self.assertDictEqual(mock_new_archive_record_event.record, self.final_record_data)
 
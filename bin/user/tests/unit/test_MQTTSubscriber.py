@@ -852,6 +852,30 @@ class Test_disconnect(unittest.TestCase):
                 SUT.disconnect()
 
                 SUT.client.disconnect.assert_called_once()
+                SUT.manager.log_compression_statistics.assert_called_once()
+                SUT.manager.log_duplicate_statistics.assert_called_once()
+                SUT.manager.log_circuit_breaker_statistics.assert_called_once()
+                assert SUT.message_errors is not None
+
+    @staticmethod
+    def test_report_due():
+        global mock_client
+        mock_logger = mock.Mock(spec=Logger)
+
+        config_dict = {}
+        config_dict['message_callback'] = {}
+        config_dict['topics'] = {}
+        config = configobj.ConfigObj(config_dict)
+
+        with mock.patch('user.MQTTSubscribe.MessageCallbackProvider'):
+            with mock.patch('user.MQTTSubscribe.TopicManager'):
+                with mock.patch('user.MQTTSubscribe.MessageErrors'):
+                    mock_client = mock.Mock()
+                    SUT = MQTTSubscriberTest(config, mock_logger)
+
+                    SUT.report_due()
+
+                    SUT.message_errors.report_due.assert_called_once()
 
 class TestCallbacks(unittest.TestCase):
     def setUp(self):
@@ -930,6 +954,55 @@ class Teston_connect(unittest.TestCase):
                 mock_client.subscribe.assert_any_call(topic1, qos)
                 mock_client.subscribe.assert_any_call(topic2, qos)
 
+class TestFlightRecorder(unittest.TestCase):
+    def setUp(self):
+        # reset stubs for every test
+        test_weewx_stubs.setup_stubs()
+
+    def tearDown(self):
+        # cleanup stubs
+        del sys.modules['weecfg']
+        del sys.modules['weeutil']
+        del sys.modules['weeutil.config']
+        del sys.modules['weeutil.weeutil']
+        del sys.modules['weeutil.logger']
+        del sys.modules['weewx']
+        del sys.modules['weewx.drivers']
+        del sys.modules['weewx.engine']
+
+    def test_flight_recorder_enabled(self):
+        global mock_client
+        config_dict = {
+            'message_callback': {},
+            'topics': {
+                random_string(): {}
+            },
+            'flight_recorder': {
+                'enable': True,
+            }
+        }
+        config = configobj.ConfigObj(config_dict)
+
+        mock_logger = mock.Mock(spec=Logger)
+
+        with mock.patch('user.MQTTSubscribe.weeutil.weeutil.get_object') as mock_get_object:
+            with mock.patch('user.MQTTSubscribe.TopicManager'):
+                mock_client = mock.Mock()
+                mock_provider = mock_get_object.return_value
+                callback = mock_provider.return_value.get_callback.return_value
+                msg = Msg()
+                msg.topic = random_string()
+                msg.payload = random_string().encode('utf-8')
+                msg.qos = 0
+
+                SUT = MQTTSubscriberTest(config, mock_logger)
+                SUT.callback(msg)
+
+                callback.assert_called_once_with(msg)
+                self.assertEqual(SUT.flight_recorder.count, 1)
+                self.assertEqual(mock_provider.return_value.exception_callback, SUT.flight_recorder.on_exception)
+                self.assertEqual(mock_provider.return_value.message_errors, SUT.message_errors)
+
 if __name__ == '__main__':
     # test_suite = unittest.TestSuite()
     # test_suite.addTest(TestInitialization('test_connect_exception'))
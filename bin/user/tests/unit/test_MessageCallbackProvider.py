@@ -20,7 +20,20 @@ from test_weewx_stubs import random_string
 test_weewx_stubs.setup_stubs()
 
 import user.MQTTSubscribe
-from user.MQTTSubscribe import TopicManager, Logger
+from user.MQTTSubscribe import TopicManager, TopicPlan, Logger
+
+def create_mock_manager():
+    # The plan is built from what the tests configure the mocked getters to return.
+    mock_manager = mock.Mock(spec=TopicManager)
+    mock_manager.get_datetime_format.return_value = None
+    mock_manager.get_offset_format.return_value = None
+    mock_manager.get_decompressor.return_value = None
+    mock_manager.get_duplicate_filter.return_value = None
+    mock_manager.get_circuit_breaker.return_value = None
+    mock_manager.get_fields_ignoring_msg_id.return_value = []
+    mock_manager.get_filters.return_value = {}
+    mock_manager.get_plan.side_effect = lambda topic: TopicPlan(mock_manager, topic)
+    return mock_manager
 
 # todo - mock?
 def to_float(x):
@@ -55,7 +68,7 @@ class TestInitialization(unittest.TestCase):
     @staticmethod
     def test_message_and_message_callback_set():
         mock_logger = mock.Mock(spec=Logger)
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
 
         topic = random_string(10)
         message_config_name = random_string()
@@ -80,7 +93,7 @@ class TestInitialization(unittest.TestCase):
 
     def test_message_and_message_callback_not_set(self):
         mock_logger = mock.Mock(spec=Logger)
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
 
         topic = random_string(10)
         message_config_name = random_string()
@@ -99,7 +112,7 @@ class TestInitialization(unittest.TestCase):
 
     def test_message_callback_configuration_defaults_not_set(self):
         mock_logger = mock.Mock(spec=Logger)
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
 
         topic = random_string(10)
         message_config_name = random_string()
@@ -129,7 +142,7 @@ class TestInitialization(unittest.TestCase):
 
     def test_message_configuration_defaults_set(self):
         mock_logger = mock.Mock(spec=Logger)
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
 
         topic = random_string(10)
         message_config_name = random_string()
@@ -156,7 +169,7 @@ class TestInitialization(unittest.TestCase):
 
     def test_message_configuration_defaults_not_set(self):
         mock_logger = mock.Mock(spec=Logger)
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
 
         topic = random_string(10)
         message_config_name = random_string()
@@ -177,7 +190,7 @@ class TestInitialization(unittest.TestCase):
 
     def test_message_configuration_invalid_type(self):
         mock_logger = mock.Mock(spec=Logger)
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
 
         topic = random_string(10)
         message_config_name = random_string()
@@ -196,9 +209,76 @@ class TestInitialization(unittest.TestCase):
 
         self.assertEqual(error.exception.args[0], f"Invalid type configured: {message_type}")
 
+    def test_message_configuration_invalid_json_decoder(self):
+        mock_logger = mock.Mock(spec=Logger)
+        mock_manager = create_mock_manager()
+
+        topic = random_string(10)
+        message_config_name = random_string()
+        queue_type = random_string(10)
+        json_decoder = random_string(10)
+        mock_manager.message_config_name = message_config_name
+        mock_manager.subscribed_topics = {}
+        mock_manager.subscribed_topics[topic] = {}
+        mock_manager.subscribed_topics[topic]['queue'] = {}
+        mock_manager.subscribed_topics[topic]['queue']['type'] = queue_type
+        mock_manager.subscribed_topics[topic][message_config_name] = {}
+        mock_manager.subscribed_topics[topic][message_config_name]['type'] = 'json'
+        mock_manager.subscribed_topics[topic][message_config_name]['json_decoder'] = json_decoder
+
+        with self.assertRaises(ValueError) as error:
+            user.MQTTSubscribe.MessageCallbackProvider(None, mock_logger, mock_manager)
+
+        self.assertEqual(error.exception.args[0], f"Invalid json_decoder configured: {json_decoder}")
+
+    def test_message_configuration_codec_not_installed(self):
+        mock_logger = mock.Mock(spec=Logger)
+        mock_manager = create_mock_manager()
+
+        topic = random_string(10)
+        message_config_name = random_string()
+        queue_type = random_string(10)
+        mock_manager.message_config_name = message_config_name
+        mock_manager.subscribed_topics = {}
+        mock_manager.subscribed_topics[topic] = {}
+        mock_manager.subscribed_topics[topic]['queue'] = {}
+        mock_manager.subscribed_topics[topic]['queue']['type'] = queue_type
+        mock_manager.subscribed_topics[topic][message_config_name] = {}
+        mock_manager.subscribed_topics[topic][message_config_name]['type'] = 'msgpack'
+
+        with mock.patch('user.MQTTSubscribe.importlib.import_module') as mock_import_module:
+            mock_import_module.side_effect = ImportError
+
+            with self.assertRaises(ValueError) as error:
+                user.MQTTSubscribe.MessageCallbackProvider(None, mock_logger, mock_manager)
+
+        self.assertEqual(error.exception.args[0], "msgpack messages need one of the msgpack modules, none is installed.")
+
+    def test_message_configuration_duplicate_field_not_supported(self):
+        mock_logger = mock.Mock(spec=Logger)
+        mock_manager = create_mock_manager()
+
+        topic = random_string(10)
+        message_config_name = random_string()
+        queue_type = random_string(10)
+        mock_manager.message_config_name = message_config_name
+        mock_manager.subscribed_topics = {}
+        mock_manager.subscribed_topics[topic] = {}
+        mock_manager.subscribed_topics[topic]['queue'] = {}
+        mock_manager.subscribed_topics[topic]['queue']['type'] = queue_type
+        mock_manager.subscribed_topics[topic][message_config_name] = {}
+        mock_manager.subscribed_topics[topic][message_config_name]['type'] = 'keyword'
+        mock_manager.subscribed_topics[topic][message_config_name]['duplicate_key'] = 'dateTime'
+
+        with self.assertRaises(ValueError) as error:
+            user.MQTTSubscribe.MessageCallbackProvider(None, mock_logger, mock_manager)
+
+        self.assertEqual(error.exception.args[0],
+                         f"{topic} topic duplicate_key = dateTime is not supported by the keyword type, use duplicate_key = payload.")
+
     def test_message_configuration_missing_type(self):
         mock_logger = mock.Mock(spec=Logger)
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
 
         topic = random_string(10)
         message_config_name = random_string()
@@ -240,8 +320,10 @@ class TestMultiMessageMethod(unittest.TestCase):
         type = random_string()
 
         mock_logger = mock.Mock(spec=Logger)
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_manager.get_message_dict.return_value = {'type': type}
+        mock_manager.get_fields.return_value = {}
+        mock_manager.get_conversion_func.return_value = user.MQTTSubscribe.ConversionFunctions.get('float')
 
         mock_manager.subscribed_topics = {}
 
@@ -257,13 +339,17 @@ class TestMultiMessageMethod(unittest.TestCase):
         msg = Msg(topic, payload, 0, 0)
 
         SUT.on_message_multi(msg)
-        mock_logger.error.assert_called_with(44010, f"Unknown message_type={type}. Skipping topic={topic} and payload={payload}")
+        mock_logger.error.assert_called_with(44010,
+                                             user.MQTTSubscribe.MessageCallbackProvider.msgX[44010],
+                                             message_type=type,
+                                             topic=topic,
+                                             payload=payload)
 
     def test_exception_raised(self):
         traceback = random_string()
         user.MQTTSubscribe.traceback.format_exc = mock.Mock(return_value=traceback)
         mock_logger = mock.Mock(spec=Logger)
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_manager.get_message_dict = mock.Mock(side_effect=Exception("done"))
 
         mock_manager.subscribed_topics = {}
@@ -282,11 +368,180 @@ class TestMultiMessageMethod(unittest.TestCase):
         SUT.on_message_multi(msg)
         self.assertEqual(mock_logger.error.call_count, 3)
         mock_logger.error.assert_has_calls([
-            mock.call(44004, "MessageCallbackProvider on_message_multi failed with <class 'Exception'> and reason done."),
-            mock.call(44005, f"**** MessageCallbackProvider Ignoring topic={topic} and payload={payload}"),
-            mock.call(44006, f"**** MessageCallbackProvider {traceback}")
+            mock.call(44004, user.MQTTSubscribe.MessageCallbackProvider.msgX[44004],
+                      method='on_message_multi', exception_type=Exception, exception=mock.ANY),
+            mock.call(44005, user.MQTTSubscribe.MessageCallbackProvider.msgX[44005], topic=topic, payload=payload),
+            mock.call(44006, user.MQTTSubscribe.MessageCallbackProvider.msgX[44006], traceback=traceback)
         ])
 
+    def test_exception_callback_called(self):
+        mock_logger = mock.Mock(spec=Logger)
+        mock_manager = create_mock_manager()
+        mock_manager.get_message_dict = mock.Mock(side_effect=Exception("done"))
+
+        mock_manager.subscribed_topics = {}
+
+        SUT = user.MQTTSubscribe.MessageCallbackProvider(configobj.ConfigObj({}), mock_logger, mock_manager)
+        SUT.exception_callback = mock.Mock()
+
+        msg = Msg(random_string(), random_string().encode('UTF-8'), 0, 0)
+
+        SUT.on_message_multi(msg)
+
+        SUT.exception_callback.assert_called_once_with(msg)
+
+    def test_repeated_exception_not_logged(self):
+        mock_logger = mock.Mock(spec=Logger)
+        mock_manager = create_mock_manager()
+        mock_manager.get_message_dict = mock.Mock(side_effect=Exception("done"))
+
+        mock_manager.subscribed_topics = {}
+
+        SUT = user.MQTTSubscribe.MessageCallbackProvider(configobj.ConfigObj({}), mock_logger, mock_manager)
+        SUT.message_errors = mock.Mock()
+        SUT.message_errors.add.side_effect = [True, False]
+
+        msg = Msg(random_string(), random_string().encode('UTF-8'), 0, 0)
+
+        SUT.on_message_multi(msg)
+        SUT.on_message_multi(msg)
+
+        self.assertEqual(mock_logger.error.call_count, 3)
+        self.assertEqual(SUT.message_errors.write_dead_letter.call_count, 2)
+        SUT.message_errors.write_dead_letter.assert_called_with(msg, mock.ANY)
+
+class TestDuplicateMessage(unittest.TestCase):
+    topic = random_string()
+
+    def create_SUT(self, mock_logger, mock_manager, duplicate_key):
+        mock_manager.get_msg_id_field.return_value = None
+        mock_manager.get_fields.return_value = {}
+        mock_manager.get_ignore_value.return_value = False
+        mock_manager.get_conversion_func.return_value = {
+            'source': 'lambda x: to_float(x)',
+            'compiled': eval('lambda x: to_float(x)')
+        }
+        mock_manager.get_message_dict.return_value = {'type': 'json', 'flatten_delimiter': '_'}
+        mock_manager.get_duplicate_filter.return_value = user.MQTTSubscribe.DuplicateFilter(duplicate_key)
+        mock_manager.subscribed_topics = {}
+
+        return user.MQTTSubscribe.MessageCallbackProvider(configobj.ConfigObj({'type': 'json'}), mock_logger, mock_manager)
+
+    def test_duplicate_payload_not_decompressed(self):
+        mock_logger = mock.Mock(spec=Logger)
+        mock_manager = create_mock_manager()
+        mock_decompressor = mock.Mock()
+        mock_manager.get_decompressor.return_value = mock_decompressor
+
+        SUT = self.create_SUT(mock_logger, mock_manager, 'payload')
+
+        payload = random_string().encode('utf-8')
+        SUT.on_message_multi(Msg(self.topic, payload, 1, 0))
+        SUT.on_message_multi(Msg(self.topic, payload, 1, 0))
+
+        mock_decompressor.decompress.assert_called_once_with(payload)
+        mock_logger.debug.assert_any_call(41002, user.MQTTSubscribe.MessageCallbackProvider.msgX[41002],
+                                          topic=self.topic, payload=payload, duplicate_key='payload')
+
+    def test_duplicate_field(self):
+        mock_logger = mock.Mock(spec=Logger)
+        mock_manager = create_mock_manager()
+
+        SUT = self.create_SUT(mock_logger, mock_manager, 'dateTime')
+
+        payload_dict = {
+            'dateTime': time.time(),
+            'usUnits': 1,
+            'inTemp': round(random.uniform(10, 100), 2),
+        }
+        SUT.on_message_multi(Msg(self.topic, json.dumps(payload_dict).encode('utf-8'), 1, 0))
+        payload_dict['inTemp'] += 1
+        SUT.on_message_multi(Msg(self.topic, json.dumps(payload_dict).encode('utf-8'), 1, 0))
+
+        self.assertEqual(mock_manager.append_data.call_count, 1)
+
+class TestCircuitBreaker(unittest.TestCase):
+    topic = random_string()
+
+    def create_SUT(self, mock_logger, mock_manager, circuit_breaker, message_dict=None):
+        if message_dict is None:
+            message_dict = {'type': 'json', 'flatten_delimiter': '_'}
+        mock_manager.get_msg_id_field.return_value = None
+        mock_manager.get_fields.return_value = {}
+        mock_manager.get_ignore_value.return_value = False
+        mock_manager.get_conversion_func.return_value = {
+            'source': 'lambda x: to_float(x)',
+            'compiled': eval('lambda x: to_float(x)')
+        }
+        mock_manager.get_message_dict.return_value = message_dict
+        mock_manager.get_circuit_breaker.return_value = circuit_breaker
+        mock_manager.subscribed_topics = {}
+
+        return user.MQTTSubscribe.MessageCallbackProvider(configobj.ConfigObj({'type': message_dict['type']}), mock_logger, mock_manager)
+
+    def test_failed_messages_open_circuit_breaker(self):
+        mock_logger = mock.Mock(spec=Logger)
+        mock_manager = create_mock_manager()
+        circuit_breaker = user.MQTTSubscribe.CircuitBreaker(self.topic, 2, 60, mock_logger)
+
+        SUT = self.create_SUT(mock_logger, mock_manager, circuit_breaker)
+
+        for _ in range(3):
+            SUT.on_message_multi(Msg(self.topic, b'{"inTemp": ', 0, 0))
+        SUT.on_message_multi(Msg(self.topic, json.dumps({'inTemp': 1.0}).encode('utf-8'), 0, 0))
+
+        self.assertEqual(circuit_breaker.failed, 2)
+        self.assertEqual(circuit_breaker.dropped, 2)
+        mock_manager.append_data.assert_not_called()
+
+    def test_processed_message_resets_circuit_breaker(self):
+        mock_logger = mock.Mock(spec=Logger)
+        mock_manager = create_mock_manager()
+        circuit_breaker = user.MQTTSubscribe.CircuitBreaker(self.topic, 2, 60, mock_logger)
+
+        SUT = self.create_SUT(mock_logger, mock_manager, circuit_breaker)
+
+        SUT.on_message_multi(Msg(self.topic, b'{"inTemp": ', 0, 0))
+        SUT.on_message_multi(Msg(self.topic, json.dumps({'inTemp': 1.0}).encode('utf-8'), 0, 0))
+        SUT.on_message_multi(Msg(self.topic, b'{"inTemp": ', 0, 0))
+
+        self.assertEqual(circuit_breaker.state, user.MQTTSubscribe.CircuitBreaker.CLOSED)
+        self.assertEqual(circuit_breaker.failures, 1)
+        mock_manager.append_data.assert_called_once()
+
+    def test_malformed_keyword_messages_open_circuit_breaker(self):
+        mock_logger = mock.Mock(spec=Logger)
+        mock_manager = create_mock_manager()
+        circuit_breaker = user.MQTTSubscribe.CircuitBreaker(self.topic, 2, 60, mock_logger)
+        message_dict = {'type': 'keyword', 'keyword_delimiter': ',', 'keyword_separator': '='}
+
+        SUT = self.create_SUT(mock_logger, mock_manager, circuit_breaker, message_dict)
+
+        SUT.on_message_multi(Msg(self.topic, b'', 0, 0))
+        SUT.on_message_multi(Msg(self.topic, b'inTemp:1.0,outTemp:2.0', 0, 0))
+        SUT.on_message_multi(Msg(self.topic, b'inTemp=1.0', 0, 0))
+
+        self.assertEqual(circuit_breaker.state, user.MQTTSubscribe.CircuitBreaker.OPEN)
+        self.assertEqual(circuit_breaker.failed, 2)
+        self.assertEqual(circuit_breaker.dropped, 1)
+        mock_manager.append_data.assert_not_called()
+
+    def test_processed_keyword_message_resets_circuit_breaker(self):
+        mock_logger = mock.Mock(spec=Logger)
+        mock_manager = create_mock_manager()
+        circuit_breaker = user.MQTTSubscribe.CircuitBreaker(self.topic, 2, 60, mock_logger)
+        message_dict = {'type': 'keyword', 'keyword_delimiter': ',', 'keyword_separator': '='}
+
+        SUT = self.create_SUT(mock_logger, mock_manager, circuit_breaker, message_dict)
+
+        SUT.on_message_multi(Msg(self.topic, b'inTemp:1.0', 0, 0))
+        SUT.on_message_multi(Msg(self.topic, b'inTemp=1.0', 0, 0))
+        SUT.on_message_multi(Msg(self.topic, b'inTemp:1.0', 0, 0))
+
+        self.assertEqual(circuit_breaker.state, user.MQTTSubscribe.CircuitBreaker.CLOSED)
+        self.assertEqual(circuit_breaker.failures, 1)
+        mock_manager.append_data.assert_called_once()
+
 class TestKeywordload(unittest.TestCase):
     topic = random_string()
 
@@ -300,7 +555,7 @@ class TestKeywordload(unittest.TestCase):
 
     def test_payload_empty(self):
         mock_logger = mock.Mock(spec=Logger)
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
         mock_manager.get_message_dict.return_value = {'type': 'keyword', 'keyword_delimiter': ',', 'keyword_separator': '='}
@@ -319,7 +574,7 @@ class TestKeywordload(unittest.TestCase):
 
     def test_payload_bad_data(self):
         mock_logger = mock.Mock(spec=Logger)
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
         mock_manager.get_ignore_value.return_value = False
@@ -344,7 +599,7 @@ class TestKeywordload(unittest.TestCase):
 
     def test_payload_missing_delimiter(self):
         mock_logger = mock.Mock(spec=Logger)
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
         mock_manager.get_ignore_value.return_value = False
@@ -369,7 +624,7 @@ class TestKeywordload(unittest.TestCase):
 
     def test_payload_missing_separator(self):
         mock_logger = mock.Mock(spec=Logger)
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
         mock_manager.get_ignore_value.return_value = False
@@ -389,7 +644,7 @@ class TestKeywordload(unittest.TestCase):
         self.assertEqual(mock_logger.error.call_count, 3)
 
     def test_payload_missing_dateTime(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -423,7 +678,7 @@ class TestKeywordload(unittest.TestCase):
         mock_manager.append_data.assert_called_once_with(msg.topic, payload_dict)
 
     def test_payload_missing_units(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -456,7 +711,7 @@ class TestKeywordload(unittest.TestCase):
         mock_manager.append_data.assert_called_once_with(msg.topic, payload_dict)
 
     def test_payload_good(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -490,7 +745,7 @@ class TestKeywordload(unittest.TestCase):
         mock_manager.append_data.assert_called_once_with(msg.topic, payload_dict)
 
     def test_ignore_default_true(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -525,7 +780,7 @@ class TestKeywordload(unittest.TestCase):
         self.assertFalse(mock_manager.append_data.called)
 
     def test_ignore_default_true_ignore_field_false(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -575,7 +830,7 @@ class TestKeywordload(unittest.TestCase):
         mock_manager.append_data.assert_called_once_with(msg.topic, payload_dict)
 
     def test_ignore_field_true(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -633,7 +888,7 @@ class TestJsonPayload(unittest.TestCase):
 
     def test_invalid_json(self):
         mock_logger = mock.Mock(spec=Logger)
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
         mock_manager.get_message_dict.return_value = {'type': 'json', 'flatten_delimiter': '_'}
@@ -651,7 +906,7 @@ class TestJsonPayload(unittest.TestCase):
 
     def test_empty_payload(self):
         mock_logger = mock.Mock(spec=Logger)
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_manager.get_conversion_func.return_value = {
             'source': 'lambda x: to_float(x)',
             'compiled': eval('lambda x: to_float(x)')
@@ -669,7 +924,7 @@ class TestJsonPayload(unittest.TestCase):
         self.assertEqual(mock_logger.error.call_count, 3)
 
     def test_missing_dateTime(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -696,8 +951,42 @@ class TestJsonPayload(unittest.TestCase):
 
         mock_manager.append_data.assert_called_once_with(msg.topic, payload_dict)
 
+    def test_units_converted(self):
+        mock_manager = create_mock_manager()
+        mock_logger = mock.Mock(spec=Logger)
+        from_units = random_string()
+        to_units = random_string()
+        mock_manager.get_msg_id_field.return_value = None
+        mock_manager.get_fields_ignoring_msg_id.return_value = []
+        mock_manager.get_ignore_value.return_value = False
+        mock_manager.get_conversion_func.return_value = {
+            'source': 'lambda x: to_float(x)',
+            'compiled': eval('lambda x: to_float(x)')
+        }
+        mock_manager.get_fields.return_value = {'inTemp': {'units': from_units}}
+        mock_manager.get_filters.return_value = {}
+        mock_manager.get_message_dict.return_value = {'type': 'json', 'flatten_delimiter': '_'}
+        mock_manager.subscribed_topics = {}
+
+        SUT = user.MQTTSubscribe.MessageCallbackProvider(configobj.ConfigObj(self.message_handler_config_dict), mock_logger, mock_manager)
+
+        payload_dict = dict(self.payload_dict)
+        payload_dict['dateTime'] = time.time()
+        payload_dict['usUnits'] = random.randint(1, 10)
+
+        msg = Msg(self.topic, json.dumps(payload_dict).encode("utf-8"), 0, 0)
+
+        with mock.patch.object(user.MQTTSubscribe.weewx.units, 'getStandardUnitType', create=True) as mock_get_standard_unit_type:
+            mock_get_standard_unit_type.return_value = (to_units, None)
+            with mock.patch.dict(user.MQTTSubscribe.weewx.units.conversionDict, {from_units: {to_units: lambda x: x * 2}}):
+                SUT.on_message_multi(msg)
+
+        expected_dict = dict(payload_dict)
+        expected_dict['inTemp'] = payload_dict['inTemp'] * 2
+        mock_manager.append_data.assert_called_once_with(msg.topic, expected_dict)
+
     def test_missing_units(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -725,7 +1014,7 @@ class TestJsonPayload(unittest.TestCase):
         mock_manager.append_data.assert_called_once_with(msg.topic, payload_dict)
 
     def test_payload_good(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_ignore_value.return_value = True
@@ -760,7 +1049,7 @@ class TestJsonPayload(unittest.TestCase):
             self.assertIsInstance(key, str)
 
     def test_msg_id_set(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         msg_id_field = random_string()
         mock_manager.get_msg_id_field.return_value = msg_id_field
@@ -801,7 +1090,7 @@ class TestJsonPayload(unittest.TestCase):
             self.assertIsInstance(key, str)
 
     def test_ignore_msg_id_field_set(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         msg_id_field = random_string()
         mock_manager.get_msg_id_field.return_value = msg_id_field
@@ -844,7 +1133,7 @@ class TestJsonPayload(unittest.TestCase):
             self.assertIsInstance(key, str)
 
     def test_payload_array_too_large(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_ignore_value.return_value = True
@@ -885,7 +1174,7 @@ class TestJsonPayload(unittest.TestCase):
             self.assertIsInstance(key, str)
 
     def test_payload_array_too_small(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_ignore_value.return_value = True
@@ -926,7 +1215,7 @@ class TestJsonPayload(unittest.TestCase):
             self.assertIsInstance(key, str)
 
     def test_payload_array_nit_configured(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_ignore_value.return_value = True
@@ -963,7 +1252,7 @@ class TestJsonPayload(unittest.TestCase):
         self.assertEqual(mock_logger.error.call_count, 1)
 
     def test_payload_array_good(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_ignore_value.return_value = True
@@ -1008,7 +1297,7 @@ class TestJsonPayload(unittest.TestCase):
             self.assertIsInstance(key, str)
 
     def test_payload_nested(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -1049,8 +1338,85 @@ class TestJsonPayload(unittest.TestCase):
 
         mock_manager.append_data.assert_called_once_with(msg.topic, flattened_payload_dict)
 
+    def test_flat_payload_not_flattened(self):
+        mock_manager = create_mock_manager()
+        mock_logger = mock.Mock(spec=Logger)
+        mock_manager.get_msg_id_field.return_value = None
+        mock_manager.get_fields_ignoring_msg_id.return_value = []
+        mock_manager.get_ignore_value.return_value = False
+        mock_manager.get_conversion_func.return_value = {
+            'source': 'lambda x: to_float(x)',
+            'compiled': eval('lambda x: to_float(x)')
+        }
+        mock_manager.get_fields.return_value = {}
+        mock_manager.get_filters.return_value = {}
+        mock_manager.get_message_dict.return_value = {'type': 'json', 'flatten_delimiter': '_'}
+        mock_manager.subscribed_topics = {}
+
+        SUT = user.MQTTSubscribe.MessageCallbackProvider(configobj.ConfigObj(self.message_handler_config_dict), mock_logger, mock_manager)
+
+        payload_dict = dict(self.payload_dict)
+        payload_dict['dateTime'] = time.time()
+        payload_dict['usUnits'] = random.randint(1, 10)
+
+        msg = Msg(self.topic, json.dumps(payload_dict).encode("utf-8"), 0, 0)
+
+        with mock.patch.object(SUT, '_flatten') as mock_flatten:
+            SUT.on_message_multi(msg)
+
+            mock_flatten.assert_not_called()
+        mock_manager.append_data.assert_called_once_with(msg.topic, payload_dict)
+
+    def run_opt_in(self, trace_enabled):
+        mock_manager = create_mock_manager()
+        mock_logger = mock.Mock(spec=Logger)
+        mock_logger.is_enabled.return_value = trace_enabled
+        mock_manager.get_msg_id_field.return_value = None
+        mock_manager.get_fields_ignoring_msg_id.return_value = []
+        mock_manager.get_ignore_value.return_value = True
+        mock_manager.get_conversion_func.return_value = {
+            'source': 'lambda x: to_float(x)',
+            'compiled': eval('lambda x: to_float(x)')
+        }
+        mock_manager.get_fields.return_value = {'nested01_inTemp': {'ignore': False}}
+        mock_manager.get_filters.return_value = {}
+        mock_manager.get_message_dict.return_value = {'type': 'json', 'flatten_delimiter': '_'}
+        mock_manager.subscribed_topics = {}
+
+        SUT = user.MQTTSubscribe.MessageCallbackProvider(configobj.ConfigObj(self.message_handler_config_dict), mock_logger, mock_manager)
+
+        payload_dict = {
+            'nested01': {
+                'inTemp': round(random.uniform(1, 100), 2),
+                'outTemp': round(random.uniform(1, 100), 2)
+            },
+            'nested02': {
+                'inTemp': round(random.uniform(1, 100), 2),
+            },
+        }
+
+        msg = Msg(self.topic, json.dumps(payload_dict).encode("utf-8"), 0, 0)
+
+        SUT.on_message_multi(msg)
+
+        mock_manager.append_data.assert_called_once_with(msg.topic, {'nested01_inTemp': payload_dict['nested01']['inTemp']})
+        return mock_logger
+
+    def test_opt_in_only_extracts_opted_in_fields(self):
+        mock_logger = self.run_opt_in(False)
+
+        mock_logger.trace.assert_not_called()
+
+    def test_opt_in_traced_extracts_all_fields(self):
+        mock_logger = self.run_opt_in(True)
+
+        mock_logger.trace.assert_has_calls([
+            mock.call(40002, user.MQTTSubscribe.MessageCallbackProvider.msgX[40002], lookup_key='nested01_outTemp'),
+            mock.call(40002, user.MQTTSubscribe.MessageCallbackProvider.msgX[40002], lookup_key='nested02_inTemp'),
+        ])
+
     def test_payload_nested_rename(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -1097,7 +1463,7 @@ class TestJsonPayload(unittest.TestCase):
         mock_manager.append_data.assert_called_once_with(msg.topic, flattened_payload_dict)
 
     def test_ignore_default_true(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -1128,7 +1494,7 @@ class TestJsonPayload(unittest.TestCase):
         self.assertFalse(mock_manager.append_data.called)
 
     def test_ignore_default_true_ignore_field_false(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -1177,7 +1543,7 @@ class TestJsonPayload(unittest.TestCase):
             self.assertIsInstance(key, str)
 
     def test_ignore_field_true(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -1224,7 +1590,7 @@ class TestJsonPayload(unittest.TestCase):
     def test_filter_message(self):
         lookup_key = 'outTemp'
         filters = {lookup_key: [self.payload_dict['outTemp']]}
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -1264,8 +1630,63 @@ class TestJsonPayload(unittest.TestCase):
 
         mock_manager.append_data.assert_not_called()
         SUT.logger.info.assert_called_with(42002,
-                                           (f"MessageCallbackProvider on_message_json filtered out {msg.topic} : "
-                                            f"{msg.payload} with {lookup_key}={filters[lookup_key]}"))
+                                           user.MQTTSubscribe.MessageCallbackProvider.msgX[42002],
+                                           topic=msg.topic,
+                                           payload=msg.payload,
+                                           lookup_key=lookup_key,
+                                           filter=filters[lookup_key])
+
+class TestFilterOutMessage(unittest.TestCase):
+    topic = random_string()
+
+    def test_filtered_before_fields_updated(self):
+        mock_manager = create_mock_manager()
+        mock_logger = mock.Mock(spec=Logger)
+        mock_manager.get_msg_id_field.return_value = None
+        mock_manager.get_fields.return_value = {}
+        mock_manager.get_ignore_value.return_value = False
+        mock_manager.get_conversion_func.return_value = {
+            'source': 'lambda x: to_float(x)',
+            'compiled': eval('lambda x: to_float(x)')
+        }
+        filter_value = round(random.uniform(1, 100), 2)
+        mock_manager.get_filters.return_value = {'status': [filter_value]}
+        mock_manager.get_message_dict.return_value = {'type': 'json', 'flatten_delimiter': '_'}
+        mock_manager.subscribed_topics = {}
+
+        SUT = user.MQTTSubscribe.MessageCallbackProvider(configobj.ConfigObj({'type': 'json'}), mock_logger, mock_manager)
+
+        payload_dict = {
+            'inTemp': round(random.uniform(10, 100), 2),
+            'status': filter_value,
+        }
+        msg = Msg(self.topic, json.dumps(payload_dict).encode("utf-8"), 0, 0)
+
+        with mock.patch.object(SUT, '_update_field') as mock_update_field:
+            SUT.on_message_multi(msg)
+
+            mock_update_field.assert_not_called()
+
+        mock_manager.append_data.assert_not_called()
+        mock_logger.info.assert_called_once_with(42002, user.MQTTSubscribe.MessageCallbackProvider.msgX[42002],
+                                                 topic=msg.topic, payload=msg.payload, lookup_key='status', filter=[filter_value])
+
+    def test_unhashable_value(self):
+        plan = mock.Mock(spec=TopicPlan)
+        plan.text_values = False
+        plan.filters = {'status': [0.0]}
+        plan.filter_sets = {'status': frozenset(plan.filters['status'])}
+
+        self.assertTrue(user.MQTTSubscribe.MessageCallbackProvider._is_filtered(plan, 'status', 0))
+        self.assertFalse(user.MQTTSubscribe.MessageCallbackProvider._is_filtered(plan, 'status', [0]))
+
+    def test_unhashable_filter_value(self):
+        plan = mock.Mock(spec=TopicPlan)
+        plan.text_values = False
+        plan.filters = {'status': [[0]]}
+        plan.filter_sets = {'status': TopicPlan._get_filter_set(plan.filters['status'])}
+
+        self.assertTrue(user.MQTTSubscribe.MessageCallbackProvider._is_filtered(plan, 'status', [0]))
 
 class TestIndividualPayloadSingleTopicFieldName(unittest.TestCase):
     topic_end = random_string()
@@ -1287,7 +1708,7 @@ class TestIndividualPayloadSingleTopicFieldName(unittest.TestCase):
 
     def test_bad_payload(self):
         mock_logger = mock.Mock(spec=Logger)
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
         mock_manager.get_ignore_value.return_value = False
@@ -1311,7 +1732,7 @@ class TestIndividualPayloadSingleTopicFieldName(unittest.TestCase):
 
     def test_empty_payload(self):
         mock_logger = mock.Mock(spec=Logger)
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
         mock_manager.get_ignore_value.return_value = False
@@ -1334,7 +1755,7 @@ class TestIndividualPayloadSingleTopicFieldName(unittest.TestCase):
         self.assertEqual(mock_logger.error.call_count, 3)
 
     def test_None_payload(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -1358,7 +1779,7 @@ class TestIndividualPayloadSingleTopicFieldName(unittest.TestCase):
         mock_manager.append_data.assert_called_once_with(msg.topic, {msg.topic: None}, msg.topic)
 
     def test_unicode_topic(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -1390,7 +1811,7 @@ class TestIndividualPayloadSingleTopicFieldName(unittest.TestCase):
             self.assertIsInstance(key, str)
 
     def test_single_topic(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -1414,7 +1835,7 @@ class TestIndividualPayloadSingleTopicFieldName(unittest.TestCase):
         mock_manager.append_data.assert_called_once_with(msg.topic, {self.topic_end: payload}, self.topic_end)
 
     def test_multiple_topics(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -1442,7 +1863,7 @@ class TestIndividualPayloadSingleTopicFieldName(unittest.TestCase):
         mock_manager.append_data.assert_called_once_with(msg.topic, {msg.topic: payload}, msg.topic)
 
     def test_two_topics(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -1470,7 +1891,7 @@ class TestIndividualPayloadSingleTopicFieldName(unittest.TestCase):
         mock_manager.append_data.assert_called_once_with(msg.topic, {msg.topic: payload}, msg.topic)
 
     def test_ignore_default_true(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -1495,8 +1916,25 @@ class TestIndividualPayloadSingleTopicFieldName(unittest.TestCase):
         SUT.on_message_multi(msg)
         self.assertFalse(mock_manager.append_data.called)
 
+    def test_ignored_payload_not_decoded(self):
+        mock_manager = create_mock_manager()
+        mock_logger = mock.Mock(spec=Logger)
+        mock_manager.get_ignore_value.return_value = True
+        mock_manager.get_fields.return_value = {}
+        mock_manager.get_conversion_func.return_value = user.MQTTSubscribe.ConversionFunctions.get('float')
+        mock_manager.get_message_dict.return_value = {'type': 'individual'}
+        mock_manager.subscribed_topics = {}
+
+        SUT = user.MQTTSubscribe.MessageCallbackProvider(None, mock_logger, mock_manager)
+
+        msg = Msg(self.single_topic, b'\xff\xfe', 0, 0)
+
+        SUT.on_message_multi(msg)
+        self.assertFalse(mock_manager.append_data.called)
+        mock_logger.error.assert_not_called()
+
     def test_ignore_default_true_ignore_field_false(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -1532,7 +1970,7 @@ class TestIndividualPayloadSingleTopicFieldName(unittest.TestCase):
         mock_manager.append_data.assert_called_once_with(msg.topic, {self.topic_end: payload}, self.topic_end)
 
     def test_ignore_field_true(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -1579,7 +2017,7 @@ class TestIndividualPayloadFullTopicFieldName(unittest.TestCase):
 
     def test_bad_payload(self):
         mock_logger = mock.Mock(spec=Logger)
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
         mock_manager.get_ignore_value.return_value = False
@@ -1603,7 +2041,7 @@ class TestIndividualPayloadFullTopicFieldName(unittest.TestCase):
 
     def test_empty_payload(self):
         mock_logger = mock.Mock(spec=Logger)
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
         mock_manager.get_ignore_value.return_value = False
@@ -1625,7 +2063,7 @@ class TestIndividualPayloadFullTopicFieldName(unittest.TestCase):
         self.assertEqual(mock_logger.error.call_count, 3)
 
     def test_None_payload(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
@@ -1649,7 +2087,7 @@ class TestIndividualPayloadFullTopicFieldName(unittest.TestCase):
         mock_manager.append_data.assert_called_once_with(msg.topic, {msg.topic: None}, msg.topic)
 
     def test_single_topic(self):
-        mock_manager = mock.Mock(spec=TopicManager)
+        mock_manager = create_mock_manager()
         mock_logger = mock.Mock(spec=Logger)
         mock_manager.get_msg_id_field.return_value = None
         mock_manager.get_fields_ignoring_msg_id.return_value = []
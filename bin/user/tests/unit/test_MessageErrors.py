@@ -0,0 +1,183 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+
+# pylint: disable=wrong-import-order
+# pylint: disable=wrong-import-position
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+
+import json
+import os
+import random
+import tempfile
+
+import unittest
+import mock
+
+import test_weewx_stubs
+from test_weewx_stubs import BaseTestClass, random_string
+# setup stubs before importing MQTTSubscribe
+test_weewx_stubs.setup_stubs()
+from user.MQTTSubscribe import FlightRecorder, Logger, MessageErrors
+
+class Msg:
+    # pylint: disable=too-few-public-methods
+    def __init__(self, topic, payload, qos=0, retain=0):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+
+class TestAdd(BaseTestClass):
+    def test_first_error_is_logged(self):
+        mock_logger = mock.Mock(spec=Logger)
+        topic = random_string()
+
+        SUT = MessageErrors({}, mock_logger)
+
+        self.assertTrue(SUT.add(topic, ValueError()))
+        self.assertFalse(SUT.add(topic, ValueError()))
+        self.assertTrue(SUT.add(topic, KeyError()))
+        self.assertTrue(SUT.add(random_string(), ValueError()))
+
+    def test_every_error_is_logged(self):
+        mock_logger = mock.Mock(spec=Logger)
+        topic = random_string()
+
+        SUT = MessageErrors({'report_interval': 0}, mock_logger)
+
+        self.assertTrue(SUT.add(topic, ValueError()))
+        self.assertTrue(SUT.add(topic, ValueError()))
+
+    def test_errors_are_reported(self):
+        mock_logger = mock.Mock(spec=Logger)
+        report_interval = random.randint(60, 600)
+        topic = random_string()
+        count = random.randint(1, 10)
+
+        with mock.patch('user.MQTTSubscribe.time') as mock_time:
+            mock_time.time.return_value = 0
+            SUT = MessageErrors({'report_interval': report_interval}, mock_logger)
+            for _ in range(count + 1):
+                SUT.add(topic, ValueError())
+            SUT.add(random_string(), KeyError())
+
+            mock_time.time.return_value = report_interval - 1
+            SUT.add(topic, ValueError())
+            mock_logger.error.assert_not_called()
+
+            mock_time.time.return_value = report_interval
+            self.assertTrue(SUT.add(topic, ValueError()))
+
+        mock_logger.error.assert_called_once_with(144001, MessageErrors.msgX[144001],
+                                                  count=count + 1, exception_type='ValueError', topic=topic)
+
+class TestReportDue(BaseTestClass):
+    def test_errors_are_reported_when_due(self):
+        mock_logger = mock.Mock(spec=Logger)
+        report_interval = random.randint(60, 600)
+        topic = random_string()
+        count = random.randint(1, 10)
+
+        with mock.patch('user.MQTTSubscribe.time') as mock_time:
+            mock_time.time.return_value = 0
+            SUT = MessageErrors({'report_interval': report_interval}, mock_logger)
+            for _ in range(count + 1):
+                SUT.add(topic, ValueError())
+
+            mock_time.time.return_value = report_interval - 1
+            SUT.report_due()
+            mock_logger.error.assert_not_called()
+
+            mock_time.time.return_value = report_interval
+            SUT.report_due()
+
+            self.assertEqual(SUT.errors, {})
+            self.assertEqual(SUT.next_report, 2 * report_interval)
+
+        mock_logger.error.assert_called_once_with(144001, MessageErrors.msgX[144001],
+                                                  count=count, exception_type='ValueError', topic=topic)
+
+    def test_no_errors(self):
+        mock_logger = mock.Mock(spec=Logger)
+
+        with mock.patch('user.MQTTSubscribe.time') as mock_time:
+            mock_time.time.return_value = 0
+            SUT = MessageErrors({}, mock_logger)
+
+            mock_time.time.return_value = 300
+            SUT.report_due()
+
+            self.assertEqual(SUT.next_report, 300)
+
+        mock_logger.error.assert_not_called()
+
+class TestDeadLetter(BaseTestClass):
+    def test_no_file(self):
+        mock_logger = mock.Mock(spec=Logger)
+
+        SUT = MessageErrors({}, mock_logger)
+
+        with mock.patch('builtins.open') as mock_open:
+            SUT.write_dead_letter(Msg(random_string(), b''), ValueError())
+
+            mock_open.assert_not_called()
+
+    def test_write_dead_letter(self):
+        mock_logger = mock.Mock(spec=Logger)
+        msg = Msg(random_string(), random_string().encode('utf-8'), 1)
+        binary_msg = Msg(random_string(), b'\xff\xfe\x00')
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, random_string())
+            SUT = MessageErrors({'dead_letter_filename': filename}, mock_logger)
+
+            SUT.write_dead_letter(msg, ValueError('bad'))
+            SUT.write_dead_letter(binary_msg, KeyError())
+
+            with open(filename, encoding='utf-8') as file_object:
+                lines = [json.loads(line) for line in file_object]
+            self.assertEqual(SUT.dead_letter_size, os.path.getsize(filename))
+
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[0]['topic'], msg.topic)
+        self.assertEqual(lines[0]['qos'], 1)
+        self.assertEqual(lines[0]['payload'], msg.payload.decode('utf-8'))
+        self.assertEqual(lines[0]['exception'], 'ValueError: bad')
+        self.assertEqual(FlightRecorder.message_from_dict(lines[1]), (binary_msg.topic, binary_msg.payload))
+
+    def test_dead_letter_size_is_limited(self):
+        mock_logger = mock.Mock(spec=Logger)
+        msg = Msg(random_string(), random_string().encode('utf-8'))
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, random_string())
+            SUT = MessageErrors({'dead_letter_filename': filename}, mock_logger)
+            SUT.write_dead_letter(msg, ValueError())
+            SUT.max_dead_letter_size = SUT.dead_letter_size + 1
+
+            SUT.write_dead_letter(msg, ValueError())
+            SUT.write_dead_letter(msg, ValueError())
+
+            with open(filename, encoding='utf-8') as file_object:
+                lines = file_object.readlines()
+
+        self.assertEqual(len(lines), 1)
+        mock_logger.info.assert_called_once_with(142001, MessageErrors.msgX[142001], filename=filename, max_size=SUT.max_dead_letter_size)
+
+    def test_dead_letter_write_fails(self):
+        mock_logger = mock.Mock(spec=Logger)
+        filename = os.path.join(random_string(), random_string())
+
+        SUT = MessageErrors({'dead_letter_filename': filename}, mock_logger)
+        SUT.write_dead_letter(Msg(random_string(), b''), ValueError())
+        SUT.write_dead_letter(Msg(random_string(), b''), ValueError())
+
+        mock_logger.error.assert_called_once_with(144002, MessageErrors.msgX[144002], filename=filename, exception=mock.ANY)
+        self.assertIsNone(SUT.dead_letter_filename)
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,114 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+
+# pylint: disable=wrong-import-order
+# pylint: disable=wrong-import-position
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+
+import unittest
+import mock
+
+import datetime
+import random
+import time
+
+import test_weewx_stubs
+from test_weewx_stubs import BaseTestClass
+# setup stubs before importing MQTTSubscribe
+test_weewx_stubs.setup_stubs()
+from user.MQTTSubscribe import TimestampParser
+
+def random_epoch():
+    return random.randint(0, 2000000000)
+
+class TestCompile(BaseTestClass):
+    def test_common_format_is_compiled(self):
+        SUT = TimestampParser('%Y-%m-%dT%H:%M:%S.%f')
+
+        self.assertIsNotNone(SUT.format_re)
+
+    def test_unsupported_directive_uses_strptime(self):
+        SUT = TimestampParser('%B %d %Y %H:%M:%S')
+
+        self.assertIsNone(SUT.format_re)
+
+    def test_format_without_date_uses_strptime(self):
+        SUT = TimestampParser('%H:%M:%S')
+
+        self.assertIsNone(SUT.format_re)
+
+class TestToEpoch(BaseTestClass):
+    def test_compiled_format(self):
+        datetime_format = '%Y-%m-%d %H:%M:%S'
+        epoch = random_epoch()
+
+        SUT = TimestampParser(datetime_format)
+
+        self.assertEqual(SUT.to_epoch(datetime.datetime.fromtimestamp(epoch).strftime(datetime_format)), epoch)
+
+    def test_compiled_format_matches_strptime(self):
+        datetime_format = '%d/%m/%Y  %H:%M'
+        for datetime_string in ['1/2/2025 3:04', '01/02/2025\t03:04', '31/12/1999 23:59']:
+            with self.subTest(datetime_string=datetime_string):
+                SUT = TimestampParser(datetime_format)
+
+                expected_epoch = time.mktime(datetime.datetime.strptime(datetime_string, datetime_format).timetuple())
+                self.assertEqual(SUT.to_epoch(datetime_string), expected_epoch)
+
+    def test_invalid_timestamp(self):
+        datetime_format = '%Y-%m-%d %H:%M:%S'
+        for datetime_string in ['2025-13-01 00:00:00', '2025-02-30 00:00:00', '2025-01-01 00:00:00x', '2025-01-01']:
+            with self.subTest(datetime_string=datetime_string):
+                SUT = TimestampParser(datetime_format)
+
+                with self.assertRaises(ValueError):
+                    datetime.datetime.strptime(datetime_string, datetime_format)
+                with self.assertRaises(ValueError):
+                    SUT.to_epoch(datetime_string)
+
+    def test_offset(self):
+        datetime_format = '%Y-%m-%d %H:%M:%S'
+        epoch = random_epoch()
+
+        SUT = TimestampParser(datetime_format, 'hh:mm')
+
+        datetime_input = f"{datetime.datetime.fromtimestamp(epoch).strftime(datetime_format)} -01:30"
+        self.assertEqual(SUT.to_epoch(datetime_input), epoch - 5400)
+
+    def test_iso(self):
+        SUT = TimestampParser('iso')
+
+        self.assertEqual(SUT.to_epoch('2025-06-01T12:30:00Z'), 1748781000)
+        self.assertEqual(SUT.to_epoch('2025-06-01T08:30:00.5-04:00'), 1748781000.5)
+
+    def test_iso_without_timezone(self):
+        epoch = random_epoch()
+
+        SUT = TimestampParser('iso')
+
+        self.assertEqual(SUT.to_epoch(datetime.datetime.fromtimestamp(epoch).isoformat()), epoch)
+
+    def test_repeated_timestamp_is_remembered(self):
+        datetime_format = '%Y-%m-%d %H:%M:%S'
+        datetime_string = datetime.datetime.fromtimestamp(random_epoch()).strftime(datetime_format)
+
+        SUT = TimestampParser(datetime_format)
+        epoch = SUT.to_epoch(datetime_string)
+
+        with mock.patch.object(TimestampParser, 'parse') as mock_parse:
+            self.assertEqual(SUT.to_epoch(datetime_string), epoch)
+            mock_parse.assert_not_called()
+
+    def test_remembered_timestamps_are_limited(self):
+        SUT = TimestampParser('%Y-%m-%d %H:%M:%S')
+        for epoch in range(TimestampParser.memo_size * 2):
+            SUT.to_epoch(datetime.datetime.fromtimestamp(epoch).strftime('%Y-%m-%d %H:%M:%S'))
+
+        self.assertLessEqual(len(SUT.memo), TimestampParser.memo_size)
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
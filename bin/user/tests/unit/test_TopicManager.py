@@ -20,7 +20,7 @@ import test_weewx_stubs
 # setup stubs before importing MQTTSubscribe
 test_weewx_stubs.setup_stubs()
 
-from user.MQTTSubscribe import TopicManager, Logger
+from user.MQTTSubscribe import TopicCache, TopicManager, Logger
 
 class TestInit(unittest.TestCase):
     def setUp(self):
@@ -142,6 +142,299 @@ class TestHelperFunctions(unittest.TestCase):
 
         self.assertEqual(error.exception.args[0], f"Did not find topic, {topic2}.")
 
+    def test_first_configured_match_is_used(self):
+        mock_logger = mock.Mock(spec=Logger)
+        prefix = random_string()
+
+        config_dict = {
+            f"{prefix}/+/temperature": {},
+            f"{prefix}/#": {},
+            f"{prefix}/device/temperature": {},
+        }
+        config = configobj.ConfigObj(config_dict)
+
+        SUT = TopicManager(None, config, mock_logger)
+
+        self.assertEqual(SUT._lookup_topic(f"{prefix}/device/temperature"), f"{prefix}/+/temperature")
+        self.assertEqual(SUT._lookup_topic(f"{prefix}/device/humidity"), f"{prefix}/#")
+        self.assertEqual(SUT._lookup_topic(prefix), f"{prefix}/#")
+
+    def test_wildcards_do_not_match_dollar_topics(self):
+        mock_logger = mock.Mock(spec=Logger)
+
+        config_dict = {
+            '#': {},
+        }
+        config = configobj.ConfigObj(config_dict)
+
+        SUT = TopicManager(None, config, mock_logger)
+
+        with self.assertRaises(ValueError):
+            SUT._lookup_topic('$SYS/broker/uptime')
+
+class TestTopicCache(unittest.TestCase):
+    def test_hit_and_miss(self):
+        topic = random_string()
+        subscribed_topic = random_string()
+
+        SUT = TopicCache(random.randint(1, 10))
+
+        self.assertIsNone(SUT.get(topic))
+        SUT.put(topic, subscribed_topic)
+        self.assertEqual(SUT.get(topic), subscribed_topic)
+
+        self.assertEqual(SUT.hits, 1)
+        self.assertEqual(SUT.misses, 1)
+        self.assertEqual(SUT.evictions, 0)
+
+    def test_least_recently_used_is_evicted(self):
+        topic1 = random_string()
+        topic2 = random_string()
+        topic3 = random_string()
+
+        SUT = TopicCache(2)
+        SUT.put(topic1, random_string())
+        SUT.put(topic2, random_string())
+        SUT.get(topic1)
+
+        self.assertTrue(SUT.put(topic3, random_string()))
+
+        self.assertEqual(len(SUT), 2)
+        self.assertIsNone(SUT.get(topic2))
+        self.assertIsNotNone(SUT.get(topic1))
+        self.assertEqual(SUT.evictions, 1)
+
+    def test_topic_manager_cache_is_bounded(self):
+        mock_logger = mock.Mock(spec=Logger)
+        prefix = random_string()
+        topic_cache_size = random.randint(2, 10)
+
+        config_dict = {
+            'topic_cache_size': topic_cache_size,
+            f"{prefix}/#": {},
+        }
+        config = configobj.ConfigObj(config_dict)
+
+        SUT = TopicManager(None, config, mock_logger)
+        for i in range(topic_cache_size * 2):
+            self.assertEqual(SUT._lookup_topic(f"{prefix}/{i}"), f"{prefix}/#")
+
+        self.assertEqual(len(SUT.topics), topic_cache_size)
+        self.assertEqual(SUT.topics.evictions, topic_cache_size)
+        mock_logger.debug.assert_any_call(51012, TopicManager.msgX[51012], size=topic_cache_size)
+
+class TestGetPlan(unittest.TestCase):
+    def test_plan_is_reused(self):
+        mock_logger = mock.Mock(spec=Logger)
+        topic = random_string()
+        config = configobj.ConfigObj({topic: {}})
+
+        SUT = TopicManager(None, config, mock_logger)
+        plan = SUT.get_plan(topic)
+
+        self.assertIs(SUT.get_plan(topic), plan)
+
+    def test_plan_compiled_when_unit_config_changes(self):
+        mock_logger = mock.Mock(spec=Logger)
+        topic = random_string()
+        config = configobj.ConfigObj({topic: {}})
+
+        SUT = TopicManager(None, config, mock_logger)
+        plan = SUT.get_plan(topic)
+
+        with mock.patch('user.MQTTSubscribe.ManageWeewxConfig.unit_config_version', plan.unit_config_version + 1):
+            new_plan = SUT.get_plan(topic)
+
+            self.assertIsNot(new_plan, plan)
+            self.assertIs(SUT.get_plan(topic), new_plan)
+
+class TestMsgIdRoutes(unittest.TestCase):
+    def get_plan(self, ignore, fields=None):
+        mock_logger = mock.Mock(spec=Logger)
+        topic = random_string()
+        topic_dict = {'ignore': ignore,
+                      'msg_id_field': 'id',
+                      'message': {'type': 'json'},
+                      'dateTime': {'ignore': False, 'ignore_msg_id_field': True},
+                      'temperature_1': {'ignore': False}}
+        topic_dict.update(fields or {})
+        config = configobj.ConfigObj({topic: topic_dict})
+
+        SUT = TopicManager(None, config, mock_logger)
+        return SUT.get_plan(topic)
+
+    def test_unknown_msg_ids_share_routes(self):
+        plan = self.get_plan(True)
+
+        (routes, _) = plan.get_msg_id_routes('_2')
+
+        self.assertIs(routes, plan.unknown_msg_id_routes[0])
+        self.assertIs(plan.get_msg_id_routes('_3')[0], routes)
+        self.assertIsNot(plan.get_msg_id_routes('_1')[0], routes)
+        self.assertEqual(plan.add_msg_id_route(routes, '_2', 'dateTime'), ('dateTime', False))
+        self.assertEqual(plan.add_msg_id_route(routes, '_2', 'temperature'), (None, True))
+
+    def test_known_msg_id_routes(self):
+        plan = self.get_plan(True)
+
+        (routes, _) = plan.get_msg_id_routes('_1')
+
+        self.assertEqual(plan.add_msg_id_route(routes, '_1', 'temperature'), ('temperature_1', False))
+        self.assertEqual(plan.add_msg_id_route(routes, '_1', 'humidity'), ('humidity_1', True))
+        self.assertIs(routes['temperature'], plan.get_msg_id_routes('_1')[0]['temperature'])
+
+    def test_msg_id_filter_keys(self):
+        plan = self.get_plan(True, {'battery_ok_1': {'filter_out_message_when': ['0']},
+                                    'status': {'filter_out_message_when': ['0'], 'ignore_msg_id_field': True}})
+
+        self.assertEqual(set(plan.get_msg_id_routes('_1')[1]), {('battery_ok', 'battery_ok_1'), ('status', 'status')})
+        self.assertEqual(plan.get_msg_id_routes('_2')[1], (('status', 'status'),))
+
+    def test_msg_ids_not_shared_when_not_ignored(self):
+        plan = self.get_plan(False)
+
+        self.assertIsNot(plan.get_msg_id_routes('_2'), plan.unknown_msg_id_routes)
+
+    def test_routes_are_bounded(self):
+        plan = self.get_plan(False)
+
+        with mock.patch('user.MQTTSubscribe.TopicPlan.msg_id_routes_size', 2):
+            plan.get_msg_id_routes('_1')
+            plan.get_msg_id_routes('_2')
+            plan.get_msg_id_routes('_3')
+
+        self.assertEqual(list(plan.msg_id_routes), ['_3'])
+
+class TestGetDecompressor(unittest.TestCase):
+    def test_not_compressed(self):
+        mock_logger = mock.Mock(spec=Logger)
+        topic = random_string()
+        config = configobj.ConfigObj({topic: {'message': {'type': 'json'}}})
+
+        SUT = TopicManager(None, config, mock_logger)
+
+        self.assertIsNone(SUT.get_decompressor(topic))
+
+    def test_decompressor_is_kept(self):
+        mock_logger = mock.Mock(spec=Logger)
+        topic = random_string()
+        max_decompressed_size = random.randint(1000, 10000)
+        config = configobj.ConfigObj({topic: {'message': {'type': 'json',
+                                                          'compression': 'gzip',
+                                                          'max_decompressed_size': max_decompressed_size}}})
+
+        SUT = TopicManager(None, config, mock_logger)
+        decompressor = SUT.get_decompressor(topic)
+
+        self.assertEqual(decompressor.compression, 'gzip')
+        self.assertEqual(decompressor.max_size, max_decompressed_size)
+        self.assertIs(SUT.get_decompressor(topic), decompressor)
+
+    def test_log_compression_statistics(self):
+        mock_logger = mock.Mock(spec=Logger)
+        topic = random_string()
+        config = configobj.ConfigObj({topic: {'message': {'type': 'json', 'compression': 'zlib'}}})
+
+        SUT = TopicManager(None, config, mock_logger)
+        decompressor = SUT.get_decompressor(topic)
+        decompressor.count = 2
+        decompressor.compressed_bytes = 100
+        decompressor.decompressed_bytes = 400
+
+        SUT.log_compression_statistics()
+
+        mock_logger.info.assert_called_once_with(52002, TopicManager.msgX[52002],
+                                                 topic=topic,
+                                                 count=2,
+                                                 compressed_bytes=100,
+                                                 decompressed_bytes=400,
+                                                 ratio=4.0,
+                                                 seconds=0.0,
+                                                 errors=0)
+
+class TestGetDuplicateFilter(unittest.TestCase):
+    def test_duplicates_not_suppressed(self):
+        mock_logger = mock.Mock(spec=Logger)
+        topic = random_string()
+        config = configobj.ConfigObj({topic: {'message': {'type': 'json'}}})
+
+        SUT = TopicManager(None, config, mock_logger)
+
+        self.assertIsNone(SUT.get_duplicate_filter(topic))
+
+    def test_duplicate_filter_is_kept(self):
+        mock_logger = mock.Mock(spec=Logger)
+        topic = random_string()
+        duplicate_window = random.randint(1, 600)
+        max_duplicates = random.randint(10, 1000)
+        config = configobj.ConfigObj({topic: {'message': {'type': 'json',
+                                                          'duplicate_key': 'dateTime',
+                                                          'duplicate_window': duplicate_window,
+                                                          'max_duplicates': max_duplicates}}})
+
+        SUT = TopicManager(None, config, mock_logger)
+        duplicate_filter = SUT.get_duplicate_filter(topic)
+
+        self.assertEqual(duplicate_filter.key, 'dateTime')
+        self.assertEqual(duplicate_filter.window, duplicate_window)
+        self.assertEqual(duplicate_filter.size, max_duplicates)
+        self.assertIs(SUT.get_duplicate_filter(topic), duplicate_filter)
+
+    def test_log_duplicate_statistics(self):
+        mock_logger = mock.Mock(spec=Logger)
+        topic = random_string()
+        config = configobj.ConfigObj({topic: {'message': {'type': 'json', 'duplicate_key': 'payload'}}})
+
+        SUT = TopicManager(None, config, mock_logger)
+        duplicate_filter = SUT.get_duplicate_filter(topic)
+        duplicate_filter.count = 10
+        duplicate_filter.suppressed = 3
+
+        SUT.log_duplicate_statistics()
+
+        mock_logger.info.assert_called_once_with(52003, TopicManager.msgX[52003], topic=topic, suppressed=3, count=10)
+
+class TestGetCircuitBreaker(unittest.TestCase):
+    def test_messages_never_dropped(self):
+        mock_logger = mock.Mock(spec=Logger)
+        topic = random_string()
+        config = configobj.ConfigObj({topic: {'message': {'type': 'json'}}})
+
+        SUT = TopicManager(None, config, mock_logger)
+
+        self.assertIsNone(SUT.get_circuit_breaker(topic))
+
+    def test_circuit_breaker_is_kept(self):
+        mock_logger = mock.Mock(spec=Logger)
+        topic = random_string()
+        failures = random.randint(1, 10)
+        interval = random.randint(1, 600)
+        config = configobj.ConfigObj({topic: {'message': {'type': 'json',
+                                                          'circuit_breaker_failures': failures,
+                                                          'circuit_breaker_interval': interval}}})
+
+        SUT = TopicManager(None, config, mock_logger)
+        circuit_breaker = SUT.get_circuit_breaker(topic)
+
+        self.assertEqual(circuit_breaker.topic, topic)
+        self.assertEqual(circuit_breaker.max_failures, failures)
+        self.assertEqual(circuit_breaker.interval, interval)
+        self.assertIs(SUT.get_circuit_breaker(topic), circuit_breaker)
+
+    def test_log_circuit_breaker_statistics(self):
+        mock_logger = mock.Mock(spec=Logger)
+        topic = random_string()
+        config = configobj.ConfigObj({topic: {'message': {'type': 'json', 'circuit_breaker_failures': 5}}})
+
+        SUT = TopicManager(None, config, mock_logger)
+        circuit_breaker = SUT.get_circuit_breaker(topic)
+        circuit_breaker.dropped = 10
+        circuit_breaker.failed = 3
+
+        SUT.log_circuit_breaker_statistics()
+
+        mock_logger.info.assert_called_once_with(52004, TopicManager.msgX[52004], topic=topic, dropped=10, failed=3)
+
 class TestConfigureMessage(unittest.TestCase):
     def setUp(self):
         # reset stubs for every test
@@ -693,6 +986,35 @@ class TestAppendData(unittest.TestCase):
         data = queue_element['data']
         self.assertDictEqual(data, queue_data)
 
+    def test_max_queue(self):
+        max_queue = random.randint(3, 10)
+        config = configobj.ConfigObj({self.topic: {'max_queue': str(max_queue)}})
+        records = [{'inTemp': random.uniform(1, 100), 'usUnits': 1, 'dateTime': time.time() + i} for i in range(max_queue + 2)]
+
+        mock_logger = mock.Mock(spec=Logger)
+
+        SUT = TopicManager(None, config, mock_logger)
+
+        for record in records:
+            SUT.append_data(self.topic, record)
+        queue = SUT._get_queue(self.topic)['data']
+
+        self.assertEqual([element['data']['dateTime'] for element in queue], [record['dateTime'] for record in records[-max_queue:]])
+        self.assertEqual(mock_logger.error.call_count, 2)
+
+    def test_default_max_queue(self):
+        config = configobj.ConfigObj({'max_queue': '2', self.topic: {}})
+        records = [{'inTemp': random.uniform(1, 100), 'usUnits': 1, 'dateTime': time.time() + i} for i in range(3)]
+
+        mock_logger = mock.Mock(spec=Logger)
+
+        SUT = TopicManager(None, config, mock_logger)
+
+        for record in records:
+            SUT.append_data(self.topic, record)
+
+        self.assertEqual(len(SUT._get_queue(self.topic)['data']), 2)
+
     def test_append_good_data_use_server_datetime(self):
         queue_data_subset = {
             'inTemp': random.uniform(1, 100),
@@ -877,6 +1199,92 @@ class TestAppendData(unittest.TestCase):
         self.assertIn('dateTime', data)
         self.assertEqual(adjusted_epoch, data['dateTime'])
 
+    def test_dateteime_format_trace(self):
+        datetime_format = "%Y-%m-%d %H:%M:%S"
+        offset_format = "hhmm"
+        current_epoch = int(time.time())
+        datetime_input = f"{datetime.datetime.fromtimestamp(current_epoch).strftime(datetime_format)}+0000"
+
+        config = copy.deepcopy(self.config)
+        config['datetime_format'] = datetime_format
+        config['offset_format'] = offset_format
+
+        mock_logger = mock.Mock(spec=Logger)
+        mock_logger.is_enabled.return_value = True
+
+        SUT = TopicManager(None, config, mock_logger)
+
+        SUT.append_data(self.topic, {'dateTime': datetime_input})
+
+        mock_logger.trace.assert_any_call(50015, TopicManager.msgX[50015],
+                                          datetime_input=datetime_input, datetime_format=datetime_format, offset_format=offset_format)
+        mock_logger.trace.assert_any_call(50017, TopicManager.msgX[50017],
+                                          datetime_string=datetime_input[:-5], epoch=current_epoch)
+
+class TestAppendBatch(unittest.TestCase):
+    topic = random_string()
+
+    def setUp(self):
+        # reset stubs for every test
+        test_weewx_stubs.setup_stubs()
+
+    def tearDown(self):
+        # cleanup stubs
+        del sys.modules['weecfg']
+        del sys.modules['weeutil']
+        del sys.modules['weeutil.config']
+        del sys.modules['weeutil.weeutil']
+        del sys.modules['weeutil.logger']
+        del sys.modules['weewx']
+        del sys.modules['weewx.drivers']
+        del sys.modules['weewx.engine']
+
+    @staticmethod
+    def create_records(count):
+        return [{'inTemp': random.uniform(1, 100), 'usUnits': 1, 'dateTime': time.time() + i} for i in range(count)]
+
+    def test_append_batch(self):
+        records = self.create_records(random.randint(2, 10))
+        records[0].pop('usUnits')
+        config = configobj.ConfigObj({self.topic: {}})
+        mock_logger = mock.Mock(spec=Logger)
+
+        SUT = TopicManager(None, config, mock_logger)
+
+        SUT.append_batch(self.topic, records)
+        queue = SUT._get_queue(self.topic)['data']
+
+        self.assertEqual([element['data']['dateTime'] for element in queue], [record['dateTime'] for record in records])
+        self.assertEqual(queue[0]['data']['usUnits'], 1)
+
+    def test_max_queue_keeps_newest(self):
+        max_queue = random.randint(3, 10)
+        config = configobj.ConfigObj({self.topic: {'max_queue': max_queue}})
+        mock_logger = mock.Mock(spec=Logger)
+
+        SUT = TopicManager(None, config, mock_logger)
+
+        SUT.append_batch(self.topic, self.create_records(1))
+        records = self.create_records(max_queue + 2)
+        SUT.append_batch(self.topic, records)
+        queue = SUT._get_queue(self.topic)['data']
+
+        self.assertEqual([element['data']['dateTime'] for element in queue], [record['dateTime'] for record in records[-max_queue:]])
+        self.assertEqual(mock_logger.error.call_count, 3)
+
+    def test_max_queue_makes_room(self):
+        max_queue = random.randint(3, 10)
+        config = configobj.ConfigObj({self.topic: {'max_queue': str(max_queue)}})
+        mock_logger = mock.Mock(spec=Logger)
+
+        SUT = TopicManager(None, config, mock_logger)
+
+        SUT.append_batch(self.topic, self.create_records(max_queue))
+        SUT.append_batch(self.topic, self.create_records(2))
+
+        self.assertEqual(len(SUT._get_queue(self.topic)['data']), max_queue)
+        self.assertEqual(mock_logger.error.call_count, 2)
+
 class TestGetQueueData(unittest.TestCase):
     topic = random_string()
     config_dict = {}
@@ -0,0 +1,70 @@
+#
+#    Copyright (c) 2025 Rich Bell <bellrichm@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+
+# pylint: disable=wrong-import-order
+# pylint: disable=wrong-import-position
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+
+import unittest
+import xml.etree.ElementTree
+
+import test_weewx_stubs
+from test_weewx_stubs import BaseTestClass
+# setup stubs before importing MQTTSubscribe
+test_weewx_stubs.setup_stubs()
+from user.MQTTSubscribe import XMLDecoder
+
+PAYLOAD = b"""<?xml version="1.0"?>
+<current station="home">
+    <!-- <lastupdate> 2016-11-15 10:48:27</lastupdate> -->
+    <temperature>18.9</temperature>
+    <wind units="mph">
+        <direction>288</direction>
+        <speed> 0.4 </speed>
+    </wind>
+    <test1><test attval='99'></test></test1>
+    <empty></empty>
+</current>
+"""
+
+class TestDecode(BaseTestClass):
+    def test_elements_are_named_by_path(self):
+        SUT = XMLDecoder()
+
+        self.assertEqual(SUT.decode(PAYLOAD), {
+            'station': 'home',
+            'temperature': '18.9',
+            'wind_units': 'mph',
+            'wind_direction': '288',
+            'wind_speed': '0.4',
+            'test1_test_attval': '99',
+        })
+
+    def test_namespace_is_removed(self):
+        SUT = XMLDecoder()
+
+        self.assertEqual(SUT.decode(b'<current xmlns="urn:weather"><temperature>18.9</temperature></current>'),
+                         {'temperature': '18.9'})
+
+    def test_nested_elements(self):
+        SUT = XMLDecoder()
+
+        self.assertEqual(SUT.decode(b'<a><b><c><d>1</d></c><e>2</e></b><f>3</f></a>'), {'b_c_d': '1', 'b_e': '2', 'f': '3'})
+
+    def test_only_keys_are_kept(self):
+        SUT = XMLDecoder(frozenset(['wind_speed', 'test1_test_attval']), frozenset(['wind_', 'test1_', 'test1_test_']))
+
+        self.assertEqual(SUT.decode(PAYLOAD), {'wind_speed': '0.4', 'test1_test_attval': '99'})
+
+    def test_invalid_xml(self):
+        SUT = XMLDecoder()
+
+        with self.assertRaises(xml.etree.ElementTree.ParseError):
+            SUT.decode(b'<current><temperature>18.9</current>')
+
+if __name__ == '__main__':
+    unittest.main(exit=False)